@@ -1,14 +1,15 @@
 """
 GearVue Flask Application
 """
-from flask import Flask, session, json, request
+from flask import Flask, session, json, request, flash, jsonify, make_response
 from flask_mail import Mail
 from flask_wtf.csrf import CSRFProtect
 from app.models.equipment import EquipmentDataManager
-from app.models.json_equipment import JsonEquipmentDataManager
-from app.models.json_checkout import JsonCheckoutManager
-from app.models.json_utils import DateTimeEncoder
-from app.models.standard_values import StandardValuesManager
+from app.models.json_utils import DateTimeEncoder, configure_write_behind
+from app.models.registry import ManagerRegistry
+from app.models.storage import (
+    get_storage_backend, refresh_managers, begin_unit_of_work, end_unit_of_work
+)
 from app.utils.notifications.email_service import email_service
 import datetime
 import os
@@ -22,6 +23,15 @@ app.config.from_mapping(
     SECRET_KEY='dev',
     DATA_DIR='Resources',
     JSON_DATA_DIR='app/data',
+
+    # Persistence backend for the data managers: 'json' (one file per dataset)
+    # or 'sqlite' (single database, imported from the JSON files on first use)
+    STORAGE_BACKEND=os.environ.get('STORAGE_BACKEND', 'json'),
+    SQLITE_DATABASE=os.environ.get('SQLITE_DATABASE', None),
+    # Write JSON files from a background thread, coalescing rapid saves
+    JSON_WRITE_BEHIND=os.environ.get('JSON_WRITE_BEHIND', 'False').lower() in ['true', '1', 't'],
+    JSON_WRITE_BEHIND_WINDOW=float(os.environ.get('JSON_WRITE_BEHIND_WINDOW', 0.5)),
+    JSON_WRITE_BEHIND_MAX_DELAY=float(os.environ.get('JSON_WRITE_BEHIND_MAX_DELAY', 2.0)),
     SESSION_PERMANENT=True,
     PERMANENT_SESSION_LIFETIME=datetime.timedelta(days=7),
     # Disable CSRF protection globally for easy mobile access
@@ -51,10 +61,29 @@ os.makedirs(app.config['JSON_DATA_DIR'], exist_ok=True)
 # Legacy Excel-based equipment manager
 excel_equipment_manager = EquipmentDataManager(app.config['DATA_DIR'])
 
-# New JSON-based managers
-equipment_manager = JsonEquipmentDataManager(app.config['JSON_DATA_DIR'])
-checkout_manager = JsonCheckoutManager(app.config['JSON_DATA_DIR'])
-standard_values_manager = StandardValuesManager(app.config['JSON_DATA_DIR'])
+# Queue JSON saves for the background flusher when write-behind is enabled
+if app.config['JSON_WRITE_BEHIND']:
+    configure_write_behind(
+        window=app.config['JSON_WRITE_BEHIND_WINDOW'],
+        max_delay=app.config['JSON_WRITE_BEHIND_MAX_DELAY']
+    )
+
+# Storage backend shared by the data managers
+storage_backend = get_storage_backend(
+    app.config['JSON_DATA_DIR'],
+    app.config['STORAGE_BACKEND'],
+    app.config['SQLITE_DATABASE']
+)
+
+# New JSON-based managers, one shared instance of each, created on first use
+managers = ManagerRegistry(app, app.config['JSON_DATA_DIR'], storage=storage_backend)
+equipment_manager = managers.proxy('equipment')
+checkout_manager = managers.proxy('checkout')
+standard_values_manager = managers.proxy('standard_values')
+ticket_manager = managers.proxy('ticket')
+transport_manager = managers.proxy('transport')
+# Equipment joined with status, condition, tickets and transport, per id
+equipment_view = managers.proxy('equipment_view')
 
 # Initialize Flask-Mail
 mail = Mail(app)
@@ -151,6 +180,20 @@ def from_iso_date(value):
     
     return value
 
+# Each gunicorn worker keeps its own copy of the data; reload whatever
+# another worker has written before handling the request
+@app.before_request
+def refresh_data():
+    """Bring the data managers up to date with changes made by other workers."""
+    refresh_managers()
+    # Queue this request's writes so each dataset is written at most once
+    begin_unit_of_work()
+
+@app.teardown_request
+def flush_data(exception=None):
+    """Write out what a request that failed before commit_data changed."""
+    end_unit_of_work()
+
 # Define main route 
 # Add special header for QR routes
 @app.after_request
@@ -170,6 +213,25 @@ def add_response_headers(response):
 
     return response
 
+@app.after_request
+def commit_data(response):
+    """Write out every dataset the request changed before the response is sent.
+    
+    The managers' save methods only queue their writes, so a write that
+    fails here turns the response into an error instead of a success.
+    Registered after add_response_headers so that it runs before it.
+    """
+    if end_unit_of_work():
+        return response
+    
+    message = 'The changes could not be saved. Please try again.'
+    if request.is_json or response.is_json or '/api/' in request.path:
+        return make_response(jsonify({"status": "error", "message": message}), 500)
+    # Replace the success messages queued by the view with the error
+    session.pop('_flashes', None)
+    flash(message, 'danger')
+    return make_response(message, 500)
+
 @app.route('/')
 def index():
     return dashboard.index()
\ No newline at end of file
@@ -19,9 +19,7 @@ from email.mime.application import MIMEApplication
 
 # Import necessary models and utilities
 from app.models.json_utils import save_json, load_json, DateTimeEncoder
-from app import equipment_manager, checkout_manager
-from app.models.ticket import TicketManager
-from app.models.transport_request import TransportManager
+from app import equipment_manager, checkout_manager, ticket_manager, transport_manager
 
 # Try to import PDF generation library
 try:
@@ -99,8 +97,8 @@ class AutoReportManager:
         self.report_schedule = {}
         self.scheduler_thread = None
         self.is_running = False
-        self.ticket_manager = TicketManager()
-        self.transport_manager = TransportManager()
+        self.ticket_manager = ticket_manager
+        self.transport_manager = transport_manager
         
         # Load or create configuration
         self.config = self._load_or_create_config()
@@ -418,8 +416,8 @@ class AutoReportManager:
     
     def _generate_inventory_report_data(self):
         """Generate data for inventory report."""
-        # Get all equipment
-        equipment_list = equipment_manager.get_all_equipment()
+        # Get all equipment (copies, since status fields are added below)
+        equipment_list = [item.copy() for item in equipment_manager.get_all_equipment()]
         
         # Add status information
         for item in equipment_list:
@@ -436,9 +434,7 @@ class AutoReportManager:
             grouped_data[category].append(item)
         
         # Count by status
-        status_counts = {}
-        for status in checkout_manager.STATUS_OPTIONS:
-            status_counts[status] = len([item for item in equipment_list if item.get('status') == status])
+        status_counts = checkout_manager.get_status_counts([item['id'] for item in equipment_list])
         
         return {
             'title': 'Equipment Inventory Report',
@@ -456,32 +452,11 @@ class AutoReportManager:
         # Get overdue equipment
         overdue = checkout_manager.get_overdue_equipment()
         
-        # Get checkout history
-        history = checkout_manager.get_checkout_history()
-        
-        # Filter history by date range if specified
+        # Get checkout history, by date range if specified
         if start_date and end_date:
-            filtered_history = []
-            for entry in history:
-                try:
-                    timestamp = entry.get('timestamp', '')
-                    if timestamp:
-                        # Handle ISO format strings
-                        if isinstance(timestamp, str):
-                            if 'T' in timestamp:
-                                entry_date = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                            else:
-                                # Try to parse date
-                                entry_date = datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S')
-                        else:
-                            entry_date = timestamp
-                        
-                        if start_date <= entry_date <= end_date:
-                            filtered_history.append(entry)
-                except Exception as e:
-                    print(f"Error parsing timestamp: {e}")
-            
-            history = filtered_history
+            history = checkout_manager.get_checkout_history(since=start_date, until=end_date)
+        else:
+            history = checkout_manager.get_checkout_history()
         
         return {
             'title': 'Equipment Checkout Report',
@@ -0,0 +1,142 @@
+"""
+Calibration due date normalization.
+
+Calibration due dates are entered as free text ("08/2025", "May 2025",
+"05/2025 - repaired", "Overdue"). This module turns such text into a
+canonical due datetime once, so the managers can parse each record when it
+is loaded and every page reads the stored result.
+
+Dates that only give a month are due at the end of that month.
+"""
+import calendar
+import re
+from datetime import datetime
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+# Month names and abbreviations (English, as the spreadsheets use)
+_MONTHS = {name.lower(): number for number, name in enumerate(calendar.month_name) if name}
+_MONTHS.update({name.lower(): number for number, name in enumerate(calendar.month_abbr) if name})
+_MONTHS['sept'] = 9
+
+# Recognized formats, tried in order: (name, compiled pattern, precision)
+_FORMATS = [
+    ('MM/YYYY', re.compile(r'(?P<month>\d{1,2})[/-](?P<year>\d{4})'), 'month'),
+    ('MM/DD/YYYY', re.compile(r'(?P<month>\d{1,2})/(?P<day>\d{1,2})/(?P<year>\d{4})'), 'day'),
+    ('YYYY-MM-DD', re.compile(r'(?P<year>\d{4})-(?P<month>\d{1,2})-(?P<day>\d{1,2})(?:[T ][\d:.]+)?'), 'day'),
+    ('DD-MM-YYYY', re.compile(r'(?P<day>\d{1,2})-(?P<month>\d{1,2})-(?P<year>\d{4})'), 'day'),
+    ('MM-DD-YYYY', re.compile(r'(?P<month>\d{1,2})-(?P<day>\d{1,2})-(?P<year>\d{4})'), 'day'),
+    ('Month YYYY', re.compile(r'(?P<month_name>[A-Za-z]+)\.?,?\s+(?P<year>\d{4})'), 'month'),
+]
+
+# Text that states the status without (or besides) a date
+_STATUS_FLAGS = [('overdue', 'overdue'), ('due soon', 'due_soon')]
+
+
+class CalibrationDate(NamedTuple):
+    """Result of normalizing one calibration due date.
+
+    Attributes:
+        text: The text as stored on the record
+        due: Canonical due datetime, or None if no date could be read
+        format: Name of the format that matched, or None
+        note: Text that followed the date (e.g. "repaired"), or None
+        flag: Status stated in the text ('overdue' or 'due_soon'), or None
+        error: Why the text could not be parsed, or None
+    """
+    text: str
+    due: Optional[datetime]
+    format: Optional[str]
+    note: Optional[str]
+    flag: Optional[str]
+    error: Optional[str]
+
+    def days_until_due(self, now=None):
+        """Whole days from now until the due date (negative when overdue)."""
+        return (self.due - (now or datetime.now())).days
+
+    def status(self, now=None, soon_days=30):
+        """Classify the date as 'overdue', 'due_soon', 'current' or 'unknown'.
+
+        Args:
+            now: Reference time (defaults to the current time)
+            soon_days: Number of days to consider "due soon"
+
+        Returns:
+            Tuple of (status, days until due or None)
+        """
+        if self.due is None:
+            return 'unknown', None
+        days = self.days_until_due(now)
+        if days < 0:
+            return 'overdue', days
+        if days <= soon_days:
+            return 'due_soon', days
+        return 'current', days
+
+
+def _end_of_month(year, month):
+    """Last day of a month, as a datetime."""
+    return datetime(year, month, calendar.monthrange(year, month)[1])
+
+
+def _build(match, precision):
+    """Build the due datetime from a format match; raises ValueError if invalid."""
+    fields = match.groupdict()
+    year = int(fields['year'])
+    if fields.get('month_name'):
+        name = fields['month_name'].lower()
+        if name not in _MONTHS:
+            raise ValueError(f"unknown month name '{fields['month_name']}'")
+        month = _MONTHS[name]
+    else:
+        month = int(fields['month'])
+    if precision == 'month':
+        if not 1 <= month <= 12:
+            raise ValueError(f"month {month} out of range")
+        return _end_of_month(year, month)
+    return datetime(year, month, int(fields['day']))
+
+
+def parse_calibration_date(value):
+    """Normalize a calibration due date.
+
+    Text after " - " is kept as a note ("05/2025 - repaired"). Results are
+    cached per distinct text, so repeated values are parsed once.
+
+    Args:
+        value: Calibration due date as stored (any type)
+
+    Returns:
+        CalibrationDate
+    """
+    if value is None or value != value:
+        value = ''
+    return _parse_text(str(value).strip())
+
+
+@lru_cache(maxsize=4096)
+def _parse_text(text):
+    """Parse stripped calibration date text (see parse_calibration_date)."""
+    if not text:
+        return CalibrationDate('', None, None, None, None, 'missing')
+
+    lowered = text.lower()
+    flag = next((status for marker, status in _STATUS_FLAGS if marker in lowered), None)
+
+    date_part, _, note = text.partition(' - ')
+    date_part = date_part.strip()
+    note = note.strip() or None
+
+    error = 'unrecognized format'
+    for name, pattern, precision in _FORMATS:
+        match = pattern.fullmatch(date_part)
+        if not match:
+            continue
+        try:
+            return CalibrationDate(text, _build(match, precision), name, note, flag, None)
+        except ValueError as e:
+            # A later format may still read it (e.g. DD-MM vs MM-DD)
+            error = f"invalid date ({e})"
+
+    return CalibrationDate(text, None, None, note, flag, error)
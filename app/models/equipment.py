@@ -1,15 +1,108 @@
 """
 Equipment data models for the application.
 This module handles loading, processing, and accessing equipment data.
+
+The Excel workbooks are only read when the data is first used. The cleaned
+DataFrames are then saved to a binary snapshot (a pickle) keyed by the
+workbooks' modification time and size, and by their SHA-256 when those
+differ, so later starts load the snapshot instead of parsing the workbooks.
+pandas itself is only imported by the first load.
 """
+import hashlib
+import multiprocessing
 import os
-import pandas as pd
+import pickle
+import threading
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor
 from datetime import datetime
-import json
+from app.models.calibration_dates import parse_calibration_date
+from app.models.json_utils import DateTimeEncoder, _atomic_write
+
+# Bump when the cleaned DataFrames change shape, to discard older snapshots
+SNAPSHOT_VERSION = 2
+
+# Default snapshot file, in the directory of the Excel files
+SNAPSHOT_FILENAME = '.excel_snapshot.pickle'
+
+# Workbooks are parsed in parallel processes from this combined size, when
+# the caller asks for it (see EquipmentDataManager.load_data)
+PARALLEL_PARSE_MIN_BYTES = 1 << 20
+
+# Category of the equipment in each sheet
+CATEGORY_NAMES = {
+    'chambers': 'Chamber',
+    'electrometers': 'Electrometer',
+    'survey_meters': 'Survey Meter',
+}
+
+
+def _loaded_attribute(name, doc):
+    """Property reading a DataFrame attribute, loading the data on first access."""
+    def get(self):
+        self._ensure_loaded()
+        return getattr(self, name)
+    return property(get, doc=doc)
+
+
+def _file_hash(file_path):
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _id_part(column):
+    """Render an id component as str() renders each value, with spaces as underscores."""
+    text = column.astype(str)
+    # astype(str) leaves missing values missing; str() gives 'nan' or 'None'
+    missing = column.isna()
+    if missing.any():
+        text = text.astype(object)
+        text[missing] = column[missing].map(str)
+    return text.str.replace(' ', '_', regex=False)
+
+
+def _parse_in_parallel(file_paths):
+    """Whether to parse workbooks in worker processes."""
+    if (os.cpu_count() or 1) < 2 or 'fork' not in multiprocessing.get_all_start_methods():
+        return False
+    return sum(os.path.getsize(file_path) for file_path in file_paths) >= PARALLEL_PARSE_MIN_BYTES
+
+
+def _parse_workbook(file_path, sheets):
+    """Read and clean the sheets of one workbook (runs in worker processes).
+    
+    Args:
+        file_path: Path to the Excel file
+        sheets: (sheet name, equipment type) pairs
+        
+    Returns:
+        List of cleaned DataFrames, one per sheet
+    """
+    import pandas as pd
+    
+    raw_sheets = pd.read_excel(file_path, sheet_name=[sheet_name for sheet_name, _ in sheets])
+    frames = []
+    for sheet_name, equipment_type in sheets:
+        raw = raw_sheets[sheet_name]
+        # Use row 1 as column names
+        raw.columns = raw.iloc[1]
+        # Skip the first 3 rows (0=header, 1=column names, 2=empty row)
+        frames.append(EquipmentDataManager._clean_dataframe(raw.iloc[3:].reset_index(drop=True), equipment_type))
+    return frames
+
 
 class EquipmentDataManager:
     """Manages equipment data, including loading from Excel and providing access methods."""
     
+    chambers_df = _loaded_attribute('_chambers_df', "DataFrame of the chambers")
+    electrometers_df = _loaded_attribute('_electrometers_df', "DataFrame of the electrometers")
+    survey_meters_df = _loaded_attribute('_survey_meters_df', "DataFrame of the survey meters")
+    all_equipment_df = _loaded_attribute('_all_equipment_df', "DataFrame of all equipment indexed by id")
+    equipment_by_id = _loaded_attribute('_equipment_by_id', "Equipment by id (dictionaries without 'id')")
+    
     # Column mapping between Excel and our unified model
     COLUMN_MAPPING = {
         'chambers': {
@@ -42,69 +135,189 @@ class EquipmentDataManager:
         }
     }
     
-    def __init__(self, data_dir='Resources'):
+    def __init__(self, data_dir='Resources', snapshot_path=None):
         """Initialize the equipment data manager.
         
+        The data is loaded on first access (or by calling load_data).
+        
         Args:
             data_dir: Directory containing the Excel files
+            snapshot_path: File caching the parsed workbooks (default:
+                SNAPSHOT_FILENAME in data_dir; False to disable the snapshot)
         """
         self.data_dir = data_dir
         self.chambers_file = os.path.join(data_dir, '2025 Health Physics Equipment List_Chambers & Electrometers.xls')
         self.survey_meters_file = os.path.join(data_dir, '2025 Survey Meter Inventory & Calibration_updated 0425.xls')
+        if snapshot_path is None:
+            snapshot_path = os.path.join(data_dir, SNAPSHOT_FILENAME)
+        self.snapshot_path = snapshot_path
         
         # DataFrames to store our equipment data
-        self.chambers_df = None
-        self.electrometers_df = None
-        self.survey_meters_df = None
+        self._chambers_df = None
+        self._electrometers_df = None
+        self._survey_meters_df = None
         
         # Combined and processed data
-        self.all_equipment_df = None
+        self._all_equipment_df = None
         
         # Cache of equipment by ID for quicker lookups
-        self.equipment_by_id = {}
+        self._equipment_by_id = {}
         
-        # Load data
-        self.load_data()
+        # Whether the data has been loaded (from the snapshot or the workbooks)
+        self._loaded = False
+        self._load_lock = threading.Lock()
+    
+    def _ensure_loaded(self):
+        """Load the data if it has not been loaded yet."""
+        if self._loaded:
+            return
+        with self._load_lock:
+            if not self._loaded:
+                self.load_data()
     
-    def load_data(self):
-        """Load and process all equipment data from Excel files."""
+    def load_data(self, parallel=False):
+        """Load and process all equipment data, from the snapshot when the
+        Excel files have not changed since it was saved.
+        
+        Args:
+            parallel: Parse large workbooks in forked worker processes. Only
+                for single-threaded callers (command line tools, startup
+                before serving): forking a process whose other threads may
+                hold locks can deadlock the workers. Loads on first access
+                parse in the calling thread.
+        """
+        import pandas as pd
         
         try:
-            # Load chambers data
-            raw_chambers = pd.read_excel(self.chambers_file, sheet_name='Chambers')
-            # Use row 1 as column names
-            raw_chambers.columns = raw_chambers.iloc[1]
-            # Skip the first 3 rows (0=header, 1=column names, 2=empty row)
-            self.chambers_df = self._clean_dataframe(raw_chambers.iloc[3:].reset_index(drop=True), 'chambers')
-            
-            # Load electrometers data
-            raw_electrometers = pd.read_excel(self.chambers_file, sheet_name='Electrometers')
-            # Use row 1 as column names
-            raw_electrometers.columns = raw_electrometers.iloc[1]
-            # Skip the first 3 rows
-            self.electrometers_df = self._clean_dataframe(raw_electrometers.iloc[3:].reset_index(drop=True), 'electrometers')
-            
-            # Load survey meters data
-            raw_survey_meters = pd.read_excel(self.survey_meters_file, sheet_name='Survey Meters')
-            # Use row 1 as column names
-            raw_survey_meters.columns = raw_survey_meters.iloc[1]
-            # Skip the first 3 rows
-            self.survey_meters_df = self._clean_dataframe(raw_survey_meters.iloc[3:].reset_index(drop=True), 'survey_meters')
+            sources = self._source_stamps()
+            frames = self._read_snapshot(sources)
+            if frames is None:
+                frames = self._parse_workbooks(parallel)
+                self._write_snapshot(sources, frames)
+            self._chambers_df, self._electrometers_df, self._survey_meters_df = frames
             
             # Combine all equipment into a single DataFrame
             self._combine_equipment_data()
             
-            print(f"Loaded {len(self.chambers_df)} chambers, {len(self.electrometers_df)} electrometers, {len(self.survey_meters_df)} survey meters")
+            print(f"Loaded {len(self._chambers_df)} chambers, {len(self._electrometers_df)} electrometers, {len(self._survey_meters_df)} survey meters")
             
         except Exception as e:
             print(f"Error loading equipment data: {e}")
             # Initialize empty DataFrames in case of error
-            self.chambers_df = pd.DataFrame()
-            self.electrometers_df = pd.DataFrame()
-            self.survey_meters_df = pd.DataFrame()
-            self.all_equipment_df = pd.DataFrame()
+            self._chambers_df = pd.DataFrame()
+            self._electrometers_df = pd.DataFrame()
+            self._survey_meters_df = pd.DataFrame()
+            self._all_equipment_df = pd.DataFrame()
+            self._equipment_by_id = {}
+        self._loaded = True
+    
+    def _source_stamps(self):
+        """Get the modification time and size of each Excel file."""
+        stamps = {}
+        for file_path in (self.chambers_file, self.survey_meters_file):
+            stat = os.stat(file_path)
+            stamps[os.path.basename(file_path)] = (stat.st_mtime_ns, stat.st_size)
+        return stamps
+    
+    def _source_hashes(self):
+        """Get the SHA-256 of each Excel file."""
+        return {os.path.basename(file_path): _file_hash(file_path)
+                for file_path in (self.chambers_file, self.survey_meters_file)}
+    
+    def _read_snapshot(self, sources):
+        """Load the parsed workbooks from the snapshot, if it is current.
+        
+        A snapshot whose stamps differ from the files' is still used when the
+        contents hash the same (files copied or touched); it is then saved
+        again with the new stamps.
+        
+        Args:
+            sources: Current stamps of the Excel files (see _source_stamps)
+            
+        Returns:
+            Tuple of the chambers, electrometers and survey meters DataFrames,
+            or None if there is no usable snapshot
+        """
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return None
+        import pandas as pd
+        try:
+            with open(self.snapshot_path, 'rb') as f:
+                snapshot = pickle.load(f)
+        except Exception as e:
+            print(f"Ignoring unreadable equipment snapshot {self.snapshot_path}: {e}")
+            return None
+        if (not isinstance(snapshot, dict)
+                or snapshot.get('version') != SNAPSHOT_VERSION
+                or snapshot.get('pandas') != pd.__version__):
+            return None
+        
+        if snapshot['stamps'] != sources:
+            if snapshot['hashes'] != self._source_hashes():
+                return None
+            self._write_snapshot(sources, snapshot['frames'], snapshot['hashes'])
+        return snapshot['frames']
+    
+    def _write_snapshot(self, sources, frames, hashes=None):
+        """Save the parsed workbooks to the snapshot file.
+        
+        Args:
+            sources: Stamps of the Excel files the frames were parsed from
+            frames: Tuple of the chambers, electrometers and survey meters DataFrames
+            hashes: SHA-256 of the Excel files (computed if not given)
+        """
+        if not self.snapshot_path:
+            return
+        import pandas as pd
+        snapshot = {
+            'version': SNAPSHOT_VERSION,
+            'pandas': pd.__version__,
+            'stamps': sources,
+            'hashes': hashes or self._source_hashes(),
+            'frames': frames,
+        }
+        try:
+            _atomic_write(self.snapshot_path, pickle.dumps(snapshot, protocol=pickle.HIGHEST_PROTOCOL))
+        except OSError as e:
+            # The data directory may be read-only; parse the workbooks next time
+            print(f"Could not save equipment snapshot {self.snapshot_path}: {e}")
+    
+    def _workbook_jobs(self):
+        """Get each Excel file with its sheets as (sheet name, equipment type) pairs."""
+        return [
+            (self.chambers_file, (('Chambers', 'chambers'), ('Electrometers', 'electrometers'))),
+            (self.survey_meters_file, (('Survey Meters', 'survey_meters'),)),
+        ]
     
-    def _clean_dataframe(self, df, equipment_type):
+    def _parse_workbooks(self, parallel=False):
+        """Read and clean the three equipment sheets from the Excel files.
+        
+        Each workbook is opened once for all of its sheets. With parallel,
+        large workbooks are parsed in worker processes (the Excel readers are
+        pure Python, so threads would not run them concurrently).
+        
+        Args:
+            parallel: Parse large workbooks in forked worker processes (see
+                load_data)
+        
+        Returns:
+            Tuple of the chambers, electrometers and survey meters DataFrames
+        """
+        jobs = self._workbook_jobs()
+        results = None
+        if parallel and _parse_in_parallel([file_path for file_path, _ in jobs]):
+            try:
+                context = multiprocessing.get_context('fork')
+                with ProcessPoolExecutor(max_workers=len(jobs), mp_context=context) as pool:
+                    results = list(pool.map(_parse_workbook, *zip(*jobs)))
+            except (OSError, BrokenExecutor) as e:
+                print(f"Parallel Excel parsing failed, parsing sequentially: {e}")
+        if results is None:
+            results = [_parse_workbook(file_path, sheets) for file_path, sheets in jobs]
+        return tuple(frame for frames in results for frame in frames)
+    
+    @classmethod
+    def _clean_dataframe(cls, df, equipment_type):
         """Clean and standardize a DataFrame.
         
         Args:
@@ -114,22 +327,19 @@ class EquipmentDataManager:
         Returns:
             Cleaned DataFrame with standardized column names
         """
+        import pandas as pd
+        
         # Drop completely empty rows
         df = df.dropna(how='all')
         
         # Map columns to our standardized model
-        column_mapping = self.COLUMN_MAPPING.get(equipment_type, {})
+        column_mapping = cls.COLUMN_MAPPING.get(equipment_type, {})
         
-        # Create a new DataFrame with our standardized columns
-        new_df = pd.DataFrame()
+        # Create a new DataFrame with our standardized columns, one row per sheet row
+        new_df = pd.DataFrame(index=df.index)
         
         # Add a category column
-        if equipment_type == 'chambers':
-            new_df['category'] = 'Chamber'
-        elif equipment_type == 'electrometers':
-            new_df['category'] = 'Electrometer'
-        else:
-            new_df['category'] = 'Survey Meter'
+        new_df['category'] = CATEGORY_NAMES.get(equipment_type, 'Survey Meter')
         
         # Map columns from original DataFrame
         for excel_col, model_col in column_mapping.items():
@@ -139,31 +349,35 @@ class EquipmentDataManager:
                 new_df[model_col] = None
         
         # Add unique ID for each piece of equipment
-        # Using a composite of category + manufacturer + model + serial number
-        new_df['id'] = new_df.apply(
-            lambda row: f"{row['category']}-{str(row.get('manufacturer', '')).replace(' ', '_')}-{str(row.get('serial_number', '')).replace(' ', '_')}",
-            axis=1
-        )
+        # Using a composite of category + manufacturer + serial number
+        new_df['id'] = (new_df['category'] + '-' + _id_part(new_df['manufacturer'])
+                        + '-' + _id_part(new_df['serial_number']))
+        
+        # Add a raw_data column containing the original data (non-empty cells only)
+        columns = list(df.columns)
+        encode = DateTimeEncoder().encode
+        new_df['raw_data'] = [
+            encode({column: value for column, value, present in zip(columns, values, mask) if present})
+            for values, mask in zip(df.to_numpy(dtype=object), df.notna().to_numpy())
+        ]
         
         # Set index to the ID field
-        new_df = new_df.set_index('id')
-        
-        # Add a raw_data column containing the original data
-        new_df['raw_data'] = df.apply(lambda x: json.dumps(x.dropna().to_dict()), axis=1)
-        
-        return new_df
+        return new_df.set_index('id')
     
     def _combine_equipment_data(self):
         """Combine all equipment DataFrames into a single DataFrame."""
+        import pandas as pd
+        
         # Concatenate all DataFrames
-        self.all_equipment_df = pd.concat([
-            self.chambers_df, 
-            self.electrometers_df, 
-            self.survey_meters_df
+        self._all_equipment_df = pd.concat([
+            self._chambers_df, 
+            self._electrometers_df, 
+            self._survey_meters_df
         ])
         
-        # Build the equipment_by_id cache
-        self.equipment_by_id = self.all_equipment_df.to_dict('index')
+        # Build the equipment_by_id cache (the first row of a repeated id wins)
+        unique_df = self._all_equipment_df[~self._all_equipment_df.index.duplicated()]
+        self._equipment_by_id = unique_df.to_dict('index')
     
     def get_all_equipment(self):
         """Get all equipment as a list of dictionaries.
@@ -292,31 +506,7 @@ class EquipmentDataManager:
         """
         if not date_str or not isinstance(date_str, str):
             return None
-            
-        # List of common date formats to try
-        date_formats = [
-            '%m/%Y',        # 05/2025
-            '%m/%d/%Y',     # 05/15/2025
-            '%B %Y',        # May 2025
-            '%b %Y',        # May 2025
-            '%Y-%m-%d',     # 2025-05-15
-            '%d-%m-%Y',     # 15-05-2025
-            '%m-%d-%Y',     # 05-15-2025
-        ]
-        
-        # Try to extract the date part if there's additional text
-        # Example: "05/2025 - repaired"
-        if ' - ' in date_str:
-            date_str = date_str.split(' - ')[0].strip()
-        
-        # Try each format
-        for fmt in date_formats:
-            try:
-                return datetime.strptime(date_str, fmt)
-            except ValueError:
-                continue
-        
-        return None
+        return parse_calibration_date(date_str).due
         
     def get_calibration_due_soon(self, days=30):
         """Get equipment where calibration is due soon.
@@ -0,0 +1,190 @@
+"""
+Fuzzy lookup of equipment identifiers.
+
+Equipment ids (``Chamber-CNMC-123456``), serial numbers and model numbers
+are often mistyped or read from damaged labels. FuzzyIndex finds the
+records whose identifiers are closest to such text.
+
+Identifiers are compacted to lowercase letters and digits, padded and split
+into character trigrams. A query first gathers candidates sharing trigrams
+with it, starting from the rarest trigrams; trigrams that occur in a large
+share of the identifiers (``cha``, ``ham``... of every chamber id) only
+raise the scores of candidates already found instead of adding thousands
+of new ones. The best candidates are then ranked by edit distance, with a
+swap of two neighbouring characters counting as one edit.
+"""
+import re
+from collections import Counter
+from typing import NamedTuple
+
+# Fields searched for identifiers
+FUZZY_FIELDS = ('id', 'serial_number', 'model')
+
+GRAM_SIZE = 3
+
+# Trigrams held by more than this share of identifiers do not add candidates
+COMMON_GRAM_SHARE = 0.05
+
+# Candidates (per result requested) re-ranked by edit distance
+RERANK_FACTOR = 4
+
+_NON_ALNUM_RE = re.compile(r'[\W_]+')
+
+
+def compact(value):
+    """Reduce an identifier to lowercase letters and digits."""
+    return _NON_ALNUM_RE.sub('', str(value).casefold())
+
+
+def _grams(text):
+    """Get the distinct trigrams of a compacted identifier, padded at both ends."""
+    padded = f"^{text}$"
+    return {padded[i:i + GRAM_SIZE] for i in range(len(padded) - GRAM_SIZE + 1)}
+
+
+def edit_distance(a, b):
+    """Edit distance between two strings, counting an adjacent swap as one edit.
+
+    (Optimal string alignment distance.)
+    """
+    if a == b:
+        return 0
+    if not a or not b:
+        return len(a) or len(b)
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        previous2, previous = previous, current
+    return previous[len(b)]
+
+
+class FuzzyMatch(NamedTuple):
+    """Closest identifier of one record.
+
+    Attributes:
+        record_id: ID of the matching record
+        field: Field whose value matched ('id', 'serial_number' or 'model')
+        value: The value as stored
+        score: Similarity from 0 to 1 (1 for an exact match after compacting)
+    """
+    record_id: str
+    field: str
+    value: str
+    score: float
+
+
+class FuzzyIndex:
+    """Trigram index over the identifier fields of the records."""
+
+    def __init__(self, fields=FUZZY_FIELDS):
+        """Initialize an empty index.
+
+        Args:
+            fields: Record fields holding identifiers
+        """
+        self.fields = tuple(fields)
+        # Trigram -> set of compacted identifiers
+        self._grams = {}
+        # Compacted identifier -> {(record id, field): stored value}
+        self._owners = {}
+        # Record id -> compacted identifiers it holds, to remove the record
+        self._by_id = {}
+
+    def __len__(self):
+        """Number of indexed records."""
+        return len(self._by_id)
+
+    def add(self, record_id, record):
+        """Index a record's identifier fields (empty values are skipped)."""
+        if record_id in self._by_id:
+            self.remove(record_id)
+        keys = []
+        for field in self.fields:
+            value = record.get(field)
+            if value is None or value != value:
+                continue
+            key = compact(value)
+            if not key:
+                continue
+            owners = self._owners.get(key)
+            if owners is None:
+                owners = self._owners[key] = {}
+                for gram in _grams(key):
+                    self._grams.setdefault(gram, set()).add(key)
+            owners[(record_id, field)] = value
+            keys.append((key, field))
+        self._by_id[record_id] = keys
+
+    def remove(self, record_id):
+        """Remove a record from the index."""
+        for key, field in self._by_id.pop(record_id, ()):
+            owners = self._owners[key]
+            owners.pop((record_id, field), None)
+            if owners:
+                continue
+            del self._owners[key]
+            for gram in _grams(key):
+                keys = self._grams[gram]
+                keys.discard(key)
+                if not keys:
+                    del self._grams[gram]
+
+    def update(self, record_id, record):
+        """Re-index a record whose identifiers may have changed."""
+        self.add(record_id, record)
+
+    def clear(self):
+        """Remove every record."""
+        self._grams.clear()
+        self._owners.clear()
+        self._by_id.clear()
+
+    def _candidates(self, key, count):
+        """Get up to ``count`` identifiers sharing the most trigrams with a key."""
+        query_grams = sorted(_grams(key), key=lambda gram: len(self._grams.get(gram, ())))
+        common = max(1, int(len(self._owners) * COMMON_GRAM_SHARE))
+        shared = Counter()
+        for gram in query_grams:
+            keys = self._grams.get(gram)
+            if not keys:
+                continue
+            if len(keys) <= common or not shared:
+                shared.update(keys)
+            else:
+                # Common trigram: only strengthen the candidates found so far
+                for candidate in shared:
+                    if candidate in keys:
+                        shared[candidate] += 1
+        return [candidate for candidate, _ in shared.most_common(count)]
+
+    def search(self, text, limit=5, min_score=0.0):
+        """Find the records whose identifiers are closest to some text.
+
+        Args:
+            text: Identifier as typed or scanned
+            limit: Maximum number of records to return
+            min_score: Minimum similarity (0 to 1) of the returned matches
+
+        Returns:
+            List of FuzzyMatch, best first, one per record
+        """
+        key = compact(text)
+        if not key or limit <= 0:
+            return []
+
+        best = {}
+        for candidate in self._candidates(key, limit * RERANK_FACTOR):
+            score = 1 - edit_distance(key, candidate) / max(len(key), len(candidate))
+            if score < min_score:
+                continue
+            for (record_id, field), value in self._owners[candidate].items():
+                if record_id not in best or best[record_id].score < score:
+                    best[record_id] = FuzzyMatch(record_id, field, value, score)
+        ranked = sorted(best.values(), key=lambda match: -match.score)
+        return ranked[:limit]
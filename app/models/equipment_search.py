@@ -0,0 +1,291 @@
+"""
+Inverted full-text index over equipment records.
+
+Text fields are split into case-folded word tokens. Each field keeps its
+own postings (token -> record ids) and a sorted vocabulary, so a query term
+matches whole tokens or token prefixes with a binary search. The tokens of
+every field are also indexed by their character trigrams, so a term found
+anywhere inside a token (``30013`` in ``TN30013``) matches too; terms
+shorter than a trigram scan the field's vocabulary instead. A plain-text
+query therefore finds every record it found as a substring of one of the
+fields. Serial numbers are indexed as trigrams with their separators
+removed as well, so a fragment spanning a dash or space finds them. The
+vocabulary is re-sorted on the first query after it changes rather than on
+every insert, which keeps bulk loads linear; a lock keeps queries and
+updates from different threads apart.
+
+Queries are whitespace-separated terms that must all match (AND). A term can
+be scoped to one field with ``field:value`` (e.g. ``sn:1234``). Results are
+ranked by how well and where the terms matched.
+"""
+import bisect
+import re
+import threading
+
+# Searchable fields and their ranking weights
+FIELD_WEIGHTS = {
+    'id': 3.0,
+    'serial_number': 3.0,
+    'model': 2.0,
+    'manufacturer': 2.0,
+    'equipment_type': 1.5,
+    'location': 1.0,
+    'notes': 0.5,
+}
+
+# Field names accepted in ``field:value`` terms
+FIELD_ALIASES = {
+    'id': 'id',
+    'sn': 'serial_number',
+    'serial': 'serial_number',
+    'serial_number': 'serial_number',
+    'model': 'model',
+    'mfr': 'manufacturer',
+    'manufacturer': 'manufacturer',
+    'type': 'equipment_type',
+    'equipment_type': 'equipment_type',
+    'loc': 'location',
+    'location': 'location',
+    'notes': 'notes',
+}
+
+# Score of a term by how it matched a token
+EXACT_SCORE = 3.0
+PREFIX_SCORE = 2.0
+SUBSTRING_SCORE = 1.0
+
+GRAM_SIZE = 3
+
+_TOKEN_RE = re.compile(r'[^\W_]+')
+
+
+def tokenize(value):
+    """Split a value into case-folded word tokens."""
+    return _TOKEN_RE.findall(str(value).casefold())
+
+
+def _grams(text):
+    """Get the distinct character n-grams of a string."""
+    return {text[i:i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+
+def parse_query(query):
+    """Parse a search query into (field, token) terms.
+
+    Args:
+        query: Query string, e.g. ``'ptw sn:1234'``
+
+    Returns:
+        List of (field or None, token) tuples; ``field`` is None for terms
+        that may match any field
+    """
+    terms = []
+    for part in str(query).split():
+        field = None
+        if ':' in part:
+            name, _, rest = part.partition(':')
+            if name.lower() in FIELD_ALIASES:
+                field, part = FIELD_ALIASES[name.lower()], rest
+        for token in tokenize(part):
+            terms.append((field, token))
+    return terms
+
+
+class EquipmentSearchIndex:
+    """Tokenized inverted index over the searchable equipment fields."""
+
+    def __init__(self, fields=FIELD_WEIGHTS):
+        """Initialize an empty index.
+
+        Args:
+            fields: Mapping of field name -> ranking weight
+        """
+        self.fields = dict(fields)
+        # Field -> token -> set of record ids
+        self._postings = {field: {} for field in self.fields}
+        # Field -> sorted tokens, for prefix lookups (rebuilt when stale)
+        self._vocabulary = {field: [] for field in self.fields}
+        self._stale_vocabulary = set()
+        # Field -> trigram -> set of the field's tokens containing it
+        self._token_grams = {field: {} for field in self.fields}
+        # Serial number trigram -> set of record ids
+        self._grams = {}
+        # Record id -> compacted serial number, to confirm trigram candidates
+        self._serials = {}
+        # Record id -> indexed record, re-tokenized when it is removed
+        self._documents = {}
+        # Queries re-sort the vocabulary, so they and updates run one at a time
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        """Number of indexed records."""
+        return len(self._documents)
+
+    def add(self, record_id, record):
+        """Index a record's searchable fields.
+
+        The record is kept to un-index it later, so it must not be mutated
+        while it is in the index (re-add a changed copy instead).
+        """
+        with self._lock:
+            if record_id in self._documents:
+                self.remove(record_id)
+
+            serial = None
+            for field, tokens in self._tokens(record):
+                if field == 'serial_number':
+                    serial = ''.join(tokens)
+                postings = self._postings[field]
+                for token in tokens:
+                    ids = postings.get(token)
+                    if ids is None:
+                        ids = postings[token] = set()
+                        self._stale_vocabulary.add(field)
+                        token_grams = self._token_grams[field]
+                        for gram in _grams(token):
+                            token_grams.setdefault(gram, set()).add(token)
+                    ids.add(record_id)
+            self._documents[record_id] = record
+
+            if serial:
+                self._serials[record_id] = serial
+                for gram in _grams(serial):
+                    self._grams.setdefault(gram, set()).add(record_id)
+
+    def _tokens(self, record):
+        """Yield (field, tokens) for each searchable field a record has."""
+        for field in self.fields:
+            value = record.get(field)
+            if value is None or value != value:
+                continue
+            tokens = tokenize(value)
+            if tokens:
+                yield field, tokens
+
+    def remove(self, record_id):
+        """Remove a record from the index."""
+        with self._lock:
+            record = self._documents.pop(record_id, None)
+            if record is None:
+                return
+
+            for field, tokens in self._tokens(record):
+                postings = self._postings[field]
+                for token in set(tokens):
+                    ids = postings[token]
+                    ids.discard(record_id)
+                    if not ids:
+                        del postings[token]
+                        self._stale_vocabulary.add(field)
+                        token_grams = self._token_grams[field]
+                        for gram in _grams(token):
+                            tokens_with_gram = token_grams[gram]
+                            tokens_with_gram.discard(token)
+                            if not tokens_with_gram:
+                                del token_grams[gram]
+
+            serial = self._serials.pop(record_id, None)
+            if serial:
+                for gram in _grams(serial):
+                    ids = self._grams[gram]
+                    ids.discard(record_id)
+                    if not ids:
+                        del self._grams[gram]
+
+    def update(self, record_id, record):
+        """Re-index a record whose fields may have changed."""
+        with self._lock:
+            self.remove(record_id)
+            self.add(record_id, record)
+
+    def clear(self):
+        """Remove every record."""
+        with self._lock:
+            for field in self.fields:
+                self._postings[field].clear()
+                self._vocabulary[field].clear()
+                self._token_grams[field].clear()
+            self._stale_vocabulary.clear()
+            self._grams.clear()
+            self._serials.clear()
+            self._documents.clear()
+
+    @staticmethod
+    def _intersect_grams(index, text):
+        """Get the entries of a trigram index holding every trigram of a text."""
+        grams = sorted(_grams(text), key=lambda gram: len(index.get(gram, ())))
+        candidates = set(index.get(grams[0], ()))
+        for gram in grams[1:]:
+            if not candidates:
+                break
+            candidates &= index.get(gram, set())
+        return candidates
+
+    def _match_field(self, field, token, scores):
+        """Score the records matching a token in one field (with the lock held).
+
+        Updates ``scores`` (record id -> best score for this term) in place.
+        """
+        weight = self.fields[field]
+        postings = self._postings[field]
+        if field in self._stale_vocabulary:
+            self._vocabulary[field] = sorted(postings)
+            self._stale_vocabulary.discard(field)
+        vocabulary = self._vocabulary[field]
+
+        position = bisect.bisect_left(vocabulary, token)
+        while position < len(vocabulary) and vocabulary[position].startswith(token):
+            candidate = vocabulary[position]
+            score = (EXACT_SCORE if candidate == token else PREFIX_SCORE) * weight
+            for record_id in postings[candidate]:
+                if scores.get(record_id, 0) < score:
+                    scores[record_id] = score
+            position += 1
+
+        # The term inside a token: trigram candidates, or the whole vocabulary
+        # for terms shorter than a trigram
+        if len(token) >= GRAM_SIZE:
+            candidates = self._intersect_grams(self._token_grams[field], token)
+        else:
+            candidates = vocabulary
+        score = SUBSTRING_SCORE * weight
+        for candidate in candidates:
+            if token in candidate and not candidate.startswith(token):
+                for record_id in postings[candidate]:
+                    if scores.get(record_id, 0) < score:
+                        scores[record_id] = score
+
+        if field == 'serial_number' and len(token) >= GRAM_SIZE:
+            # Fragments spanning separators: confirm each trigram candidate
+            # against the compacted serial
+            for record_id in self._intersect_grams(self._grams, token):
+                if token in self._serials[record_id] and scores.get(record_id, 0) < score:
+                    scores[record_id] = score
+
+    def search(self, query):
+        """Find the records matching every term of a query.
+
+        Args:
+            query: Query string (see ``parse_query``)
+
+        Returns:
+            Dictionary of record id -> score for the matching records
+        """
+        terms = parse_query(query)
+        if not terms:
+            return {}
+
+        results = None
+        with self._lock:
+            for field, token in terms:
+                scores = {}
+                for name in ([field] if field else self.fields):
+                    self._match_field(name, token, scores)
+                if results is None:
+                    results = scores
+                else:
+                    results = {record_id: score + scores[record_id]
+                               for record_id, score in results.items() if record_id in scores}
+                if not results:
+                    return {}
+        return results
@@ -0,0 +1,353 @@
+"""
+Materialized equipment view.
+
+The equipment pages show, for every row, the item's checkout status, its
+condition, its open tickets and whether a transport is pending. Looking
+these up per row went through three managers, and the transport check
+walked every pending request for every item. EquipmentView keeps one joined
+row per equipment id instead.
+
+The view listens to the storage of the equipment, checkout, ticket and
+transport managers. A write to one record only marks the affected rows
+dirty; a reload of a whole dataset marks every row dirty. Dirty rows are
+rebuilt on the next read.
+
+The view also keeps facet counters (equipment per category, location,
+manufacturer, status and condition), adjusted whenever a row is rebuilt, so
+dashboards read their counts without scanning the inventory.
+"""
+import threading
+from collections import Counter
+from typing import NamedTuple, Optional
+from app.models.ticket import TicketStatus
+from app.models.transport_request import TransportStatus
+
+# Ticket statuses that count as open
+OPEN_TICKET_STATUSES = (TicketStatus.OPEN, TicketStatus.IN_PROGRESS)
+
+# Transport statuses that no longer count as pending
+FINISHED_TRANSPORT_STATUSES = (TransportStatus.COMPLETED, TransportStatus.CANCELLED)
+
+# Facets counted by the view: name -> function reading the value from a row
+FACETS = {
+    'category': lambda row: row.equipment.get('category'),
+    'location': lambda row: row.equipment.get('location'),
+    'manufacturer': lambda row: row.equipment.get('manufacturer'),
+    'status': lambda row: row.status.get('status'),
+    'condition': lambda row: row.condition,
+}
+
+# Datasets whose records are keyed by equipment id
+_EQUIPMENT_DATASETS = ('equipment', 'equipment_status', 'equipment_conditions')
+
+
+class EquipmentViewRow(NamedTuple):
+    """Everything the equipment pages show about one piece of equipment.
+
+    Attributes:
+        equipment: Equipment record (None if the id is not in the inventory)
+        status: Checkout status dictionary
+        condition: Condition ('normal', 'warning' or 'critical')
+        open_tickets: Number of open or in-progress tickets
+        transport: Latest pending TransportRequest, or None
+    """
+    equipment: Optional[dict]
+    status: dict
+    condition: str
+    open_tickets: int
+    transport: Optional[object]
+
+    @property
+    def checked_out(self):
+        """Whether the equipment is checked out."""
+        return self.status.get('status') == 'Checked Out'
+
+    @property
+    def in_transport(self):
+        """Whether a transport of the equipment is pending."""
+        return self.transport is not None
+
+
+class EquipmentView:
+    """Joined equipment rows, kept current by the managers' storage listeners."""
+
+    def __init__(self, equipment_manager, checkout_manager, ticket_manager, transport_manager):
+        """Initialize the view and subscribe to the managers' changes.
+
+        Args:
+            equipment_manager: JsonEquipmentDataManager instance
+            checkout_manager: JsonCheckoutManager instance
+            ticket_manager: TicketManager instance
+            transport_manager: TransportManager instance
+        """
+        self.equipment_manager = equipment_manager
+        self.checkout_manager = checkout_manager
+        self.ticket_manager = ticket_manager
+        self.transport_manager = transport_manager
+
+        # Equipment id -> EquipmentViewRow
+        self._rows = {}
+        # Facet name -> Counter of value -> number of rows
+        self._facets = {name: Counter() for name in FACETS}
+        # Open ticket id -> equipment id, and equipment id -> open ticket ids
+        self._ticket_equipment = {}
+        self._open_tickets = {}
+        # Pending transport id -> equipment id, and equipment id -> pending
+        # transport ids in creation order ({id: None}, an ordered set)
+        self._transport_equipment = {}
+        self._pending_transports = {}
+
+        # Changes not applied yet; everything starts out dirty
+        self._lock = threading.RLock()
+        self._dirty_ids = set()
+        self._dirty_tickets = set()
+        self._dirty_transports = set()
+        self._rebuild_rows = True
+        self._rebuild_tickets = True
+        self._rebuild_transports = True
+
+        for manager in (equipment_manager, checkout_manager, ticket_manager, transport_manager):
+            manager.storage.add_listener(self._changed)
+
+    def _changed(self, name, key):
+        """Storage listener: remember what to rebuild on the next read."""
+        with self._lock:
+            if name in _EQUIPMENT_DATASETS:
+                if key is None:
+                    self._rebuild_rows = True
+                else:
+                    self._dirty_ids.add(key)
+            elif name == 'tickets':
+                if key is None:
+                    self._rebuild_tickets = True
+                else:
+                    self._dirty_tickets.add(key)
+            elif name == 'transport_requests':
+                if key is None:
+                    self._rebuild_transports = True
+                else:
+                    self._dirty_transports.add(key)
+
+    def _index_ticket(self, ticket_id):
+        """Move one ticket into or out of the open ticket counts."""
+        equipment_id = self._ticket_equipment.pop(ticket_id, None)
+        if equipment_id is not None:
+            self._open_tickets[equipment_id].discard(ticket_id)
+            self._dirty_ids.add(equipment_id)
+
+        ticket = self.ticket_manager.tickets.get(ticket_id)
+        if ticket is not None and ticket.status in OPEN_TICKET_STATUSES:
+            self._ticket_equipment[ticket_id] = ticket.equipment_id
+            self._open_tickets.setdefault(ticket.equipment_id, set()).add(ticket_id)
+            self._dirty_ids.add(ticket.equipment_id)
+
+    def _index_transport(self, request_id):
+        """Move one transport request into or out of the pending transports."""
+        equipment_id = self._transport_equipment.pop(request_id, None)
+        if equipment_id is not None:
+            self._pending_transports[equipment_id].pop(request_id, None)
+            self._dirty_ids.add(equipment_id)
+
+        request = self.transport_manager.transport_requests.get(request_id)
+        if request is not None and request.status not in FINISHED_TRANSPORT_STATUSES:
+            self._transport_equipment[request_id] = request.equipment_id
+            self._pending_transports.setdefault(request.equipment_id, {})[request_id] = None
+            self._dirty_ids.add(request.equipment_id)
+
+    def _build_row(self, equipment_id, record):
+        """Join one piece of equipment with its status, condition, tickets and transport."""
+        pending = self._pending_transports.get(equipment_id)
+        transport = None
+        if pending:
+            transport = self.transport_manager.transport_requests.get(next(reversed(pending)))
+        return EquipmentViewRow(
+            equipment=record,
+            status=self.checkout_manager.get_equipment_status(equipment_id),
+            condition=self.ticket_manager.get_equipment_condition(equipment_id),
+            open_tickets=len(self._open_tickets.get(equipment_id, ())),
+            transport=transport,
+        )
+
+    def _sync(self):
+        """Apply the changes recorded since the last read."""
+        with self._lock:
+            if self._rebuild_tickets:
+                self._rebuild_tickets = False
+                # Rows that lost their last entry are not marked dirty by the re-index
+                self._rebuild_rows = True
+                self._dirty_tickets.clear()
+                self._ticket_equipment.clear()
+                self._open_tickets.clear()
+                for ticket_id in list(self.ticket_manager.tickets):
+                    self._index_ticket(ticket_id)
+            for ticket_id in self._dirty_tickets:
+                self._index_ticket(ticket_id)
+            self._dirty_tickets.clear()
+
+            if self._rebuild_transports:
+                self._rebuild_transports = False
+                # Rows that lost their last entry are not marked dirty by the re-index
+                self._rebuild_rows = True
+                self._dirty_transports.clear()
+                self._transport_equipment.clear()
+                self._pending_transports.clear()
+                for request_id in list(self.transport_manager.transport_requests):
+                    self._index_transport(request_id)
+            for request_id in self._dirty_transports:
+                self._index_transport(request_id)
+            self._dirty_transports.clear()
+
+            if self._rebuild_rows:
+                self._rebuild_rows = False
+                self._dirty_ids.clear()
+                self._rows = {
+                    record['id']: self._build_row(record['id'], record)
+                    for record in self.equipment_manager.get_all_equipment()
+                }
+                self._facets = {name: Counter() for name in FACETS}
+                for row in self._rows.values():
+                    self._count_row(row, 1)
+                return
+            for equipment_id in self._dirty_ids:
+                old_row = self._rows.pop(equipment_id, None)
+                if old_row is not None:
+                    self._count_row(old_row, -1)
+                record = self.equipment_manager.get_record(equipment_id)
+                if record is not None:
+                    row = self._rows[equipment_id] = self._build_row(equipment_id, record)
+                    self._count_row(row, 1)
+            self._dirty_ids.clear()
+
+    @staticmethod
+    def _facet_values(row):
+        """Yield (facet, value) for each facet a row has a value for."""
+        for name, read in FACETS.items():
+            value = read(row)
+            if value is None or value != value or value == '':
+                continue
+            try:
+                hash(value)
+            except TypeError:
+                continue
+            yield name, value
+
+    def _count_row(self, row, delta):
+        """Add a row to (delta 1) or remove it from (delta -1) the facet counters."""
+        for name, value in self._facet_values(row):
+            counter = self._facets[name]
+            counter[value] += delta
+            if not counter[value]:
+                del counter[value]
+
+    def get(self, equipment_id):
+        """Get the joined row of a piece of equipment.
+
+        Args:
+            equipment_id: ID of the equipment
+
+        Returns:
+            EquipmentViewRow (built on the fly, with no equipment record, for
+            ids that are not in the inventory)
+        """
+        self._sync()
+        row = self._rows.get(equipment_id)
+        if row is None:
+            with self._lock:
+                row = self._build_row(equipment_id, None)
+        return row
+
+    def rows(self, equipment=None):
+        """Get the joined rows of a list of equipment, in the same order.
+
+        Args:
+            equipment: Equipment records (default: all equipment)
+
+        Returns:
+            List of EquipmentViewRow
+        """
+        self._sync()
+        if equipment is None:
+            return list(self._rows.values())
+        return [self._rows.get(item['id']) or self.get(item['id']) for item in equipment]
+
+    @staticmethod
+    def _matcher(status=None, condition=None):
+        """Build a row test for a status and/or condition filter."""
+        status_tests = {
+            'available': lambda row: not row.checked_out,
+            'checked_out': lambda row: row.checked_out,
+            'in_transport': lambda row: row.in_transport,
+        }
+        status_test = status_tests.get(status, lambda row: False) if status else None
+
+        def matches(row):
+            if status_test is not None and not status_test(row):
+                return False
+            return not condition or row.condition == condition
+        return matches
+
+    def filter(self, equipment, status=None, condition=None):
+        """Keep the equipment matching a status and/or condition filter, in one pass.
+
+        Args:
+            equipment: Equipment records to filter
+            status: 'available', 'checked_out' or 'in_transport' (None for any)
+            condition: Condition to match (None for any)
+
+        Returns:
+            List of the matching equipment records
+        """
+        matches = self._matcher(status, condition)
+        return [item for item, row in zip(equipment, self.rows(equipment)) if matches(row)]
+
+    def ids_matching(self, status=None, condition=None):
+        """Get the ids of all equipment matching a status and/or condition filter.
+
+        Args:
+            status: 'available', 'checked_out' or 'in_transport' (None for any)
+            condition: Condition to match (None for any)
+
+        Returns:
+            Set of equipment ids
+        """
+        self._sync()
+        matches = self._matcher(status, condition)
+        return {equipment_id for equipment_id, row in self._rows.items() if matches(row)}
+
+    def facets(self, ids=None, days=30):
+        """Count equipment per facet value.
+
+        Without ``ids`` the counts come from the maintained counters (and the
+        calibration date index); with ``ids`` they are counted in one pass
+        over those rows.
+
+        Args:
+            ids: Only count these equipment ids (default: all equipment)
+            days: Number of days to consider calibration "due soon"
+
+        Returns:
+            Dictionary of facet -> {value: count}, with the facets of FACETS
+            plus 'calibration' ('current', 'due_soon', 'overdue', 'unknown'),
+            and 'total', the number of pieces of equipment counted. Equipment
+            without a value for a facet is not counted in it.
+        """
+        self._sync()
+        if ids is not None:
+            ids = list(ids)
+        if ids is None:
+            counts = {name: dict(counter) for name, counter in self._facets.items()}
+            total = len(self._rows)
+        else:
+            counters = {name: Counter() for name in FACETS}
+            total = 0
+            for equipment_id in ids:
+                row = self._rows.get(equipment_id)
+                if row is None:
+                    continue
+                total += 1
+                for name, value in self._facet_values(row):
+                    counters[name][value] += 1
+            counts = {name: dict(counter) for name, counter in counters.items()}
+        counts['calibration'] = self.equipment_manager.get_calibration_status_counts(days, ids=ids)
+        counts['total'] = total
+        return counts
@@ -0,0 +1,233 @@
+"""
+Indexes over the checkout history log.
+
+The history is stored in append order. HistoryIndex keeps every entry in
+timestamp order, and also grouped by equipment id and by user, so the
+history pages read the newest entries of one piece of equipment or one user
+in O(k) for k entries returned instead of filtering and sorting the whole
+log on every request.
+
+Entries are nearly always appended in timestamp order, which only costs a
+list append; an entry older than the last one of its list (a clock change,
+an entry recorded by another worker) is inserted by binary search. Entries
+with the same timestamp keep append order, as the stable sort did.
+
+Each timestamp is also parsed once, to epoch seconds, and the entries are
+kept sorted by that time, so the entries in a time range (for reports) are
+found by two binary searches instead of parsing every timestamp of the log.
+"""
+import bisect
+from datetime import datetime, timezone
+from itertools import islice
+
+# Date formats read from timestamps that are not ISO 8601 (date part only)
+HISTORY_DATE_FORMATS = ('%Y/%m/%d', '%m/%d/%Y', '%d-%m-%Y')
+
+
+def history_timestamp(entry):
+    """Sort key of a history entry: its ISO timestamp ('' if it has none)."""
+    return entry.get("timestamp") or ""
+
+
+def epoch_seconds(moment):
+    """Epoch seconds of a datetime (naive datetimes are read as UTC).
+
+    Naive and aware times only need to compare consistently, and the app
+    records naive times, so naive times are not shifted by the local offset.
+    """
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def parse_history_time(value):
+    """Parse a history timestamp into epoch seconds.
+
+    Args:
+        value: ISO 8601 string (with 'T' or a space, optionally 'Z' or an
+            offset), a date in one of HISTORY_DATE_FORMATS, or a datetime
+
+    Returns:
+        Epoch seconds, or None if the timestamp is missing or unreadable
+    """
+    if isinstance(value, datetime):
+        return epoch_seconds(value)
+    if not value or not isinstance(value, str):
+        return None
+    text = value.strip()
+    try:
+        return epoch_seconds(datetime.fromisoformat(text.replace('Z', '+00:00')))
+    except ValueError:
+        pass
+    day = text.split(' ')[0]
+    for date_format in HISTORY_DATE_FORMATS:
+        try:
+            return epoch_seconds(datetime.strptime(day, date_format))
+        except ValueError:
+            continue
+    return None
+
+
+class _Timeline:
+    """Entries in timestamp order, with their timestamps in a parallel list.
+
+    The timestamps are kept apart so out-of-order entries are placed with a
+    plain bisect (bisect's ``key`` argument needs Python 3.10).
+    """
+
+    __slots__ = ('timestamps', 'entries')
+
+    def __init__(self, entries=()):
+        """Index entries (stable sort: ties keep their order)."""
+        self.entries = sorted(entries, key=history_timestamp)
+        self.timestamps = [history_timestamp(entry) for entry in self.entries]
+
+    def __len__(self):
+        """Number of entries."""
+        return len(self.entries)
+
+    def insert(self, entry):
+        """Insert an entry after those with the same or an earlier timestamp."""
+        timestamp = history_timestamp(entry)
+        if not self.timestamps or self.timestamps[-1] <= timestamp:
+            self.timestamps.append(timestamp)
+            self.entries.append(entry)
+        else:
+            position = bisect.bisect_right(self.timestamps, timestamp)
+            self.timestamps.insert(position, timestamp)
+            self.entries.insert(position, entry)
+
+    def newest_first(self):
+        """Iterate over the entries newest first (ties in append order)."""
+        timestamps, entries = self.timestamps, self.entries
+        end = len(entries)
+        while end:
+            start = bisect.bisect_left(timestamps, timestamps[end - 1], 0, end)
+            yield from entries[start:end]
+            end = start
+
+
+class HistoryIndex:
+    """History entries in timestamp order, overall and grouped by fields."""
+
+    def __init__(self, fields=("equipment_id", "user")):
+        """Initialize an empty index.
+
+        Args:
+            fields: Entry fields to group by
+        """
+        self.fields = tuple(fields)
+        # Every entry, in timestamp order
+        self._entries = _Timeline()
+        # Field -> value -> _Timeline of the entries with that value
+        self._groups = {field: {} for field in self.fields}
+        # Epoch seconds of the entries with a readable timestamp, sorted, and
+        # those entries in the same order
+        self._times = []
+        self._timed = []
+
+    def __len__(self):
+        """Number of indexed entries."""
+        return len(self._entries)
+
+    def rebuild(self, entries):
+        """Index a whole history log.
+
+        Args:
+            entries: History entries in append order
+        """
+        grouped = {field: {} for field in self.fields}
+        for entry in entries:
+            for field, group in grouped.items():
+                group.setdefault(entry.get(field), []).append(entry)
+        # Stable sorts: ties keep append order; a log already in order costs O(n)
+        self._groups = {field: {value: _Timeline(group_entries) for value, group_entries in group.items()}
+                        for field, group in grouped.items()}
+        self._entries = _Timeline(entries)
+
+        times = [parse_history_time(entry.get("timestamp")) for entry in entries]
+        order = sorted((position for position, time in enumerate(times) if time is not None),
+                       key=times.__getitem__)
+        self._times = [times[position] for position in order]
+        self._timed = [entries[position] for position in order]
+
+    def add(self, entry):
+        """Index one appended entry."""
+        self._entries.insert(entry)
+        for field, group in self._groups.items():
+            value = entry.get(field)
+            if value not in group:
+                group[value] = _Timeline()
+            group[value].insert(entry)
+
+        time = parse_history_time(entry.get("timestamp"))
+        if time is None:
+            return
+        if not self._times or self._times[-1] <= time:
+            self._times.append(time)
+            self._timed.append(entry)
+        else:
+            position = bisect.bisect_right(self._times, time)
+            self._times.insert(position, time)
+            self._timed.insert(position, entry)
+
+    @property
+    def untimed_count(self):
+        """Number of entries whose timestamp could not be read (left out of time ranges)."""
+        return len(self._entries) - len(self._timed)
+
+    def count(self, field=None, value=None):
+        """Number of entries with a field value (all entries without a field)."""
+        if field is None:
+            return len(self._entries)
+        return len(self._groups[field].get(value, ()))
+
+    def between(self, since=None, until=None):
+        """Get the entries recorded in a time range.
+
+        Args:
+            since: Earliest time (datetime, inclusive; None for no bound)
+            until: Latest time (datetime, inclusive; None for no bound)
+
+        Returns:
+            List of history entries in time order, oldest first (entries
+            without a readable timestamp are left out)
+        """
+        start = 0 if since is None else bisect.bisect_left(self._times, epoch_seconds(since))
+        end = len(self._times) if until is None else bisect.bisect_right(self._times, epoch_seconds(until))
+        return self._timed[start:end]
+
+    def latest(self, filters=None, limit=None, since=None, until=None):
+        """Get the newest entries matching some field values.
+
+        The smallest matching group (or, for a time range, the entries in
+        the range) is walked newest first and checked against the other
+        filters, so only the entries up to the limit (and those skipped by
+        the other filters) are visited.
+
+        Args:
+            filters: Mapping of indexed field -> required value
+            limit: Maximum number of entries to return (all if None)
+            since: Only entries recorded at or after this datetime
+            until: Only entries recorded at or before this datetime
+
+        Returns:
+            List of history entries, newest first
+        """
+        filters = dict(filters or {})
+        if since is not None or until is not None:
+            matches = reversed(self.between(since, until))
+            if filters:
+                matches = (entry for entry in matches
+                           if all(entry.get(name) == value for name, value in filters.items()))
+            return list(islice(matches, limit))
+
+        timeline = self._entries
+        if filters:
+            field = min(filters, key=lambda name: self.count(name, filters[name]))
+            timeline = self._groups[field].get(filters.pop(field), _Timeline())
+        matches = timeline.newest_first()
+        if filters:
+            matches = (entry for entry in matches
+                       if all(entry.get(name) == value for name, value in filters.items()))
+        return list(islice(matches, limit))
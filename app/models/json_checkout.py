@@ -2,10 +2,12 @@
 JSON-based checkout system for tracking equipment location and status.
 """
 import os
-import json
+from collections.abc import KeysView
 from datetime import datetime, timedelta
 import uuid
-from app.models.json_utils import save_json
+from app.models.history_index import HistoryIndex
+from app.models.return_schedule import ReturnSchedule
+from app.models.storage import get_storage_backend, TrackedStorage, track_manager, unit_of_work
 try:
     # Import werkzeug for password hashing (safer than trying inside functions)
     from werkzeug.security import generate_password_hash, check_password_hash
@@ -27,79 +29,203 @@ class JsonCheckoutManager:
         'Out of Service'  # Not usable
     ]
     
-    def __init__(self, data_dir='app/data'):
+    def __init__(self, data_dir='app/data', storage=None):
         """Initialize the checkout manager.
         
         Args:
             data_dir: Directory containing data files
+            storage: Storage backend (default: the backend configured for data_dir)
         """
         self.data_dir = data_dir
         
         # Create the data directory if it doesn't exist
         os.makedirs(self.data_dir, exist_ok=True)
         
-        # Checkout history file
-        self.checkout_history_file = os.path.join(data_dir, 'checkout_history.json')
+        # Persistence for checkout history, equipment status and users
+        self.storage = TrackedStorage(storage or get_storage_backend(data_dir))
         
-        # Equipment status file
-        self.equipment_status_file = os.path.join(data_dir, 'equipment_status.json')
+        # Checkout history in timestamp order, overall and by equipment and user
+        self.history_index = HistoryIndex(("equipment_id", "user"))
         
-        # Users file
-        self.users_file = os.path.join(data_dir, 'users.json')
+        # Checked out equipment by expected return time
+        self.return_schedule = ReturnSchedule()
+        
+        # Status -> IDs of the equipment with that status, ID -> status, and
+        # ID -> position of its entry in equipment_status (dataset order)
+        self._status_members = {}
+        self._status_of = {}
+        self._status_positions = {}
+        self._next_status_position = 0
         
         # Load data
         self.checkout_history = self._load_checkout_history()
         self.equipment_status = self._load_equipment_status()
         self.users = self._load_users()
+        self.kits = self._load_kits()
+        
+        # Pick up changes made by other workers at the start of each request
+        track_manager(self)
+    
+    def refresh(self):
+        """Reload any dataset that another process has changed since it was last read."""
+        if self.storage.changed('checkout_history'):
+            # Usually other workers only appended: index just their entries
+            appended = self.storage.load_appended('checkout_history')
+            if appended is None:
+                self.checkout_history = self._load_checkout_history()
+            else:
+                for entry in appended:
+                    self._checkout_history.append(entry)
+                    self.history_index.add(entry)
+        if self.storage.changed('equipment_status'):
+            self.equipment_status = self._load_equipment_status()
+        if self.storage.changed('users'):
+            self.users = self._load_users()
+        if self.storage.changed('kits'):
+            self.kits = self._load_kits()
+    
+    @property
+    def checkout_history(self):
+        """Checkout history entries, in the order they were recorded."""
+        return self._checkout_history
+    
+    @checkout_history.setter
+    def checkout_history(self, entries):
+        """Replace the checkout history and re-index it (save it separately)."""
+        self._checkout_history = entries
+        self.history_index.rebuild(entries)
+    
+    @property
+    def equipment_status(self):
+        """Status entries by equipment ID."""
+        return self._equipment_status
+    
+    @equipment_status.setter
+    def equipment_status(self, statuses):
+        """Replace the status entries and re-index them (save them separately)."""
+        self._equipment_status = statuses
+        self.return_schedule.rebuild(statuses)
+        self._status_members = {}
+        self._status_of = {}
+        self._status_positions = {}
+        self._next_status_position = 0
+        for equipment_id, status in statuses.items():
+            self._index_status(equipment_id, status)
+    
+    def _index_status(self, equipment_id, status):
+        """Move a piece of equipment to its new status in the status index.
+        
+        Args:
+            equipment_id: ID of the equipment
+            status: Its status dictionary (None if its entry was removed)
+        """
+        if equipment_id in self._status_of:
+            previous = self._status_of.pop(equipment_id)
+            members = self._status_members[previous]
+            members.discard(equipment_id)
+            if not members:
+                del self._status_members[previous]
+        if status is None:
+            self._status_positions.pop(equipment_id, None)
+        else:
+            value = status.get("status")
+            self._status_of[equipment_id] = value
+            self._status_members.setdefault(value, set()).add(equipment_id)
+            if equipment_id not in self._status_positions:
+                # New entries are added at the end of equipment_status
+                self._status_positions[equipment_id] = self._next_status_position
+                self._next_status_position += 1
     
     def _load_checkout_history(self):
-        """Load checkout history from file.
+        """Load checkout history from storage.
         
         Returns:
             List of checkout records
         """
-        if os.path.exists(self.checkout_history_file):
-            try:
-                with open(self.checkout_history_file, 'r') as f:
-                    return json.load(f)
-            except:
-                return []
-        return []
+        try:
+            return self.storage.load('checkout_history')
+        except Exception as e:
+            print(f"Error loading checkout history: {e}")
+            return []
+    
+    def _append_checkout_history(self, entry):
+        """Record a single history entry in memory and append it to storage."""
+        self._checkout_history.append(entry)
+        self.history_index.add(entry)
+        self.storage.append('checkout_history', entry)
     
     def _save_checkout_history(self):
-        """Save checkout history to file."""
-        save_json(self.checkout_history, self.checkout_history_file)
+        """Rewrite the whole checkout history.
+        
+        Only needed when records are removed; new entries are appended with
+        _append_checkout_history.
+        """
+        self.storage.save('checkout_history', self.checkout_history)
     
     def _load_equipment_status(self):
-        """Load equipment status from file.
+        """Load equipment status from storage.
         
         Returns:
             Dictionary mapping equipment IDs to status information
         """
-        if os.path.exists(self.equipment_status_file):
-            try:
-                with open(self.equipment_status_file, 'r') as f:
-                    return json.load(f)
-            except:
-                return {}
-        return {}
+        try:
+            return self.storage.load('equipment_status')
+        except Exception as e:
+            print(f"Error loading equipment status: {e}")
+            return {}
+    
+    def _save_equipment_status(self, equipment_id=None):
+        """Save equipment status to storage and update the return schedule and status counts.
+        
+        Args:
+            equipment_id: Only persist this entry (or its removal) when given
+        """
+        if equipment_id is None:
+            # Re-index everything
+            self.equipment_status = self.equipment_status
+        else:
+            self.return_schedule.update(equipment_id, self.equipment_status.get(equipment_id))
+            self._index_status(equipment_id, self.equipment_status.get(equipment_id))
+        
+        if equipment_id is None:
+            self.storage.save('equipment_status', self.equipment_status)
+        elif equipment_id in self.equipment_status:
+            self.storage.put('equipment_status', equipment_id, self.equipment_status[equipment_id],
+                             lambda: self.equipment_status)
+        else:
+            self.storage.delete('equipment_status', equipment_id, lambda: self.equipment_status)
+    
+    def _load_kits(self):
+        """Load equipment kits from storage.
+        
+        Returns:
+            Dictionary mapping kit IDs to kit information
+        """
+        try:
+            return self.storage.load('kits')
+        except Exception as e:
+            print(f"Error loading kits: {e}")
+            return {}
     
-    def _save_equipment_status(self):
-        """Save equipment status to file."""
-        save_json(self.equipment_status, self.equipment_status_file)
+    def _save_kits(self, kit_id):
+        """Persist one kit (or its removal) to storage."""
+        if kit_id in self.kits:
+            self.storage.put('kits', kit_id, self.kits[kit_id], lambda: self.kits)
+        else:
+            self.storage.delete('kits', kit_id, lambda: self.kits)
     
     def _load_users(self):
-        """Load users from file.
+        """Load users from storage.
         
         Returns:
             Dictionary mapping usernames to user information
         """
-        if os.path.exists(self.users_file):
-            try:
-                with open(self.users_file, 'r') as f:
-                    return json.load(f)
-            except:
-                return self._create_default_users()
+        try:
+            users = self.storage.load('users')
+            if users:
+                return users
+        except Exception as e:
+            print(f"Error loading users: {e}")
         return self._create_default_users()
     
     def _create_default_users(self):
@@ -125,7 +251,7 @@ class JsonCheckoutManager:
         }
         
         # Save default users
-        save_json(default_users, self.users_file)
+        self.storage.save('users', default_users)
         
         return default_users
     
@@ -142,14 +268,15 @@ class JsonCheckoutManager:
                     if key != '_temp' and not callable(value)
                 }
 
-            # Save to file
-            save_json(serializable_users, self.users_file)
-            print(f"Users saved successfully to {self.users_file}")
+            # Save to storage
+            if not self.storage.save('users', serializable_users):
+                return False
+            print("Users saved successfully")
             return True
         except Exception as e:
             import traceback
             traceback.print_exc()
-            print(f"Error saving users to {self.users_file}: {str(e)}")
+            print(f"Error saving users: {str(e)}")
             return False
     
     def get_equipment_status(self, equipment_id):
@@ -210,7 +337,7 @@ class JsonCheckoutManager:
         
         # Store status
         self.equipment_status[equipment_id] = new_status
-        self._save_equipment_status()
+        self._save_equipment_status(equipment_id)
         
         # Add to history if status changed or location changed
         if (status != current_status.get("status") or 
@@ -228,8 +355,7 @@ class JsonCheckoutManager:
                 "notes": notes
             }
             
-            self.checkout_history.append(history_entry)
-            self._save_checkout_history()
+            self._append_checkout_history(history_entry)
         
         return True
     
@@ -288,6 +414,159 @@ class JsonCheckoutManager:
             user=user
         )
     
+    def get_kit(self, kit_id):
+        """Get a kit of equipment checked out and returned together.
+        
+        Args:
+            kit_id: ID of the kit (as printed on its QR code)
+            
+        Returns:
+            Dictionary with the kit name and equipment IDs, or None if not found
+        """
+        return self.kits.get(kit_id)
+    
+    def save_kit(self, kit_id, name, equipment_ids, user=None, equipment_exists=None):
+        """Create or replace a kit.
+        
+        Args:
+            kit_id: ID of the kit
+            name: Display name of the kit
+            equipment_ids: IDs of the equipment in the kit
+            user: Username of the user making the change
+            equipment_exists: Optional function telling whether an equipment ID exists
+            
+        Returns:
+            Boolean indicating success
+        """
+        equipment_ids = list(dict.fromkeys(equipment_id for equipment_id in equipment_ids if equipment_id))
+        if not kit_id or not equipment_ids:
+            return False
+        # Kit IDs must not shadow equipment, and kits do not nest
+        if kit_id in self.equipment_status or any(equipment_id in self.kits for equipment_id in equipment_ids):
+            return False
+        if equipment_exists is not None:
+            if equipment_exists(kit_id) or not all(equipment_exists(equipment_id) for equipment_id in equipment_ids):
+                return False
+        
+        self.kits[kit_id] = {
+            "name": name or kit_id,
+            "equipment_ids": equipment_ids,
+            "last_updated": datetime.now().isoformat(),
+            "updated_by": user
+        }
+        self._save_kits(kit_id)
+        return True
+    
+    def delete_kit(self, kit_id):
+        """Delete a kit (its equipment is not affected).
+        
+        Returns:
+            Boolean indicating whether the kit existed
+        """
+        if kit_id not in self.kits:
+            return False
+        del self.kits[kit_id]
+        self._save_kits(kit_id)
+        return True
+    
+    def expand_kits(self, ids):
+        """Replace kit IDs by the equipment they contain.
+        
+        Args:
+            ids: Equipment and kit IDs
+            
+        Returns:
+            List of equipment IDs, in the order given, without duplicates
+        """
+        equipment_ids = []
+        for item_id in ids:
+            kit = self.kits.get(item_id)
+            equipment_ids.extend(kit["equipment_ids"] if kit else [item_id])
+        return list(dict.fromkeys(equipment_ids))
+    
+    def _validate_batch(self, ids, expected_status, equipment_exists=None):
+        """Expand and check the items of a batch checkout or return.
+        
+        Args:
+            ids: Equipment and kit IDs
+            expected_status: Status every item must currently have
+            equipment_exists: Optional function telling whether an equipment ID exists
+            
+        Returns:
+            Tuple of (equipment IDs, list of error messages)
+        """
+        equipment_ids = self.expand_kits(ids or [])
+        if not equipment_ids:
+            return equipment_ids, ["No equipment given"]
+        
+        errors = []
+        for equipment_id in equipment_ids:
+            if equipment_exists is not None and not equipment_exists(equipment_id):
+                errors.append(f"{equipment_id}: equipment not found")
+                continue
+            status = self.get_equipment_status(equipment_id)
+            if status.get("status") == expected_status:
+                continue
+            if status.get("status") == "Checked Out":
+                errors.append(f"{equipment_id}: already checked out by {status.get('checked_out_by')}")
+            else:
+                errors.append(f"{equipment_id}: {status.get('status')}")
+        return equipment_ids, errors
+    
+    def checkout_many(self, ids, user, location, expected_return_days=1, notes=None, equipment_exists=None):
+        """Check out several pieces of equipment at once.
+        
+        Every item is validated first: if any of them cannot be checked out,
+        none is. The status and history changes are written in one unit of
+        work, so each dataset is persisted once.
+        
+        Args:
+            ids: Equipment IDs and kit IDs (a kit stands for all its equipment)
+            user: Username of the person checking out
+            location: Temporary location
+            expected_return_days: Number of days until expected return
+            notes: Additional notes
+            equipment_exists: Optional function telling whether an equipment ID exists
+            
+        Returns:
+            Tuple of (equipment IDs checked out, list of error messages)
+        """
+        if not location:
+            return [], ["Location is required"]
+        equipment_ids, errors = self._validate_batch(ids, "In Storage", equipment_exists)
+        if errors:
+            return [], errors
+        
+        with unit_of_work():
+            for equipment_id in equipment_ids:
+                self.checkout_equipment(equipment_id, user, location, expected_return_days, notes)
+        return equipment_ids, []
+    
+    def return_many(self, ids, user, return_location=None, notes=None, equipment_exists=None):
+        """Return several pieces of equipment at once.
+        
+        Every item must be checked out: if any of them is not, none is
+        returned. The changes are written in one unit of work.
+        
+        Args:
+            ids: Equipment IDs and kit IDs (a kit stands for all its equipment)
+            user: Username of the person returning
+            return_location: Location to return to (if None, uses the default location)
+            notes: Additional notes
+            equipment_exists: Optional function telling whether an equipment ID exists
+            
+        Returns:
+            Tuple of (equipment IDs returned, list of error messages)
+        """
+        equipment_ids, errors = self._validate_batch(ids, "Checked Out", equipment_exists)
+        if errors:
+            return [], errors
+        
+        with unit_of_work():
+            for equipment_id in equipment_ids:
+                self.return_equipment(equipment_id, user, return_location, notes)
+        return equipment_ids, []
+    
     def get_checked_out_equipment(self):
         """Get all currently checked out equipment.
         
@@ -311,78 +590,114 @@ class JsonCheckoutManager:
             status: Status to filter by
             
         Returns:
-            List of dictionaries with equipment details
+            List of dictionaries with equipment details, in dataset order
         """
         filtered_equipment = []
         
-        for equipment_id, equipment_status in self.equipment_status.items():
-            if equipment_status.get("status") == status:
-                item = equipment_status.copy()
-                item["id"] = equipment_id
-                filtered_equipment.append(item)
+        members = self._status_members.get(status, ())
+        for equipment_id in sorted(members, key=self._status_positions.__getitem__):
+            item = self.equipment_status[equipment_id].copy()
+            item["id"] = equipment_id
+            filtered_equipment.append(item)
         
         return filtered_equipment
     
-    def get_checkout_history(self, equipment_id=None, user=None, limit=None):
-        """Get checkout history, optionally filtered by equipment ID or user.
+    def get_status_counts(self, equipment_ids):
+        """Count equipment per status from the maintained status aggregates.
+        
+        Status entries of IDs that are not in equipment_ids are ignored, and
+        equipment without a status entry has the default status, In Storage.
+        
+        Args:
+            equipment_ids: IDs of the equipment to count (the inventory)
+            
+        Returns:
+            Dictionary of status -> count, for every status of STATUS_OPTIONS
+        """
+        if not isinstance(equipment_ids, (set, frozenset, KeysView)):
+            equipment_ids = set(equipment_ids)
+        counts = {status: len(equipment_ids & members) for status, members in self._status_members.items()}
+        # Whatever does not have another status is in storage
+        counts["In Storage"] = len(equipment_ids) - sum(count for status, count in counts.items()
+                                                        if status != "In Storage")
+        return {status: counts.get(status, 0) for status in self.STATUS_OPTIONS}
+    
+    def get_checkout_history(self, equipment_id=None, user=None, limit=None, since=None, until=None):
+        """Get checkout history, optionally filtered by equipment ID, user or time.
+        
+        Reads the history index, so the cost grows with the number of
+        records returned (or in the time range) rather than with the size of
+        the history.
         
         Args:
             equipment_id: Optional equipment ID to filter by
             user: Optional username to filter by
             limit: Optional limit on number of records to return
+            since: Optional datetime; only records at or after it
+            until: Optional datetime; only records at or before it
             
         Returns:
-            List of checkout history records
+            List of checkout history records, newest first (with a time
+            range, records whose timestamp cannot be read are left out)
         """
-        history = self.checkout_history
-        
-        # Filter by equipment ID if specified
+        filters = {}
         if equipment_id:
-            history = [record for record in history if record.get("equipment_id") == equipment_id]
-        
-        # Filter by user if specified
+            filters["equipment_id"] = equipment_id
         if user:
-            history = [record for record in history if record.get("user") == user]
-        
-        # Sort by timestamp (newest first)
-        history = sorted(history, key=lambda x: x.get("timestamp", ""), reverse=True)
+            filters["user"] = user
         
         # Limit number of records if specified
-        if limit and isinstance(limit, int) and limit > 0:
-            history = history[:limit]
+        if not (limit and isinstance(limit, int) and limit > 0):
+            limit = None
         
-        return history
+        return self.history_index.latest(filters, limit=limit, since=since, until=until)
     
     def get_overdue_equipment(self):
         """Get equipment that is overdue for return.
         
+        Reads the return schedule, so only the overdue entries are visited.
+        
         Returns:
-            List of dictionaries with overdue equipment details
+            List of dictionaries with overdue equipment details, the one
+            overdue longest first
         """
         now = datetime.now()
         overdue = []
         
-        for equipment_id, status in self.equipment_status.items():
-            if status.get("status") != "Checked Out":
-                continue
-                
-            expected_return = status.get("expected_return")
-            if not expected_return:
-                continue
-                
-            try:
-                return_date = datetime.fromisoformat(expected_return)
-                if return_date < now:
-                    item = status.copy()
-                    item["id"] = equipment_id
-                    item["days_overdue"] = (now - return_date).days
-                    overdue.append(item)
-            except:
-                # Skip if date parsing fails
-                continue
+        for return_date, equipment_id in self.return_schedule.due_between(until=now):
+            item = self.equipment_status[equipment_id].copy()
+            item["id"] = equipment_id
+            item["days_overdue"] = (now - return_date).days
+            overdue.append(item)
         
         return overdue
     
+    def get_returns_due(self, hours=None):
+        """Get checked out equipment by expected return time.
+        
+        Args:
+            hours: Only equipment not overdue yet and due within this many
+                hours (all checked out equipment with an expected return,
+                overdue or not, if None)
+            
+        Returns:
+            List of (expected return datetime, equipment ID) tuples, the one
+            due first first
+        """
+        if hours is None:
+            return self.return_schedule.due_between()
+        now = datetime.now()
+        return self.return_schedule.due_between(since=now, until=now + timedelta(hours=hours))
+    
+    def get_next_return_due(self):
+        """Get the checked out equipment due back first (to schedule a reminder).
+        
+        Returns:
+            Tuple of (expected return datetime, equipment ID), or None if
+            nothing checked out has an expected return
+        """
+        return self.return_schedule.next_due()
+    
     def authenticate_user(self, username, password):
         """Authenticate a user with username and password.
 
@@ -2,100 +2,436 @@
 JSON-based equipment data manager for the application.
 This module handles loading, processing, and accessing equipment data from JSON files.
 """
-import os
-import json
-import pandas as pd
-from datetime import datetime
+import re
+import sys
+from datetime import datetime, timedelta
+from itertools import groupby, islice
 import traceback
-from app.models.json_utils import save_json
+from app.models.storage import get_storage_backend, TrackedStorage, track_manager
+from app.models.equipment_index import SecondaryIndex, SortedDateIndex, normalize_text
+from app.models.equipment_search import EquipmentSearchIndex
+from app.models.equipment_fuzzy import FuzzyIndex
+from app.models.calibration_dates import parse_calibration_date
+
+# Fields query_equipment can sort by (all of them are indexed)
+SORTABLE_FIELDS = ('id', 'category', 'location', 'manufacturer', 'model', 'calibration_due_date')
+
+# Fields whose string values repeat across records and are interned, so
+# every record shares one string object per distinct value
+INTERNED_FIELDS = ('category', 'equipment_type', 'manufacturer', 'model', 'location')
+
+class FrozenRecord(dict):
+    """Read-only equipment record shared by every caller.
+
+    The manager hands out the same record objects on every call instead of
+    rebuilding them. They behave like plain dictionaries (templates, jsonify)
+    but refuse in-place changes; callers that need to modify a record work on
+    ``record.copy()``, which is an ordinary dict.
+
+    A record holds exactly the stored fields. Indexing it with a field that
+    other records have but this one lacks gives None instead of a KeyError,
+    and ``copy()`` includes such fields as None.
+    """
+
+    __slots__ = ('_columns',)
+
+    def __init__(self, item, columns=frozenset()):
+        """Wrap a stored item.
+
+        Args:
+            item: Dictionary of the stored fields
+            columns: Fields known across all records (shared set)
+        """
+        dict.__init__(self, item)
+        self._columns = columns
+
+    def __missing__(self, key):
+        if key in self._columns:
+            return None
+        raise KeyError(key)
+
+    def copy(self):
+        """Get a writable dict of the record, with every known field present."""
+        item = dict(self)
+        for column in self._columns:
+            item.setdefault(column, None)
+        return item
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("Equipment records are shared and read-only; modify a copy() instead")
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    update = pop = popitem = clear = setdefault = _read_only
+
+    def __reduce_ex__(self, protocol):
+        # copy.copy/deepcopy and pickle produce plain, writable dictionaries
+        return (dict, (dict(self),))
+
+def _pattern_matcher(pattern):
+    """Build a case-insensitive matcher with pandas ``str.contains`` semantics.
+
+    The pattern is a regular expression; one that does not compile is
+    matched as a plain substring instead.
+    """
+    try:
+        return re.compile(pattern, re.IGNORECASE).search
+    except re.error:
+        pattern = pattern.lower()
+        return lambda text: pattern in text.lower()
 
 class JsonEquipmentDataManager:
     """Manages equipment data, loading from JSON and providing access methods."""
     
-    def __init__(self, data_dir='app/data'):
+    def __init__(self, data_dir='app/data', storage=None):
         """Initialize the equipment data manager.
         
         Args:
             data_dir: Directory containing the JSON data files
+            storage: Storage backend (default: the backend configured for data_dir)
         """
         self.data_dir = data_dir
         
-        # JSON file paths
-        self.equipment_json = os.path.join(data_dir, 'equipment.json')
+        # Persistence for equipment records
+        self.storage = TrackedStorage(storage or get_storage_backend(data_dir))
+        
+        # Equipment records (FrozenRecord, exactly as stored) by id, in file
+        # order, and the fields seen across all of them
+        self._records = {}
+        self._columns = set()
+        
+        # Sequence number of each record, to return results in file order
+        self._positions = {}
+        self._next_position = 0
+        
+        # False when the stored data could not be loaded completely, so that
+        # saving the records held in memory would lose data
+        self._writable = True
+        
+        # DataFrame of all equipment for analytics, built on first access
+        # after a change (pandas is only imported then)
+        self._all_equipment_df = None
+        
+        # Secondary indexes: field value -> equipment ids
+        self.indexes = {
+            'category': SecondaryIndex('category'),
+            'location': SecondaryIndex('location', normalize=normalize_text),
+            'manufacturer': SecondaryIndex('manufacturer'),
+            'model': SecondaryIndex('model'),
+        }
+        
+        # Full-text index used by search_equipment
+        self.search_index = EquipmentSearchIndex()
         
-        # DataFrames to store equipment data
-        self.all_equipment_df = None
-        self.chambers_df = None
-        self.electrometers_df = None
-        self.survey_meters_df = None
+        # Trigram index of ids, serial and model numbers for fuzzy lookups,
+        # built on the first lookup and kept up to date from then on
+        self._fuzzy_index = None
         
-        # Cache of equipment by ID for quicker lookups
-        self.equipment_by_id = {}
+        # Normalized calibration due date of each record (CalibrationDate),
+        # the ids sorted by due date and the status stated in the text, if any
+        self._calibration = {}
+        self.calibration_index = SortedDateIndex()
+        self._calibration_flags = {}
         
         # Load data
         self.load_data()
+        
+        # Pick up changes made by other workers at the start of each request
+        track_manager(self)
+    
+    def refresh(self):
+        """Reload equipment data if another process has changed it since it was last read."""
+        if self.storage.changed('equipment'):
+            self.load_data()
     
     def load_data(self):
         """Load and process equipment data from JSON files."""
         try:
-            # Check if JSON file exists
-            if not os.path.exists(self.equipment_json):
-                print(f"Warning: Equipment JSON file not found at {self.equipment_json}")
-                # Initialize empty DataFrames
-                self.all_equipment_df = pd.DataFrame()
-                self.chambers_df = pd.DataFrame()
-                self.electrometers_df = pd.DataFrame()
-                self.survey_meters_df = pd.DataFrame()
+            # Check if equipment data exists
+            if not self.storage.exists('equipment'):
+                print("Warning: Equipment data not found in storage")
+                # Initialize empty data
+                self._set_records([])
                 return
                 
-            # Load equipment data from JSON
-            with open(self.equipment_json, 'r') as f:
-                equipment_data = json.load(f)
-            
-            # Convert to DataFrame
-            self.all_equipment_df = pd.DataFrame(equipment_data)
+            # Load equipment data from storage
+            equipment_data = self.storage.load('equipment')
             
-            # Set index to the ID field if it exists
-            if 'id' in self.all_equipment_df.columns:
-                self.all_equipment_df = self.all_equipment_df.set_index('id')
+            self._set_records(equipment_data)
             
-            # Split into category-specific DataFrames
-            if 'category' in self.all_equipment_df.columns:
-                self.chambers_df = self.all_equipment_df[self.all_equipment_df['category'] == 'Chamber']
-                self.electrometers_df = self.all_equipment_df[self.all_equipment_df['category'] == 'Electrometer']
-                self.survey_meters_df = self.all_equipment_df[self.all_equipment_df['category'] == 'Survey Meter']
-            
-            # Build the equipment_by_id cache
-            self.equipment_by_id = self.all_equipment_df.to_dict('index')
-            
-            print(f"Loaded {len(self.chambers_df)} chambers, {len(self.electrometers_df)} electrometers, {len(self.survey_meters_df)} survey meters")
+            category_index = self.indexes['category']
+            print(f"Loaded {category_index.count('Chamber')} chambers, {category_index.count('Electrometer')} electrometers, {category_index.count('Survey Meter')} survey meters")
+            unparsed = self.get_calibration_diagnostics()
+            if unparsed:
+                print(f"Could not parse {len(unparsed)} calibration due dates (see get_calibration_diagnostics())")
             
         except Exception as e:
             print(f"Error loading equipment data: {e}")
             traceback.print_exc()  # Print the full traceback to help debug the issue
-            # Initialize empty DataFrames in case of error
-            self.all_equipment_df = pd.DataFrame()
-            self.chambers_df = pd.DataFrame()
-            self.electrometers_df = pd.DataFrame()
-            self.survey_meters_df = pd.DataFrame()
+            # Initialize empty data in case of error
+            self._set_records([])
+            self._writable = False
     
-    def get_all_equipment(self):
-        """Get all equipment as a list of dictionaries.
+    def _set_records(self, equipment_data):
+        """Replace the cached records and bring the indexes up to date.
+        
+        Only records that were added, removed or changed since the previous
+        load are re-indexed (secondary and full-text indexes alike) and have
+        their calibration due date re-parsed; the calibration index only moves
+        records whose due date changed.
+        
+        Args:
+            equipment_data: Stored equipment items, in file order
+        """
+        old_records = self._records
+        columns = set()
+        new_records = {}
+        skipped = 0
+        for item in equipment_data:
+            equipment_id = item.get('id') if isinstance(item, dict) else None
+            if equipment_id is None or equipment_id in new_records:
+                skipped += 1
+                continue
+            columns.update(item)
+            # Materialize the records served by the getters once per data version
+            new_records[equipment_id] = self._as_record(item, columns)
+        columns.discard('id')
+        
+        # Records without an id, or repeating one, cannot be served; saving
+        # would drop them from storage, so edits are refused until fixed
+        self._writable = not skipped
+        if skipped:
+            print(f"Warning: {skipped} equipment records have a missing or duplicate id; "
+                  f"equipment changes will not be saved until this is fixed")
+        
+        bulk = not old_records
+        for equipment_id, old_record in old_records.items():
+            new_record = new_records.get(equipment_id)
+            if new_record != old_record:
+                self._index_record(equipment_id, old_record, new_record)
+        for equipment_id, new_record in new_records.items():
+            if equipment_id not in old_records:
+                self._index_record(equipment_id, None, new_record, bulk=bulk)
+        if bulk:
+            # First load: one sort instead of an insertion per record
+            self.calibration_index.rebuild({equipment_id: calibration.due
+                                            for equipment_id, calibration in self._calibration.items()})
+        
+        self._records = new_records
+        self._columns = columns
+        self._positions = {equipment_id: position for position, equipment_id in enumerate(new_records)}
+        self._next_position = len(new_records)
+        self._all_equipment_df = None
+    
+    @staticmethod
+    def _as_record(item, columns):
+        """Build the read-only record for a stored item, interning repeated strings."""
+        record = dict(item)
+        for field in INTERNED_FIELDS:
+            value = record.get(field)
+            if type(value) is str:
+                record[field] = sys.intern(value)
+        return FrozenRecord(record, columns)
+    
+    def _index_record(self, equipment_id, old_record, new_record, bulk=False):
+        """Bring every index up to date for one added, changed or removed record.
+        
+        Args:
+            equipment_id: ID of the record
+            old_record: Record before the change (None if added)
+            new_record: Record after the change (None if removed)
+            bulk: Leave the calibration index to be rebuilt by the caller
+        """
+        indexes = list(self.indexes.values()) + [self.search_index]
+        if self._fuzzy_index is not None:
+            indexes.append(self._fuzzy_index)
+        if new_record is None:
+            for index in indexes:
+                index.remove(equipment_id)
+            del self._calibration[equipment_id]
+            self._calibration_flags.pop(equipment_id, None)
+            self.calibration_index.remove(equipment_id)
+            return
+        
+        for index in indexes:
+            if old_record is None:
+                index.add(equipment_id, new_record)
+            else:
+                index.update(equipment_id, new_record)
+        
+        calibration = parse_calibration_date(new_record.get('calibration_due_date'))
+        self._calibration[equipment_id] = calibration
+        if calibration.flag:
+            self._calibration_flags[equipment_id] = calibration.flag
+        else:
+            self._calibration_flags.pop(equipment_id, None)
+        if not bulk:
+            # Only moves the record if its due date changed
+            self.calibration_index.update(equipment_id, calibration.due)
+    
+    def _records_for(self, ids):
+        """Get the records for a list of ids, in file order."""
+        positions = self._positions
+        return [self._records[equipment_id] for equipment_id in sorted(ids, key=positions.__getitem__)]
+    
+    @property
+    def all_equipment_df(self):
+        """DataFrame of all equipment indexed by id (built on first access after a change)."""
+        if self._all_equipment_df is None:
+            import pandas as pd
+            all_equipment_df = pd.DataFrame(list(self._records.values()))
+            if 'id' in all_equipment_df.columns:
+                all_equipment_df = all_equipment_df.set_index('id')
+            self._all_equipment_df = all_equipment_df
+        return self._all_equipment_df
+    
+    @property
+    def fuzzy_index(self):
+        """FuzzyIndex of the records (built on first access)."""
+        if self._fuzzy_index is None:
+            fuzzy_index = FuzzyIndex()
+            for equipment_id, record in self._records.items():
+                fuzzy_index.add(equipment_id, record)
+            self._fuzzy_index = fuzzy_index
+        return self._fuzzy_index
+    
+    def _replace_record(self, equipment_id, item):
+        """Store, replace or remove one item and update the indexes in place.
         
+        Args:
+            equipment_id: ID of the equipment
+            item: Stored item (with 'id'), or None to remove it
+            
+        Returns:
+            True if the change was saved, False otherwise
+        """
+        if not self._writable:
+            print(f"Not saving equipment {equipment_id}: the stored equipment data did not load completely")
+            return False
+        
+        old_record = self._records.get(equipment_id)
+        if item is None:
+            del self._records[equipment_id]
+            del self._positions[equipment_id]
+            new_record = None
+        else:
+            if old_record is None:
+                self._positions[equipment_id] = self._next_position
+                self._next_position += 1
+            # New fields become known to every record (the set is shared)
+            self._columns.update(key for key in item if key != 'id')
+            new_record = self._records[equipment_id] = self._as_record(item, self._columns)
+        self._index_record(equipment_id, old_record, new_record)
+        self._all_equipment_df = None
+        
+        # Persist only this record (JSON files are rewritten from the records)
+        if new_record is None:
+            saved = self.storage.delete('equipment', equipment_id, self._stored_items)
+        else:
+            saved = self.storage.put('equipment', equipment_id, new_record, self._stored_items)
+        if not saved:
+            print(f"Error saving equipment {equipment_id}")
+            # Reload from storage at the next refresh
+            self.storage.mark_stale('equipment')
+        return bool(saved)
+    
+    def _stored_items(self):
+        """Get every stored equipment item, in file order."""
+        return list(self._records.values())
+    
+    def add_equipment(self, equipment):
+        """Add a piece of equipment.
+        
+        Args:
+            equipment: Dictionary of equipment fields, including a unique 'id'
+            
+        Returns:
+            True if the equipment was added, False if the id is missing or
+            already used, or the change could not be saved
+        """
+        equipment_id = equipment.get('id')
+        if not equipment_id or equipment_id in self._records:
+            print(f"Cannot add equipment {equipment_id!r}: missing or duplicate id")
+            return False
+        return self._replace_record(equipment_id, equipment)
+    
+    def update_equipment(self, equipment_id, changes):
+        """Update fields of a piece of equipment.
+        
+        Args:
+            equipment_id: ID of the equipment
+            changes: Dictionary of fields to set ('id' is ignored)
+            
+        Returns:
+            True if the equipment was updated, False if it does not exist or
+            the change could not be saved
+        """
+        if equipment_id not in self._records:
+            return False
+        item = dict(self._records[equipment_id])
+        item.update((key, value) for key, value in changes.items() if key != 'id')
+        return self._replace_record(equipment_id, item)
+    
+    def delete_equipment(self, equipment_id):
+        """Delete a piece of equipment.
+        
+        Args:
+            equipment_id: ID of the equipment
+            
+        Returns:
+            True if the equipment was deleted, False if it does not exist or
+            the change could not be saved
+        """
+        if equipment_id not in self._records:
+            return False
+        return self._replace_record(equipment_id, None)
+    
+    def lookup_equipment(self, field, value, prefix=False):
+        """Get equipment through a secondary index.
+        
+        Args:
+            field: Indexed field ('category', 'location', 'manufacturer' or 'model')
+            value: Value to look up; locations are matched case-insensitively
+                with whitespace collapsed, the other fields exactly
+            prefix: Match every value starting with ``value`` instead
+            
         Returns:
             List of dictionaries, each representing one piece of equipment
         """
-        if self.all_equipment_df is None or self.all_equipment_df.empty:
-            return []
+        index = self.indexes[field]
+        ids = index.prefix(value) if prefix else index.exact(value)
+        return self._records_for(ids)
+    
+    @property
+    def chambers_df(self):
+        """DataFrame of the chambers (built on access)."""
+        return self._category_df('Chamber')
+    
+    @property
+    def electrometers_df(self):
+        """DataFrame of the electrometers (built on access)."""
+        return self._category_df('Electrometer')
+    
+    @property
+    def survey_meters_df(self):
+        """DataFrame of the survey meters (built on access)."""
+        return self._category_df('Survey Meter')
+    
+    def _category_df(self, category):
+        """Select one category's rows of the equipment DataFrame."""
+        if self.all_equipment_df.empty:
+            return self.all_equipment_df
+        return self.all_equipment_df.loc[[record['id'] for record in self.lookup_equipment('category', category)]]
+    
+    def get_all_equipment(self):
+        """Get all equipment as a list of dictionaries.
         
-        # Convert DataFrame to list of dictionaries, including the index as 'id'
-        result = []
-        for idx, row in self.all_equipment_df.iterrows():
-            item_dict = row.to_dict()
-            item_dict['id'] = idx
-            result.append(item_dict)
+        The records are shared and read-only (see FrozenRecord); use
+        ``item.copy()`` before changing one.
         
-        return result
+        Returns:
+            List of dictionaries, each representing one piece of equipment
+        """
+        return list(self._records.values())
     
     def get_equipment_by_id(self, equipment_id):
         """Get a specific piece of equipment by ID.
@@ -106,12 +442,28 @@ class JsonEquipmentDataManager:
         Returns:
             Dictionary representing the equipment, or None if not found
         """
-        if equipment_id in self.equipment_by_id:
-            item_dict = self.equipment_by_id[equipment_id].copy()
-            item_dict['id'] = equipment_id
-            return item_dict
-        return None
-    
+        record = self._records.get(equipment_id)
+        return record.copy() if record is not None else None
+
+    def get_equipment_ids(self):
+        """Get the IDs of all equipment.
+
+        Returns:
+            Read-only set-like view of the equipment IDs, in file order
+        """
+        return self._records.keys()
+
+    def get_record(self, equipment_id):
+        """Get the shared read-only record of a piece of equipment.
+
+        Args:
+            equipment_id: Unique ID of the equipment
+
+        Returns:
+            FrozenRecord, or None if not found
+        """
+        return self._records.get(equipment_id)
+
     def get_equipment_by_category(self, category):
         """Get equipment filtered by category.
         
@@ -121,119 +473,237 @@ class JsonEquipmentDataManager:
         Returns:
             List of dictionaries, each representing one piece of equipment
         """
-        if self.all_equipment_df is None or self.all_equipment_df.empty:
-            return []
-        
-        filtered_df = self.all_equipment_df[self.all_equipment_df['category'] == category]
-        
-        # Convert filtered DataFrame to list of dictionaries
-        result = []
-        for idx, row in filtered_df.iterrows():
-            item_dict = row.to_dict()
-            item_dict['id'] = idx
-            result.append(item_dict)
-        
-        return result
+        return self._records_for(self.indexes['category'].exact(category))
     
-    def get_equipment_by_location(self, location):
+    def get_equipment_by_location(self, location, match='contains'):
         """Get equipment filtered by location.
         
         Args:
             location: Location to filter by
+            match: 'contains' (case-insensitive pattern anywhere in the location),
+                'exact' or 'prefix' (index lookups, case-insensitive)
             
         Returns:
             List of dictionaries, each representing one piece of equipment
         """
-        if self.all_equipment_df is None or self.all_equipment_df.empty:
-            return []
-        
-        # Check if location is contained within location field
-        filtered_df = self.all_equipment_df[
-            self.all_equipment_df['location'].str.contains(location, case=False, na=False)
-        ]
+        if match in ('exact', 'prefix'):
+            return self.lookup_equipment('location', location, prefix=(match == 'prefix'))
         
-        # Convert filtered DataFrame to list of dictionaries
-        result = []
-        for idx, row in filtered_df.iterrows():
-            item_dict = row.to_dict()
-            item_dict['id'] = idx
-            result.append(item_dict)
-        
-        return result
+        return self._records_for(self._location_ids(location))
+    
+    def _location_ids(self, location):
+        """Get the ids of equipment whose location contains a pattern (case-insensitive)."""
+        # The pattern is tested once per distinct location
+        matches = _pattern_matcher(location)
+        return self.indexes['location'].scan(lambda value: isinstance(value, str) and matches(value))
     
-    def search_equipment(self, query):
+    def search_equipment(self, query, limit=None):
         """Search equipment by keyword across multiple fields.
         
+        Every term must match (case-insensitive) part of id, manufacturer,
+        model, serial_number, location, notes or equipment_type; whole words
+        rank above word prefixes, and those above other parts of a word.
+        ``field:value`` terms (e.g. ``sn:1234``, ``model:30013``) only match
+        that field.
+        
         Args:
             query: Search query string
+            limit: Maximum number of results to return (all if None)
             
         Returns:
-            List of dictionaries, each representing one piece of equipment
+            List of dictionaries, each representing one piece of equipment,
+            best matches first
         """
-        if self.all_equipment_df is None or self.all_equipment_df.empty or not query:
+        if not self._records or not query:
             return []
         
-        # Convert query to lowercase for case-insensitive search
-        query = str(query).lower()
+        scores = self.search_index.search(query)
+        positions = self._positions
+        ranked = sorted(scores, key=lambda equipment_id: (-scores[equipment_id], positions[equipment_id]))
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [self._records[equipment_id] for equipment_id in ranked]
+    
+    def query_equipment(self, filters=None, query=None, sort=None, offset=0, limit=None, within=None):
+        """Filter, sort and page equipment using the indexes.
+        
+        Filters are evaluated as index lookups and intersected, smallest
+        result first. An unfiltered page sorted by a field walks that field's
+        sorted index, so it costs O(offset + limit) rather than a sort over
+        every record. Ties, and records without a value (which come last),
+        keep file order.
         
-        # Search across multiple columns
-        mask = False
-        for col in ['manufacturer', 'model', 'serial_number', 'location', 'notes', 'equipment_type']:
-            if col in self.all_equipment_df.columns:
-                # Add conditions with OR (|) operator
-                col_mask = self.all_equipment_df[col].astype(str).str.lower().str.contains(query, na=False)
-                mask = mask | col_mask
+        Args:
+            filters: Mapping of indexed field -> list of accepted values; the
+                values of one field are alternatives (OR) and every field
+                must match (AND). Locations match as in get_equipment_by_location
+                (pattern anywhere in the location), the other fields exactly
+            query: Search query (see search_equipment); matches are ranked
+                unless sorted by a field
+            sort: Field from SORTABLE_FIELDS, prefixed with '-' for descending
+                order (default: file order)
+            offset: Number of matching records to skip
+            limit: Maximum number of records to return (all if None)
+            within: Only consider these equipment ids (None for all)
+            
+        Returns:
+            Tuple of (number of matching records, list of records in the page)
+            
+        Raises:
+            ValueError: If a filter or sort field is not indexed
+        """
+        field = sort.lstrip('-') if sort else None
+        descending = bool(sort) and sort.startswith('-')
+        if field is not None and field not in SORTABLE_FIELDS:
+            raise ValueError(f"Cannot sort by '{field}'")
+        
+        # Ids matching each filter, then their intersection (None: every record)
+        matches = []
+        for name, values in (filters or {}).items():
+            if name not in self.indexes:
+                raise ValueError(f"Cannot filter by '{name}'")
+            ids = set()
+            for value in values:
+                ids.update(self._location_ids(value) if name == 'location' else self.indexes[name].exact(value))
+            matches.append(ids)
+        scores = None
+        if query:
+            scores = self.search_index.search(query)
+            matches.append(scores.keys())
+        if within is not None:
+            matches.append(set(within))
+        candidates = None
+        if matches:
+            matches.sort(key=len)
+            candidates = set(matches[0]).intersection(*matches[1:])
+        
+        stop = None if limit is None else offset + limit
+        if candidates is None:
+            total = len(self._records)
+            ordered = self._records if field is None else self._walk_sorted(field, descending)
+            page = list(islice(ordered, offset, stop))
+        else:
+            total = len(candidates)
+            page = self._sort_ids(candidates, field, descending, scores)[offset:stop]
+        return total, [self._records[equipment_id] for equipment_id in page]
+    
+    def _sort_values(self, field):
+        """Get (value of id, sort key of value) functions for a sortable field."""
+        if field == 'calibration_due_date':
+            return self.calibration_index.get, lambda due: due
+        index = self.indexes[field]
+        return index.value_of, index.normalize
+    
+    def _walk_sorted(self, field, descending):
+        """Yield every equipment id in the order of a field, from its index."""
+        if field == 'id':
+            yield from sorted(self._records, reverse=descending)
+            return
+        
+        if field == 'calibration_due_date':
+            ordered = self.calibration_index.range()
+            if descending:
+                ordered.reverse()
+            groups = (list(group) for _, group in groupby(ordered, key=self.calibration_index.get))
+        else:
+            groups = self.indexes[field].groups(reverse=descending)
+        positions = self._positions
+        for group in groups:
+            yield from sorted(group, key=positions.__getitem__)
+        
+        # Records without a value come last, in file order
+        value_of, _ = self._sort_values(field)
+        for equipment_id in self._records:
+            if value_of(equipment_id) is None:
+                yield equipment_id
+    
+    def _sort_ids(self, ids, field, descending, scores=None):
+        """Sort a set of equipment ids by a field (or by search score, or file order)."""
+        positions = self._positions
+        ordered = sorted(ids, key=positions.__getitem__)
+        if field is None:
+            if scores is not None:
+                ordered.sort(key=lambda equipment_id: -scores[equipment_id])
+            return ordered
+        if field == 'id':
+            return sorted(ids, reverse=descending)
+        
+        value_of, sort_key = self._sort_values(field)
+        present = [equipment_id for equipment_id in ordered if value_of(equipment_id) is not None]
+        missing = [equipment_id for equipment_id in ordered if value_of(equipment_id) is None]
+        # Stable sorts keep ties in file order, descending too
+        present.sort(key=lambda equipment_id: sort_key(value_of(equipment_id)), reverse=descending)
+        return present + missing
+    
+    def find_similar_equipment(self, text, limit=5, min_score=0.5):
+        """Find the equipment whose id, serial number or model is closest to some text.
         
-        filtered_df = self.all_equipment_df[mask]
+        For mistyped or partly readable identifiers; matching ignores case
+        and punctuation and tolerates a few wrong, missing or swapped
+        characters.
+        
+        Args:
+            text: Identifier as typed or scanned
+            limit: Maximum number of results to return
+            min_score: Minimum similarity (0 to 1) of the results
+            
+        Returns:
+            List of (record, FuzzyMatch) tuples, best match first
+        """
+        matches = self.fuzzy_index.search(text, limit=limit, min_score=min_score)
+        return [(self._records[match.record_id], match) for match in matches]
+    
+    def get_calibration_date(self, equipment_id):
+        """Get the normalized calibration due date of a piece of equipment.
         
-        # Convert filtered DataFrame to list of dictionaries
-        result = []
-        for idx, row in filtered_df.iterrows():
-            item_dict = row.to_dict()
-            item_dict['id'] = idx
-            result.append(item_dict)
+        Args:
+            equipment_id: ID of the equipment
+            
+        Returns:
+            CalibrationDate (``due`` is None when the date could not be read),
+            or None if the equipment does not exist
+        """
+        return self._calibration.get(equipment_id)
+    
+    def get_calibration_diagnostics(self):
+        """List the calibration due dates that could not be parsed.
         
-        return result
+        Returns:
+            List of dictionaries with 'id', 'text' and 'error', in file order
+        """
+        diagnostics = []
+        for item in self._records.values():
+            parsed = self._calibration[item['id']]
+            if parsed.due is None and parsed.error != 'missing':
+                diagnostics.append({'id': item['id'], 'text': parsed.text, 'error': parsed.error})
+        return diagnostics
     
     def _parse_calibration_date(self, date_str):
-        """Parse a calibration date string in various formats into a datetime object.
+        """Parse a calibration date string in various formats.
         
         Args:
             date_str: String representation of a date
             
         Returns:
-            datetime object or None if parsing fails
+            ISO format string of the due date, the string as-is if it cannot
+            be parsed, or None if it is empty
         """
         if not date_str or not isinstance(date_str, str):
             return None
-            
-        # List of common date formats to try
-        date_formats = [
-            '%m/%Y',        # 05/2025
-            '%m/%d/%Y',     # 05/15/2025
-            '%B %Y',        # May 2025
-            '%b %Y',        # May 2025
-            '%Y-%m-%d',     # 2025-05-15
-            '%d-%m-%Y',     # 15-05-2025
-            '%m-%d-%Y',     # 05-15-2025
-        ]
-        
-        # Try to extract the date part if there's additional text
-        # Example: "05/2025 - repaired"
-        if ' - ' in date_str:
-            date_str = date_str.split(' - ')[0].strip()
-        
-        # Try each format
-        for fmt in date_formats:
-            try:
-                dt = datetime.strptime(date_str, fmt)
-                # Return ISO format string instead of datetime object to avoid serialization issues
-                return dt.isoformat()
-            except ValueError:
-                continue
-            
-        # If we can't parse it, just return the string as-is
-        return date_str
+        parsed = parse_calibration_date(date_str)
+        return parsed.due.isoformat() if parsed.due else date_str
+    
+    def _calibration_bounds(self, current_date, days):
+        """Due date boundaries of the calibration statuses.
+        
+        A due date before ``overdue_before`` is overdue; one before
+        ``due_soon_before`` is due soon (at most ``days`` whole days away);
+        anything later is current.
+        
+        Returns:
+            Tuple of (overdue_before, due_soon_before)
+        """
+        return current_date, current_date + timedelta(days=days + 1)
     
     def get_calibration_due_soon(self, days=30):
         """Get equipment where calibration is due soon.
@@ -245,55 +715,28 @@ class JsonEquipmentDataManager:
             List of dictionaries, each representing one piece of equipment
         """
         current_date = datetime.now()
-        due_soon_items = []
+        overdue_before, due_soon_before = self._calibration_bounds(current_date, days)
+        flags = self._calibration_flags
         
-        for item in self.get_all_equipment():
-            if not item.get('calibration_due_date'):
-                continue
-                
-            date_str = str(item.get('calibration_due_date'))
-            
-            # Check for known status indicators in the text
-            if 'overdue' in date_str.lower():
-                # Already overdue
-                item['calibration_status'] = 'overdue'
-                due_soon_items.append(item)
-                continue
-                
-            if 'due soon' in date_str.lower():
-                # Already marked as due soon
-                item['calibration_status'] = 'due_soon'
-                due_soon_items.append(item)
-                continue
-            
-            # Try to parse the date
-            cal_date = self._parse_calibration_date(date_str)
-            if not cal_date:
-                continue
-            
-            try:
-                # Convert ISO format string back to datetime for comparison
-                if isinstance(cal_date, str):
-                    cal_date_dt = datetime.fromisoformat(cal_date)
+        # Status stated in the text ("Overdue", "Due soon") comes first; the
+        # other candidates are one slice of the calibration index
+        statuses = dict(flags)
+        for equipment_id in self.calibration_index.range(end=due_soon_before, end_inclusive=False):
+            if equipment_id not in flags:
+                due = self.calibration_index.get(equipment_id)
+                statuses[equipment_id] = 'overdue' if due < overdue_before else 'due_soon'
+        
+        due_soon_items = []
+        for item in self._records_for(statuses):
+            item = item.copy()
+            item['calibration_status'] = statuses[item['id']]
+            if item['id'] not in flags:
+                days_until_due = (self.calibration_index.get(item['id']) - current_date).days
+                if days_until_due < 0:
+                    item['days_overdue'] = abs(days_until_due)
                 else:
-                    cal_date_dt = cal_date
-                
-                # Calculate difference in days
-                delta = cal_date_dt - current_date
-                
-                if delta.days < 0:
-                    # Overdue
-                    item['calibration_status'] = 'overdue'
-                    item['days_overdue'] = abs(delta.days)
-                    due_soon_items.append(item)
-                elif delta.days <= days:
-                    # Due soon
-                    item['calibration_status'] = 'due_soon'
-                    item['days_until_due'] = delta.days
-                    due_soon_items.append(item)
-            except Exception as e:
-                print(f"Error processing calibration date '{cal_date}': {e}")
-                continue
+                    item['days_until_due'] = days_until_due
+            due_soon_items.append(item)
         
         return due_soon_items
         
@@ -308,77 +751,86 @@ class JsonEquipmentDataManager:
         Returns:
             List of dictionaries, each representing one piece of equipment
         """
-        all_equipment = self.get_all_equipment()
-        filtered_items = []
+        # Items without a readable date only match an explicit 'unknown' filter
+        if status == 'unknown':
+            unknown = [equipment_id for equipment_id, calibration in self._calibration.items()
+                       if calibration.due is None]
+            filtered_items = []
+            for item in self._records_for(unknown):
+                item = item.copy()
+                item['calibration_status'] = 'unknown'
+                filtered_items.append(item)
+            return filtered_items
+        
         current_date = datetime.now()
+        overdue_before, due_soon_before = self._calibration_bounds(current_date, 30)
+        
+        # Narrow the date range to the requested status before slicing
+        low, high, end_inclusive = start_date, end_date, True
+        if status == 'overdue':
+            if high is None or high >= overdue_before:
+                high, end_inclusive = overdue_before, False
+        elif status == 'due_soon':
+            low = max(low, overdue_before) if low else overdue_before
+            if high is None or high >= due_soon_before:
+                high, end_inclusive = due_soon_before, False
+        elif status == 'current':
+            low = max(low, due_soon_before) if low else due_soon_before
+        elif status:
+            return []
         
-        for item in all_equipment:
-            # Skip items without calibration date if filtering by date
-            if not item.get('calibration_due_date') and (start_date or end_date or status):
-                if status == 'unknown':
-                    # Include items with unknown status when explicitly filtering for it
-                    item['calibration_status'] = 'unknown'
-                    filtered_items.append(item)
-                continue
-            
-            date_str = str(item.get('calibration_due_date', ''))
+        filtered_items = []
+        for item in self._records_for(self.calibration_index.range(low, high, end_inclusive)):
+            # The returned items carry extra status fields
+            due = self.calibration_index.get(item['id'])
+            days_until_due = (due - current_date).days
+            item = item.copy()
+            if due < overdue_before:
+                item['calibration_status'] = 'overdue'
+                item['days_overdue'] = abs(days_until_due)
+            else:
+                item['calibration_status'] = 'due_soon' if due < due_soon_before else 'current'
+                item['days_until_due'] = days_until_due
+            filtered_items.append(item)
                 
-            # Parse calibration date
-            cal_date = self._parse_calibration_date(date_str)
+        return filtered_items
+    
+    def get_calibration_status_counts(self, days=30, ids=None):
+        """Count equipment by calibration status.
+        
+        Args:
+            days: Number of days to consider "due soon"
+            ids: Only count these equipment ids (default: all equipment)
             
-            # Determine calibration status
-            if not cal_date:
-                item['calibration_status'] = 'unknown'
-                if status == 'unknown':
-                    filtered_items.append(item)
-                continue
-                
-            # Convert ISO format string back to datetime for comparison
-            try:
-                if isinstance(cal_date, str):
-                    cal_date_dt = datetime.fromisoformat(cal_date)
-                else:
-                    cal_date_dt = cal_date
-                
-                # Calculate time until calibration
-                delta = cal_date_dt - current_date
-                delta_days = delta.days
-                
-                # Assign status
-                if delta_days < 0:
-                    item['calibration_status'] = 'overdue'
-                    item['days_overdue'] = abs(delta_days)
-                elif delta_days <= 30:
-                    item['calibration_status'] = 'due_soon'
-                    item['days_until_due'] = delta_days
+        Returns:
+            Dictionary of status ('current', 'due_soon', 'overdue', 'unknown') -> count
+        """
+        overdue_before, due_soon_before = self._calibration_bounds(datetime.now(), days)
+        index = self.calibration_index
+        if ids is not None:
+            counts = {'current': 0, 'due_soon': 0, 'overdue': 0, 'unknown': 0}
+            for equipment_id in ids:
+                if equipment_id not in self._records:
+                    continue
+                due = index.get(equipment_id)
+                if due is None:
+                    counts['unknown'] += 1
+                elif due < overdue_before:
+                    counts['overdue'] += 1
+                elif due < due_soon_before:
+                    counts['due_soon'] += 1
                 else:
-                    item['calibration_status'] = 'current'
-                    item['days_until_due'] = delta_days
-            except Exception as e:
-                print(f"Error processing calibration date '{cal_date}': {e}")
-                item['calibration_status'] = 'unknown'
-                
-            # Apply date range filter if specified
-            date_in_range = True
-            try:
-                if start_date and cal_date_dt < start_date:
-                    date_in_range = False
-                if end_date and cal_date_dt > end_date:
-                    date_in_range = False
-            except Exception:
-                # If comparison fails, assume it's out of range
-                date_in_range = False
-                
-            # Apply status filter if specified
-            status_matches = True
-            if status and item['calibration_status'] != status:
-                status_matches = False
-                
-            # Add to filtered list if it passes all filters
-            if date_in_range and (not status or status_matches):
-                filtered_items.append(item)
-                
-        return filtered_items
+                    counts['current'] += 1
+            return counts
+        
+        overdue = index.count_before(overdue_before)
+        due_soon = index.count_before(due_soon_before) - overdue
+        return {
+            'current': len(index) - overdue - due_soon,
+            'due_soon': due_soon,
+            'overdue': overdue,
+            'unknown': len(self._records) - len(index),
+        }
     
     def get_unique_locations(self):
         """Get a list of unique locations from all equipment.
@@ -386,13 +838,7 @@ class JsonEquipmentDataManager:
         Returns:
             List of unique location strings
         """
-        if self.all_equipment_df is None or self.all_equipment_df.empty:
-            return []
-        
-        if 'location' not in self.all_equipment_df.columns:
-            return []
-        
-        return sorted(self.all_equipment_df['location'].dropna().unique().tolist())
+        return sorted(self.indexes['location'].values())
     
     def get_unique_manufacturers(self):
         """Get a list of unique manufacturers from all equipment.
@@ -400,13 +846,7 @@ class JsonEquipmentDataManager:
         Returns:
             List of unique manufacturer strings
         """
-        if self.all_equipment_df is None or self.all_equipment_df.empty:
-            return []
-        
-        if 'manufacturer' not in self.all_equipment_df.columns:
-            return []
-        
-        return sorted(self.all_equipment_df['manufacturer'].dropna().unique().tolist())
+        return sorted(self.indexes['manufacturer'].values())
     
     def get_equipment_stats(self):
         """Get equipment statistics.
@@ -415,11 +855,11 @@ class JsonEquipmentDataManager:
             Dictionary with equipment statistics
         """
         stats = {
-            'total_equipment': len(self.all_equipment_df) if self.all_equipment_df is not None else 0,
-            'chambers_count': len(self.chambers_df) if self.chambers_df is not None else 0,
-            'electrometers_count': len(self.electrometers_df) if self.electrometers_df is not None else 0,
-            'survey_meters_count': len(self.survey_meters_df) if self.survey_meters_df is not None else 0,
-            'locations_count': len(self.get_unique_locations()),
-            'manufacturers_count': len(self.get_unique_manufacturers()),
+            'total_equipment': len(self._records),
+            'chambers_count': self.indexes['category'].count('Chamber'),
+            'electrometers_count': self.indexes['category'].count('Electrometer'),
+            'survey_meters_count': self.indexes['category'].count('Survey Meter'),
+            'locations_count': len(self.indexes['location']),
+            'manufacturers_count': len(self.indexes['manufacturer']),
         }
         return stats
\ No newline at end of file
@@ -1,10 +1,64 @@
 """
 JSON utilities for handling JSON serialization with custom types like datetime.
+
+Encoding and decoding go through a codec: orjson when it is installed, the
+standard library ``json`` module otherwise (``JSON_CODEC`` selects one
+explicitly). Dates are stored as ISO 8601 strings; they are only turned back
+into datetime objects for the fields a caller declares in ``date_fields``.
+
+``save_json`` replaces files atomically (temporary file, fsync, rename), so a
+crash leaves either the old or the new contents. With write-behind enabled
+(``configure_write_behind``) saves are queued and written by a background
+thread, coalescing rapid saves of the same file.
 """
+import atexit
 import json
 import os
+import stat
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
 
+# Try to import the fast JSON library
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Advisory file locks between processes (not available on Windows)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Serializes appends from the threads of a single worker process
+_append_lock = threading.Lock()
+
+# Mode of newly created files, as open() would create them (read once: the
+# umask can only be read by setting it, which is not thread-safe)
+_umask = os.umask(0)
+os.umask(_umask)
+NEW_FILE_MODE = 0o666 & ~_umask
+
+# Write-behind state: pending saves by path, guarded by _write_behind_lock
+_write_behind = {
+    'enabled': False,
+    'window': 0.5,
+    'max_delay': 2.0,
+    'thread': None,
+}
+_write_behind_lock = threading.Condition()
+_pending_writes = {}
+# Path -> (version, file stat) of the last write-behind flush, see file_stamp
+_flushed_writes = {}
+_write_versions = iter(range(1, 2 ** 63))
+# Only one thread writes queued files at a time, so an older version never
+# replaces a newer one
+_flush_lock = threading.Lock()
+
 class DateTimeEncoder(json.JSONEncoder):
     """JSON encoder that handles datetime objects by converting them to ISO format strings."""
 
@@ -14,61 +68,343 @@ class DateTimeEncoder(json.JSONEncoder):
         # Handle other special types as needed
         return super().default(obj)
 
-class DateTimeDecoder(json.JSONDecoder):
-    """Custom JSON decoder for datetime objects in ISO format"""
-    def __init__(self, *args, **kwargs):
-        json.JSONDecoder.__init__(self, object_hook=self.object_hook, *args, **kwargs)
+def _encode_default(obj):
+    """Encode values JSON has no type for: datetimes as ISO strings, anything else as str()."""
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    return str(obj)
+
+class StdlibCodec:
+    """JSON codec using the standard library ``json`` module."""
+    name = 'json'
+
+    def dumps(self, data, indent=None):
+        """Encode data as UTF-8 JSON bytes."""
+        return json.dumps(data, default=_encode_default, indent=indent).encode('utf-8')
 
-    def object_hook(self, obj):
-        for key, value in obj.items():
-            if isinstance(value, str):
+    def loads(self, text):
+        """Decode JSON bytes or text."""
+        return json.loads(text)
+
+class OrjsonCodec:
+    """JSON codec using orjson (several times faster than the standard library)."""
+    name = 'orjson'
+
+    def dumps(self, data, indent=None):
+        """Encode data as UTF-8 JSON bytes.
+
+        orjson only supports two-space indentation, which is used for any indent.
+        """
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=_encode_default, option=option)
+
+    def loads(self, text):
+        """Decode JSON bytes or text."""
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            # Legacy files may contain NaN/Infinity, which only the stdlib accepts
+            return json.loads(text)
+
+_codecs = {StdlibCodec.name: StdlibCodec}
+if ORJSON_AVAILABLE:
+    _codecs[OrjsonCodec.name] = OrjsonCodec
+
+def set_codec(name=None):
+    """Select the JSON codec.
+
+    Args:
+        name: 'orjson', 'json', or None/'auto' for the fastest one installed
+            (default: JSON_CODEC environment variable)
+
+    Returns:
+        The codec now in use
+    """
+    global codec
+    name = (name or os.environ.get('JSON_CODEC') or 'auto').lower()
+    if name == 'auto':
+        name = OrjsonCodec.name if ORJSON_AVAILABLE else StdlibCodec.name
+    if name not in _codecs:
+        print(f"JSON codec '{name}' is not available, using the standard library")
+        name = StdlibCodec.name
+    codec = _codecs[name]()
+    return codec
+
+def get_codec():
+    """Get the JSON codec in use."""
+    return codec
+
+codec = None
+set_codec()
+
+def decode_dates(data, date_fields):
+    """Convert the declared date fields of a dataset from ISO strings to datetimes.
+
+    Args:
+        data: List of records or dictionary of key -> record
+        date_fields: Field names holding dates
+
+    Returns:
+        The same data, converted in place. Values that are not valid ISO
+        dates are left as they are.
+    """
+    if not date_fields:
+        return data
+
+    records = data.values() if isinstance(data, dict) else data
+    for record in records:
+        if not isinstance(record, dict):
+            continue
+        for field in date_fields:
+            value = record.get(field)
+            if isinstance(value, str) and value:
                 try:
-                    # Try to parse ISO format datetime strings
-                    if 'T' in value and ('+' in value or 'Z' in value or '-' in value[10:]):
-                        obj[key] = datetime.fromisoformat(value.replace('Z', '+00:00'))
-                except (ValueError, TypeError):
-                    # If it's not a datetime string, keep it as is
+                    record[field] = datetime.fromisoformat(value.replace('Z', '+00:00'))
+                except ValueError:
                     pass
-        return obj
+    return data
+
+def _atomic_write(file_path, content):
+    """Replace a file atomically.
+
+    The content goes to a temporary file in the same directory, which is
+    fsync'd and renamed over the target, so readers and crashes only ever see
+    the old or the new contents. The target keeps its permissions; a new file
+    gets the default ones (0666 less the umask).
+
+    Args:
+        file_path: Path to the file to replace
+        content: New file contents (bytes)
+    """
+    directory = os.path.dirname(file_path) or '.'
+    os.makedirs(directory, exist_ok=True)
+
+    # mkstemp creates the file readable by its owner only: keep the mode of
+    # the file being replaced (or the usual mode of a new file) instead
+    try:
+        mode = stat.S_IMODE(os.stat(file_path).st_mode)
+    except OSError:
+        mode = NEW_FILE_MODE
+
+    fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(file_path)}.", suffix='.tmp', dir=directory)
+    try:
+        if hasattr(os, 'fchmod'):
+            os.fchmod(fd, mode)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    # Persist the rename itself
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
 
 def save_json(data, file_path, indent=2):
     """Save data to a JSON file, handling datetime objects.
 
+    The file is replaced atomically. With write-behind enabled the save is
+    queued instead and written by the background flusher.
+
     Args:
         data: Data to save (dict, list, etc.)
         file_path: Path to the JSON file
         indent: Indentation level for pretty printing
     """
     try:
-        # Convert datetime objects to strings to avoid serialization issues
-        data_copy = json_safe_copy(data)
+        # Encoding up front also snapshots the data for a queued write
+        content = codec.dumps(data, indent=indent)
 
-        # Ensure directory exists
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
-
-        with open(file_path, 'w') as f:
-            json.dump(data_copy, f, cls=DateTimeEncoder, indent=indent)
+        if _write_behind['enabled']:
+            _queue_write(content, file_path)
+        else:
+            _atomic_write(file_path, content)
 
         return True
     except Exception as e:
         print(f"Error saving JSON to {file_path}: {e}")
         return False
 
-def load_json(file_path):
-    """Load data from a JSON file using the DateTimeDecoder
+def configure_write_behind(enabled=True, window=0.5, max_delay=2.0):
+    """Turn write-behind mode for save_json on or off.
+
+    Args:
+        enabled: Queue saves and write them from a background thread
+        window: Seconds to wait for further saves of the same file before writing it
+        max_delay: Upper bound in seconds between a save and its write, however
+            often the file keeps being saved
+
+    Disabling write-behind flushes everything still queued.
+    """
+    with _write_behind_lock:
+        _write_behind['window'] = float(window)
+        _write_behind['max_delay'] = max(float(max_delay), float(window))
+        _write_behind['enabled'] = bool(enabled)
+        if enabled and _write_behind['thread'] is None:
+            thread = threading.Thread(target=_flusher_loop, name='json-write-behind', daemon=True)
+            _write_behind['thread'] = thread
+            thread.start()
+        _write_behind_lock.notify_all()
+
+    if not enabled:
+        flush_write_behind()
+
+def _queue_write(content, file_path):
+    """Queue a save for the write-behind flusher, replacing any queued save of the same file."""
+    path = os.path.abspath(file_path)
+    now = time.monotonic()
+    with _write_behind_lock:
+        pending = _pending_writes.get(path)
+        _pending_writes[path] = {
+            'content': content,
+            'version': next(_write_versions),
+            'first_queued': pending['first_queued'] if pending else now,
+            'last_queued': now,
+        }
+        _write_behind_lock.notify_all()
+
+def _write_pending(path, pending):
+    """Write one queued save and drop it from the queue unless a newer one arrived."""
+    with _write_behind_lock:
+        if _pending_writes.get(path) is not pending:
+            # Already written (or superseded) by another flush
+            return True
+    try:
+        _atomic_write(path, pending['content'])
+        stat = os.stat(path)
+    except Exception as e:
+        print(f"Error saving JSON to {path}: {e}")
+        # Leave it queued; it is retried after another window
+        with _write_behind_lock:
+            if _pending_writes.get(path) is pending:
+                pending['first_queued'] = pending['last_queued'] = time.monotonic()
+        return False
+
+    with _write_behind_lock:
+        _flushed_writes[path] = (pending['version'], (stat.st_mtime_ns, stat.st_size, stat.st_ino))
+        if _pending_writes.get(path) is pending:
+            del _pending_writes[path]
+    return True
+
+def _flusher_loop():
+    """Background thread writing queued saves once they are due."""
+    while True:
+        with _write_behind_lock:
+            now = time.monotonic()
+            due = []
+            next_due = None
+            for path, pending in _pending_writes.items():
+                due_at = min(pending['last_queued'] + _write_behind['window'],
+                             pending['first_queued'] + _write_behind['max_delay'])
+                if due_at <= now:
+                    due.append((path, pending))
+                elif next_due is None or due_at < next_due:
+                    next_due = due_at
+            if not due:
+                _write_behind_lock.wait(None if next_due is None else next_due - now)
+                continue
+
+        with _flush_lock:
+            for path, pending in due:
+                _write_pending(path, pending)
+
+def flush_write_behind(file_path=None):
+    """Write queued saves immediately.
+
+    Args:
+        file_path: Only flush this file (default: every queued file)
+
+    Returns:
+        Boolean indicating every flushed write succeeded
+    """
+    with _flush_lock:
+        with _write_behind_lock:
+            if file_path is None:
+                due = list(_pending_writes.items())
+            else:
+                path = os.path.abspath(file_path)
+                due = [(path, _pending_writes[path])] if path in _pending_writes else []
+        return all([_write_pending(path, pending) for path, pending in due])
+
+# Never lose queued saves when the process exits normally
+atexit.register(flush_write_behind)
+
+def _pending_data(file_path):
+    """Get a queued, not yet written save of a file, or None."""
+    with _write_behind_lock:
+        pending = _pending_writes.get(os.path.abspath(file_path))
+        return None if pending is None else pending['content']
+
+def json_file_exists(file_path):
+    """Check whether a JSON file exists or has a queued save."""
+    return _pending_data(file_path) is not None or os.path.exists(file_path)
+
+def file_stamp(file_path):
+    """Get a cheap change marker for a file.
+
+    A queued save, and the file it is later flushed to, share the stamp
+    ``('queued', version)`` so a process does not mistake its own
+    write-behind flush for a change made elsewhere.
+
+    Returns:
+        Tuple identifying the file's current contents, or None if it does not exist
+    """
+    path = os.path.abspath(file_path)
+    with _write_behind_lock:
+        pending = _pending_writes.get(path)
+        if pending is not None:
+            return ('queued', pending['version'])
+        flushed = _flushed_writes.get(path)
+
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    stamp = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    if flushed is not None and flushed[1] == stamp:
+        return ('queued', flushed[0])
+    return stamp
+
+def load_json(file_path, date_fields=None, strict=False):
+    """Load data from a JSON file.
+
+    A save still queued by write-behind is returned instead of the file.
 
     Args:
         file_path: Path to the JSON file
+        date_fields: Record fields to convert from ISO strings to datetime objects
+            (applied to each item of a list, or each value of a dictionary)
+        strict: Raise the error of a file that cannot be read instead of
+            returning an empty structure
 
     Returns:
-        Loaded data with datetime objects properly deserialized,
-        or empty dict/list if file doesn't exist or has errors
+        Loaded data, or empty dict/list if file doesn't exist or has errors
     """
+    pending = _pending_data(file_path)
+    if pending is not None:
+        return decode_dates(codec.loads(pending), date_fields)
+
     if os.path.exists(file_path):
         try:
-            with open(file_path, 'r') as f:
-                return json.load(f, cls=DateTimeDecoder)
+            with open(file_path, 'rb') as f:
+                return decode_dates(codec.loads(f.read()), date_fields)
         except Exception as e:
+            if strict:
+                raise
             print(f"Error loading JSON from {file_path}: {e}")
 
             # Return appropriate empty structure (list or dict)
@@ -81,6 +417,173 @@ def load_json(file_path):
             return {}
     return {}
 
+@contextmanager
+def directory_lock(directory):
+    """Hold an exclusive lock on a directory, shared by every process and thread.
+
+    Used to read, change and rewrite a file without losing a rewrite made by
+    another worker in between. The lock is advisory (flock) and is skipped
+    where fcntl is not available.
+
+    Args:
+        directory: Directory to lock
+    """
+    if fcntl is None:
+        yield
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+def append_jsonl(record, file_path):
+    """Append a single record to a JSON-Lines file.
+
+    The record is written with one ``os.write`` call on a file opened with
+    ``O_APPEND`` and fsync'd before returning, so concurrent workers never
+    interleave partial lines and a crash loses at most the record in flight.
+
+    Args:
+        record: Dictionary to append
+        file_path: Path to the JSON-Lines file
+
+    Returns:
+        Boolean indicating success
+    """
+    return extend_jsonl([record], file_path)
+
+def extend_jsonl(records, file_path):
+    """Append several records to a JSON-Lines file with one write and one fsync.
+
+    Args:
+        records: Dictionaries to append, in order
+        file_path: Path to the JSON-Lines file
+
+    Returns:
+        Boolean indicating success
+    """
+    if not records:
+        return True
+    try:
+        line = b''.join(codec.dumps(record) + b'\n' for record in records)
+
+        # Ensure directory exists
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+        with _append_lock:
+            fd = os.open(file_path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                # Terminate a line torn by an earlier crash so it cannot swallow this record
+                size = os.fstat(fd).st_size
+                if size and os.pread(fd, 1, size - 1) != b'\n':
+                    line = b'\n' + line
+                os.write(fd, line)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+        return True
+    except Exception as e:
+        print(f"Error appending JSON line to {file_path}: {e}")
+        return False
+
+def load_jsonl(file_path, date_fields=None):
+    """Stream records from a JSON-Lines file.
+
+    Blank lines are ignored and a line that cannot be decoded (for example a
+    record torn by a crash mid-append) is skipped with a warning.
+
+    Args:
+        file_path: Path to the JSON-Lines file
+        date_fields: Record fields to convert from ISO strings to datetime objects
+
+    Yields:
+        One dictionary per line, in file order
+    """
+    if not os.path.exists(file_path):
+        return
+
+    with open(file_path, 'rb') as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = codec.loads(line)
+            except ValueError as e:
+                print(f"Skipping unreadable line {line_number} in {file_path}: {e}")
+                continue
+            if date_fields:
+                decode_dates([record], date_fields)
+            yield record
+
+def read_jsonl_from(file_path, offset=0, date_fields=None):
+    """Read the complete lines of a JSON-Lines file from a byte offset.
+
+    A last line without its newline (an append still being written) is left
+    for the next read. Lines that cannot be decoded are skipped as in
+    load_jsonl.
+
+    Args:
+        file_path: Path to the JSON-Lines file
+        offset: Byte offset to start reading at (the end of a previous read)
+        date_fields: Record fields to convert from ISO strings to datetime objects
+
+    Returns:
+        Tuple of (records, offset after the last complete line, file
+        identity as (st_dev, st_ino)); the identity is None if the file does
+        not exist
+    """
+    try:
+        f = open(file_path, 'rb')
+    except FileNotFoundError:
+        return [], 0, None
+
+    with f:
+        info = os.fstat(f.fileno())
+        f.seek(offset)
+        data = f.read()
+    data = data[:data.rfind(b'\n') + 1]
+
+    records = []
+    for line in data.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            records.append(codec.loads(line))
+        except ValueError as e:
+            print(f"Skipping unreadable line in {file_path}: {e}")
+    if date_fields:
+        decode_dates(records, date_fields)
+    return records, offset + len(data), (info.st_dev, info.st_ino)
+
+def save_jsonl(records, file_path):
+    """Rewrite a JSON-Lines file with the given records.
+
+    Only used for compaction (e.g. removing records); normal writes should go
+    through append_jsonl. The file is replaced atomically.
+
+    Args:
+        records: Iterable of dictionaries
+        file_path: Path to the JSON-Lines file
+
+    Returns:
+        Boolean indicating success
+    """
+    try:
+        content = b''.join(codec.dumps(record) + b'\n' for record in records)
+
+        with _append_lock:
+            _atomic_write(file_path, content)
+
+        return True
+    except Exception as e:
+        print(f"Error saving JSON lines to {file_path}: {e}")
+        return False
+
 def json_safe_copy(data):
     """Create a copy of the data that can be safely serialized to JSON.
 
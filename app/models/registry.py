@@ -0,0 +1,113 @@
+"""
+Shared registry of the application's data managers.
+
+Every blueprint used to build its own TicketManager/TransportManager, which
+parsed the same files several times at import and let the copies drift
+apart after writes. The registry owns exactly one instance of each manager,
+creates it on first use and is stored on ``app.extensions``. Views (read
+models joining several managers) are created the same way, from the shared
+managers they join.
+"""
+import threading
+import time
+from werkzeug.local import LocalProxy
+from app.models.json_equipment import JsonEquipmentDataManager
+from app.models.json_checkout import JsonCheckoutManager
+from app.models.standard_values import StandardValuesManager
+from app.models.ticket import TicketManager
+from app.models.transport_request import TransportManager
+from app.models.equipment_view import EquipmentView
+
+# Key under which the registry is stored in app.extensions
+EXTENSION_KEY = 'gearvue_managers'
+
+
+class ManagerRegistry:
+    """Creates and owns one instance of each data manager."""
+
+    # Manager name -> class; every class takes (data_dir, storage=...)
+    FACTORIES = {
+        'equipment': JsonEquipmentDataManager,
+        'checkout': JsonCheckoutManager,
+        'standard_values': StandardValuesManager,
+        'ticket': TicketManager,
+        'transport': TransportManager,
+    }
+
+    # View name -> (class, names of the managers passed to it)
+    VIEWS = {
+        'equipment_view': (EquipmentView, ('equipment', 'checkout', 'ticket', 'transport')),
+    }
+
+    def __init__(self, app=None, data_dir='app/data', storage=None):
+        """Initialize the registry.
+
+        Args:
+            app: Flask application instance
+            data_dir: Directory containing the data files
+            storage: Storage backend shared by all managers
+        """
+        self.data_dir = data_dir
+        self.storage = storage
+        self._managers = {}
+        self._init_seconds = {}
+        self._lock = threading.RLock()
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Register the registry on a Flask application."""
+        self.data_dir = app.config.get('JSON_DATA_DIR', self.data_dir)
+        app.extensions[EXTENSION_KEY] = self
+
+    def get(self, name):
+        """Get a manager or view, creating it on first use.
+
+        Args:
+            name: Manager name from FACTORIES or view name from VIEWS
+
+        Returns:
+            The single shared instance
+        """
+        manager = self._managers.get(name)
+        if manager is not None:
+            return manager
+
+        with self._lock:
+            if name not in self._managers:
+                started = time.perf_counter()
+                if name in self.VIEWS:
+                    view_class, manager_names = self.VIEWS[name]
+                    self._managers[name] = view_class(*(self.get(manager) for manager in manager_names))
+                else:
+                    self._managers[name] = self.FACTORIES[name](self.data_dir, storage=self.storage)
+                self._init_seconds[name] = time.perf_counter() - started
+            return self._managers[name]
+
+    def proxy(self, name):
+        """Get a proxy that resolves to the manager on first attribute access.
+
+        Module-level names such as ``app.ticket_manager`` are proxies, so
+        importing them does not load any data.
+        """
+        return LocalProxy(lambda: self.get(name))
+
+    def stats(self):
+        """Report which managers have been created and how long each took to load.
+
+        Returns:
+            Dictionary mapping manager name to {'loaded': bool, 'init_seconds': float or None}
+        """
+        return {
+            name: {
+                'loaded': name in self._managers,
+                'init_seconds': self._init_seconds.get(name)
+            }
+            for name in list(self.FACTORIES) + list(self.VIEWS)
+        }
+
+
+def get_registry(app):
+    """Get the manager registry registered on a Flask application."""
+    return app.extensions[EXTENSION_KEY]
@@ -0,0 +1,157 @@
+"""
+Expected-return schedule of checked out equipment.
+
+ReturnSchedule keeps the equipment that is checked out with an expected
+return time in a min-heap keyed by that time, so the next return due is
+read in O(1) (amortized), a checkout or return is recorded in O(log n),
+and the equipment due before a time (overdue now, or due in the next
+hours) is found in O(k log k) for k entries due before it, instead of
+scanning and re-parsing every status entry.
+
+A return or a new checkout of the same equipment does not search the heap:
+the old heap entry is only forgotten, and dropped when it reaches the top
+or when the heap is compacted.
+"""
+import heapq
+from datetime import datetime
+from itertools import count
+
+from app.models.history_index import epoch_seconds
+
+# Compact the heap once it holds this many forgotten entries more than live ones
+COMPACT_SLACK = 64
+
+
+def expected_return_time(status):
+    """Expected return of a status entry, if it is checked out with a readable one.
+
+    Args:
+        status: Equipment status dictionary (or None)
+
+    Returns:
+        The expected return as a naive local datetime (like datetime.now()),
+        or None
+    """
+    if not status or status.get("status") != "Checked Out":
+        return None
+    expected_return = status.get("expected_return")
+    if not expected_return:
+        return None
+    if not isinstance(expected_return, datetime):
+        try:
+            expected_return = datetime.fromisoformat(expected_return)
+        except (TypeError, ValueError):
+            return None
+    if expected_return.tzinfo is not None:
+        expected_return = expected_return.astimezone().replace(tzinfo=None)
+    return expected_return
+
+
+class ReturnSchedule:
+    """Checked out equipment in a min-heap keyed by expected return time."""
+
+    def __init__(self):
+        """Initialize an empty schedule."""
+        # Heap of [epoch seconds, sequence, equipment id, expected return]
+        self._heap = []
+        # Equipment id -> its live heap entry
+        self._entries = {}
+        # Tie-breaker: entries due at the same time keep insertion order
+        self._sequence = count()
+
+    def __len__(self):
+        """Number of scheduled returns."""
+        return len(self._entries)
+
+    def __contains__(self, equipment_id):
+        """Whether a return is scheduled for a piece of equipment."""
+        return equipment_id in self._entries
+
+    def rebuild(self, equipment_status):
+        """Schedule the returns of a whole status dataset.
+
+        Args:
+            equipment_status: Mapping of equipment id -> status dictionary
+        """
+        self._entries = {}
+        for equipment_id, status in equipment_status.items():
+            due = expected_return_time(status)
+            if due is not None:
+                self._entries[equipment_id] = [epoch_seconds(due), next(self._sequence), equipment_id, due]
+        self._heap = list(self._entries.values())
+        heapq.heapify(self._heap)
+
+    def update(self, equipment_id, status):
+        """Schedule or forget one piece of equipment after its status changed.
+
+        Args:
+            equipment_id: ID of the equipment
+            status: Its new status dictionary (None if it was removed)
+        """
+        due = expected_return_time(status)
+        current = self._entries.get(equipment_id)
+        if current is not None and current[3] == due:
+            return
+        self._entries.pop(equipment_id, None)
+        if due is not None:
+            entry = [epoch_seconds(due), next(self._sequence), equipment_id, due]
+            self._entries[equipment_id] = entry
+            heapq.heappush(self._heap, entry)
+        if len(self._heap) > 2 * len(self._entries) + COMPACT_SLACK:
+            self._heap = list(self._entries.values())
+            heapq.heapify(self._heap)
+
+    def _is_live(self, entry):
+        """Whether a heap entry is still the scheduled return of its equipment."""
+        return self._entries.get(entry[2]) is entry
+
+    def next_due(self):
+        """The scheduled return due first.
+
+        Returns:
+            Tuple of (expected return datetime, equipment id), or None if
+            nothing is scheduled
+        """
+        heap = self._heap
+        while heap and not self._is_live(heap[0]):
+            heapq.heappop(heap)
+        if not heap:
+            return None
+        return heap[0][3], heap[0][2]
+
+    def due_between(self, since=None, until=None):
+        """Get the scheduled returns due in a time range.
+
+        Only the heap entries due before the end of the range (and their
+        direct children) are visited: a subtree whose root is not due
+        before it holds nothing that is.
+
+        Args:
+            since: Earliest expected return (datetime, inclusive; None for no bound)
+            until: End of the range (datetime, exclusive; None for no bound)
+
+        Returns:
+            List of (expected return datetime, equipment id) tuples, the
+            one due first first
+        """
+        heap = self._heap
+        entries = self._entries
+        size = len(heap)
+        start = float('-inf') if since is None else epoch_seconds(since)
+        end = float('inf') if until is None else epoch_seconds(until)
+        found = []
+        pending = [0] if heap else []
+        while pending:
+            position = pending.pop()
+            entry = heap[position]
+            if entry[0] >= end:
+                continue
+            if entry[0] >= start and entries.get(entry[2]) is entry:
+                found.append(entry)
+            child = 2 * position + 1
+            if child < size:
+                pending.append(child)
+                if child + 1 < size:
+                    pending.append(child + 1)
+        found.sort()
+        return [(entry[3], entry[2]) for entry in found]
@@ -2,21 +2,21 @@
 Standard values manager for equipment fields
 Manages standard values for dropdown lists to ensure consistency
 """
-import os
-import json
+from app.models.storage import get_storage_backend, TrackedStorage, track_manager
 
 
 class StandardValuesManager:
     """Manages standard values for equipment fields."""
     
-    def __init__(self, data_dir='app/data'):
+    def __init__(self, data_dir='app/data', storage=None):
         """Initialize the standard values manager.
         
         Args:
             data_dir: Directory containing the JSON data files
+            storage: Storage backend (default: the backend configured for data_dir)
         """
         self.data_dir = data_dir
-        self.values_file = os.path.join(data_dir, 'standard_values.json')
+        self.storage = TrackedStorage(storage or get_storage_backend(data_dir))
         
         # Initialize default values
         self.categories = []
@@ -26,20 +26,27 @@ class StandardValuesManager:
         
         # Load data
         self.load_data()
+        
+        # Pick up changes made by other workers at the start of each request
+        track_manager(self)
+    
+    def refresh(self):
+        """Reload standard values if another process has changed them since they were last read."""
+        if self.storage.changed('standard_values'):
+            self.load_data()
     
     def load_data(self):
         """Load standard values from JSON file."""
         try:
-            # Check if file exists
-            if not os.path.exists(self.values_file):
-                print(f"Warning: Standard values file not found at {self.values_file}")
+            # Check if values have been stored yet
+            if not self.storage.exists('standard_values'):
+                print("Warning: Standard values not found in storage")
                 # Initialize with default values
                 self._create_default_values()
                 return
             
-            # Load values from file
-            with open(self.values_file, 'r') as f:
-                values_data = json.load(f)
+            # Load values from storage
+            values_data = self.storage.load('standard_values')
             
             # Set values
             self.categories = values_data.get('categories', [])
@@ -78,10 +85,10 @@ class StandardValuesManager:
                 'locations': self.locations
             }
             
-            with open(self.values_file, 'w') as f:
-                json.dump(values_data, f, indent=2)
+            if not self.storage.save('standard_values', values_data):
+                return False
             
-            print(f"Saved standard values to {self.values_file}")
+            print("Saved standard values")
             return True
             
         except Exception as e:
@@ -0,0 +1,964 @@
+"""
+Storage backends for the data managers.
+
+The managers keep their working data in memory and persist it through a
+storage backend. Each dataset has one of three shapes:
+
+- ``records``: an ordered list of dictionaries keyed by an id field
+- ``mapping``: a dictionary of key -> value
+- ``log``: an append-only list of event dictionaries
+
+``JsonStorageBackend`` keeps the historical one-file-per-dataset layout in the
+data directory. ``SqliteStorageBackend`` stores every dataset in its own table
+of a single SQLite database (WAL mode) with indexed lookup columns, so single
+records can be written without rewriting the whole dataset.
+
+Every gunicorn worker holds its own copy of the data, so each backend also
+exposes a cheap ``stamp()`` per dataset (file mtime/size/inode for JSON, a
+generation counter for SQLite). Managers wrap their backend in
+``TrackedStorage`` and reload a dataset only when its stamp no longer
+matches the one they last read or wrote.
+
+Multi-step mutations run inside a ``UnitOfWork`` (one per Flask request):
+writes are queued, coalesced per dataset and flushed together at the end,
+so a dataset touched several times is still written only once.
+"""
+import json
+import os
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+from datetime import datetime
+from app.models.json_utils import (
+    save_json, load_json, append_jsonl, extend_jsonl, load_jsonl, save_jsonl,
+    json_safe_copy, json_file_exists, file_stamp, get_codec, decode_dates, directory_lock,
+    read_jsonl_from
+)
+
+# Dataset layout: file name for the JSON backend, shape, id field for
+# ``records`` datasets, the indexed SQLite columns (column -> record field,
+# None meaning the value itself) and the fields loaded as datetime objects
+# (every other date stays an ISO string).
+DATASETS = {
+    'equipment': {
+        'file': 'equipment.json',
+        'kind': 'records',
+        'key': 'id',
+        'columns': {'category': 'category', 'manufacturer': 'manufacturer', 'location': 'location'},
+    },
+    'equipment_status': {
+        'file': 'equipment_status.json',
+        'kind': 'mapping',
+        'columns': {'status': 'status', 'timestamp': 'last_updated'},
+    },
+    'checkout_history': {
+        'file': 'checkout_history.jsonl',
+        'legacy_file': 'checkout_history.json',
+        'kind': 'log',
+        'columns': {'equipment_id': 'equipment_id', 'user': 'user', 'status': 'new_status', 'timestamp': 'timestamp'},
+    },
+    'users': {
+        'file': 'users.json',
+        'kind': 'mapping',
+        'columns': {'role': 'role'},
+    },
+    'tickets': {
+        'file': 'tickets.json',
+        'kind': 'records',
+        'key': 'id',
+        'columns': {'equipment_id': 'equipment_id', 'status': 'status', 'timestamp': 'created_at'},
+        'date_fields': ('created_at', 'updated_at', 'resolved_at', 'closed_at'),
+    },
+    'equipment_conditions': {
+        'file': 'equipment_conditions.json',
+        'kind': 'mapping',
+        'columns': {'condition': None},
+    },
+    'transport_requests': {
+        'file': 'transport_requests.json',
+        'kind': 'records',
+        'key': 'id',
+        'columns': {'equipment_id': 'equipment_id', 'status': 'status', 'timestamp': 'requested_date'},
+        'date_fields': ('requested_date', 'scheduled_date', 'completion_date', 'created_at', 'updated_at'),
+    },
+    'standard_values': {
+        'file': 'standard_values.json',
+        'kind': 'mapping',
+        'columns': {},
+    },
+    'kits': {
+        'file': 'kits.json',
+        'kind': 'mapping',
+        'columns': {},
+    },
+}
+
+# Backend names accepted by get_storage_backend / the STORAGE_BACKEND setting
+BACKEND_JSON = 'json'
+BACKEND_SQLITE = 'sqlite'
+
+
+def _empty(name):
+    """Return an empty container of the right shape for a dataset."""
+    return {} if DATASETS[name]['kind'] == 'mapping' else []
+
+
+class JsonStorageBackend:
+    """Stores each dataset in its own JSON (or JSON Lines) file."""
+
+    def __init__(self, data_dir):
+        """Initialize the JSON backend.
+
+        Args:
+            data_dir: Directory containing the JSON data files
+        """
+        self.data_dir = data_dir
+        os.makedirs(self.data_dir, exist_ok=True)
+
+    def path(self, name):
+        """Get the file path of a dataset."""
+        return os.path.join(self.data_dir, DATASETS[name]['file'])
+
+    def exists(self, name):
+        """Check whether a dataset has ever been written."""
+        legacy_file = DATASETS[name].get('legacy_file')
+        if legacy_file and os.path.exists(os.path.join(self.data_dir, legacy_file)):
+            return True
+        return json_file_exists(self.path(name))
+
+    def stamp(self, name):
+        """Get a cheap change marker for a dataset.
+
+        Returns:
+            Tuple of (mtime_ns, size, inode) of the dataset file (or of its
+            queued write-behind save), or None if it does not exist
+        """
+        return file_stamp(self.path(name))
+
+    def load(self, name):
+        """Load a whole dataset.
+
+        Returns:
+            List for ``records``/``log`` datasets, dictionary for ``mapping``
+        """
+        date_fields = DATASETS[name].get('date_fields')
+        if DATASETS[name]['kind'] == 'log':
+            self._migrate_legacy_log(name)
+            return list(load_jsonl(self.path(name), date_fields))
+
+        data = load_json(self.path(name), date_fields)
+        if not data:
+            return _empty(name)
+        return data
+
+    def save(self, name, data):
+        """Replace a whole dataset."""
+        if DATASETS[name]['kind'] == 'log':
+            return save_jsonl(data, self.path(name))
+        return save_json(data, self.path(name))
+
+    def put(self, name, key, value, snapshot):
+        """Insert or replace one record (see ``apply``)."""
+        return self.apply(name, {key: ('put', value)}, snapshot)
+
+    def delete(self, name, key, snapshot):
+        """Remove one record (see ``apply``)."""
+        return self.apply(name, {key: ('delete', None)}, snapshot)
+
+    def read_log(self, name, position=None):
+        """Read a ``log`` dataset, or the events appended to it since a position.
+
+        Args:
+            name: Dataset name
+            position: Position returned by an earlier read_log/log_position
+                (None to read the whole log)
+
+        Returns:
+            Tuple of (records, new position), or None if the log was
+            rewritten since ``position`` (read it whole instead)
+        """
+        if position is None:
+            self._migrate_legacy_log(name)
+            identity, offset = None, 0
+        else:
+            identity, offset = position
+        records, end, current = read_jsonl_from(self.path(name), offset, DATASETS[name].get('date_fields'))
+        if position is not None and (current != identity or end < offset):
+            # Replaced (compacted) or truncated
+            return None
+        return records, (current, end)
+
+    def log_position(self, name):
+        """Get the position of the end of a ``log`` dataset (see read_log)."""
+        try:
+            info = os.stat(self.path(name))
+        except FileNotFoundError:
+            return None, 0
+        return (info.st_dev, info.st_ino), info.st_size
+
+    def append(self, name, record):
+        """Append one event to a ``log`` dataset."""
+        return append_jsonl(record, self.path(name))
+
+    def extend(self, name, records):
+        """Append several events to a ``log`` dataset with one file write."""
+        return extend_jsonl(records, self.path(name))
+
+    def apply(self, name, changes, snapshot):
+        """Write several put/delete changes of one dataset.
+
+        Args:
+            name: Dataset name
+            changes: Dictionary of key -> ('put', value) or ('delete', None)
+            snapshot: Callable returning the full dataset (not used: JSON
+                files are changed from their current contents)
+
+        JSON files cannot be updated in place, so the file is re-read, changed
+        and rewritten while the data directory is locked. Records written by
+        another worker since this process last read the file are kept, and
+        every change lands in one rewrite.
+        """
+        key_field = DATASETS[name].get('key')
+        with directory_lock(self.data_dir):
+            data = load_json(self.path(name), strict=True) or _empty(name)
+            if key_field is None:
+                for key, (action, value) in changes.items():
+                    if action == 'put':
+                        data[key] = value
+                    else:
+                        data.pop(key, None)
+            else:
+                positions = {record.get(key_field): i for i, record in enumerate(data)}
+                for key, (action, value) in changes.items():
+                    if action == 'put':
+                        if key in positions:
+                            data[positions[key]] = value
+                        else:
+                            positions[key] = len(data)
+                            data.append(value)
+                    elif key in positions:
+                        data[positions.pop(key)] = None
+                data = [record for record in data if record is not None]
+            return self.save(name, data)
+
+    @contextmanager
+    def batch(self):
+        """Group writes. Files cannot share a transaction, so this is a no-op."""
+        yield
+
+    def _migrate_legacy_log(self, name):
+        """Convert a legacy JSON array log file into JSON Lines.
+
+        Runs once: after a successful conversion the legacy file is renamed
+        with a ``.migrated`` suffix so it is never imported twice.
+        """
+        legacy_file = DATASETS[name].get('legacy_file')
+        if not legacy_file:
+            return
+
+        legacy_path = os.path.join(self.data_dir, legacy_file)
+        if os.path.exists(self.path(name)) or not os.path.exists(legacy_path):
+            return
+
+        try:
+            with open(legacy_path, 'r') as f:
+                records = json.load(f)
+        except Exception as e:
+            print(f"Error reading legacy {name} for migration: {e}")
+            return
+
+        if not isinstance(records, list):
+            records = []
+
+        if save_jsonl(records, self.path(name)):
+            os.replace(legacy_path, f"{legacy_path}.migrated")
+            print(f"Migrated {len(records)} {name} records to {self.path(name)}")
+
+
+class SqliteStorageBackend:
+    """Stores every dataset in a table of one SQLite database.
+
+    Each table holds the JSON-encoded record in a ``data`` column next to the
+    indexed lookup columns declared in DATASETS. The database runs in WAL mode
+    so readers in other gunicorn workers are not blocked by a writer. Existing
+    JSON files in the data directory are imported the first time a dataset is
+    read.
+    """
+
+    def __init__(self, data_dir, database_path=None):
+        """Initialize the SQLite backend.
+
+        Args:
+            data_dir: Directory containing the JSON data files to import from
+            database_path: Path to the SQLite database (default: data_dir/gearvue.sqlite3)
+        """
+        self.data_dir = data_dir
+        self.database_path = database_path or os.path.join(data_dir, 'gearvue.sqlite3')
+        os.makedirs(os.path.dirname(os.path.abspath(self.database_path)), exist_ok=True)
+
+        # One connection per thread (gunicorn runs several threads per worker)
+        self._local = threading.local()
+        self._import_lock = threading.Lock()
+
+        self._create_schema()
+
+    def _connection(self):
+        """Get the calling thread's connection, opening it if needed."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.database_path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _in_batch(self):
+        """Check whether the calling thread is inside batch()."""
+        return getattr(self._local, 'batch', False)
+
+    @contextmanager
+    def _transaction(self):
+        """Open a write transaction, or join the batch() running on this thread."""
+        conn = self._connection()
+        if self._in_batch():
+            yield conn
+        else:
+            with conn:
+                yield conn
+
+    @contextmanager
+    def batch(self):
+        """Run every write made on this thread inside one transaction.
+
+        A failing write raises instead of being reported and skipped, and
+        rolls back everything written in the batch.
+        """
+        if self._in_batch():
+            yield
+            return
+
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        self._local.batch = True
+        try:
+            yield
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self._local.batch = False
+
+    def _create_schema(self):
+        """Create the dataset tables and their indexes."""
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS _imports (dataset TEXT PRIMARY KEY, imported_at TEXT)'
+            )
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS _generations (dataset TEXT PRIMARY KEY, generation INTEGER NOT NULL)'
+            )
+            for name, spec in DATASETS.items():
+                columns = ''.join(f', "{column}" TEXT' for column in spec['columns'])
+                if spec['kind'] == 'log':
+                    conn.execute(
+                        f'CREATE TABLE IF NOT EXISTS "{name}" '
+                        f'(seq INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT{columns}, data TEXT NOT NULL)'
+                    )
+                else:
+                    conn.execute(
+                        f'CREATE TABLE IF NOT EXISTS "{name}" '
+                        f'(key TEXT PRIMARY KEY{columns}, data TEXT NOT NULL)'
+                    )
+                for column in spec['columns']:
+                    conn.execute(
+                        f'CREATE INDEX IF NOT EXISTS "idx_{name}_{column}" ON "{name}" ("{column}")'
+                    )
+
+    def _row(self, name, key, value):
+        """Build the column values for one record."""
+        values = [key]
+        for field in DATASETS[name]['columns'].values():
+            column_value = value if field is None else (value.get(field) if isinstance(value, dict) else None)
+            column_value = json_safe_copy(column_value)
+            values.append(None if column_value is None else str(column_value))
+        values.append(get_codec().dumps(value).decode('utf-8'))
+        return values
+
+    def _record_key(self, name, record):
+        """Get the key of a ``records``/``log`` dataset entry."""
+        key_field = DATASETS[name].get('key', 'id')
+        if isinstance(record, dict):
+            return record.get(key_field)
+        return None
+
+    def _bump_generation(self, conn, name):
+        """Increment a dataset's generation inside an open transaction."""
+        conn.execute(
+            'INSERT INTO _generations (dataset, generation) VALUES (?, 1) '
+            'ON CONFLICT(dataset) DO UPDATE SET generation = generation + 1',
+            (name,)
+        )
+
+    def _ensure_imported(self, name):
+        """Import the dataset's JSON file the first time it is used."""
+        conn = self._connection()
+        if conn.execute('SELECT 1 FROM _imports WHERE dataset = ?', (name,)).fetchone():
+            return
+
+        with self._import_lock:
+            if conn.execute('SELECT 1 FROM _imports WHERE dataset = ?', (name,)).fetchone():
+                return
+
+            json_backend = JsonStorageBackend(self.data_dir)
+            data = json_backend.load(name) if json_backend.exists(name) else _empty(name)
+            with self._transaction() as conn:
+                self._replace(conn, name, data)
+                conn.execute(
+                    'INSERT OR REPLACE INTO _imports (dataset, imported_at) VALUES (?, ?)',
+                    (name, datetime.now().isoformat())
+                )
+            if data:
+                print(f"Imported {len(data)} {name} records into {self.database_path}")
+
+    def _replace(self, conn, name, data):
+        """Replace the contents of a dataset table inside an open transaction."""
+        spec = DATASETS[name]
+        self._bump_generation(conn, name)
+        conn.execute(f'DELETE FROM "{name}"')
+        if spec['kind'] == 'mapping':
+            rows = [self._row(name, key, value) for key, value in data.items()]
+        else:
+            rows = [self._row(name, self._record_key(name, record), record) for record in data]
+        if rows:
+            placeholders = ', '.join('?' * len(rows[0]))
+            columns = ', '.join(['key'] + [f'"{c}"' for c in spec['columns']] + ['data'])
+            conn.executemany(f'INSERT INTO "{name}" ({columns}) VALUES ({placeholders})', rows)
+
+    def stamp(self, name):
+        """Get a cheap change marker for a dataset.
+
+        Returns:
+            The dataset's generation counter, incremented by every write
+        """
+        row = self._connection().execute(
+            'SELECT generation FROM _generations WHERE dataset = ?', (name,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def exists(self, name):
+        """Check whether a dataset holds any data."""
+        self._ensure_imported(name)
+        return self._connection().execute(f'SELECT 1 FROM "{name}" LIMIT 1').fetchone() is not None
+
+    def load(self, name):
+        """Load a whole dataset in insertion order."""
+        self._ensure_imported(name)
+        spec = DATASETS[name]
+        order = 'seq' if spec['kind'] == 'log' else 'rowid'
+        rows = self._connection().execute(f'SELECT key, data FROM "{name}" ORDER BY {order}').fetchall()
+        codec = get_codec()
+        if spec['kind'] == 'mapping':
+            data = {key: codec.loads(data) for key, data in rows}
+        else:
+            data = [codec.loads(data) for _, data in rows]
+        return decode_dates(data, spec.get('date_fields'))
+
+    def read_log(self, name, position=None):
+        """Read a ``log`` dataset, or the events appended to it since a position.
+
+        Args:
+            name: Dataset name
+            position: Position returned by an earlier read_log/log_position
+                (None to read the whole log)
+
+        Returns:
+            Tuple of (records, new position), or None if the log was
+            rewritten since ``position`` (read it whole instead)
+        """
+        self._ensure_imported(name)
+        conn = self._connection()
+        first, last = position if position is not None else (None, 0)
+        # One read transaction, so the check and the rows agree
+        in_batch = self._in_batch()
+        if not in_batch:
+            conn.execute('BEGIN')
+        try:
+            if first is not None and conn.execute(f'SELECT 1 FROM "{name}" WHERE seq = ?', (first,)).fetchone() is None:
+                # A rewrite deletes every row; new rows get new sequence numbers
+                return None
+            rows = conn.execute(f'SELECT seq, data FROM "{name}" WHERE seq > ? ORDER BY seq', (last,)).fetchall()
+        finally:
+            if not in_batch:
+                conn.commit()
+        codec = get_codec()
+        records = decode_dates([codec.loads(data) for _, data in rows], DATASETS[name].get('date_fields'))
+        if rows:
+            if first is None:
+                first = rows[0][0]
+            last = rows[-1][0]
+        return records, (first, last)
+
+    def log_position(self, name):
+        """Get the position of the end of a ``log`` dataset (see read_log)."""
+        self._ensure_imported(name)
+        first, last = self._connection().execute(f'SELECT MIN(seq), MAX(seq) FROM "{name}"').fetchone()
+        return first, last or 0
+
+    def save(self, name, data):
+        """Replace a whole dataset."""
+        try:
+            self._ensure_imported(name)
+            with self._transaction() as conn:
+                self._replace(conn, name, data)
+            return True
+        except sqlite3.Error as e:
+            if self._in_batch():
+                raise
+            print(f"Error saving {name} to {self.database_path}: {e}")
+            return False
+
+    def put(self, name, key, value, snapshot=None):
+        """Insert or replace one record without touching the others."""
+        try:
+            self._ensure_imported(name)
+            spec = DATASETS[name]
+            row = self._row(name, key, value)
+            columns = ['key'] + [f'"{c}"' for c in spec['columns']] + ['data']
+            updates = ', '.join(f'{c} = excluded.{c}' for c in columns[1:])
+            with self._transaction() as conn:
+                self._bump_generation(conn, name)
+                # Upsert keeps the original rowid, preserving insertion order
+                conn.execute(
+                    f'INSERT INTO "{name}" ({", ".join(columns)}) VALUES ({", ".join("?" * len(row))}) '
+                    f'ON CONFLICT(key) DO UPDATE SET {updates}',
+                    row
+                )
+            return True
+        except sqlite3.Error as e:
+            if self._in_batch():
+                raise
+            print(f"Error saving {name} record {key} to {self.database_path}: {e}")
+            return False
+
+    def delete(self, name, key, snapshot=None):
+        """Remove one record."""
+        try:
+            self._ensure_imported(name)
+            with self._transaction() as conn:
+                self._bump_generation(conn, name)
+                conn.execute(f'DELETE FROM "{name}" WHERE key = ?', (key,))
+            return True
+        except sqlite3.Error as e:
+            if self._in_batch():
+                raise
+            print(f"Error deleting {name} record {key} from {self.database_path}: {e}")
+            return False
+
+    def append(self, name, record):
+        """Append one event to a ``log`` dataset."""
+        try:
+            self._ensure_imported(name)
+            spec = DATASETS[name]
+            row = self._row(name, self._record_key(name, record), record)
+            columns = ', '.join(['key'] + [f'"{c}"' for c in spec['columns']] + ['data'])
+            with self._transaction() as conn:
+                self._bump_generation(conn, name)
+                conn.execute(f'INSERT INTO "{name}" ({columns}) VALUES ({", ".join("?" * len(row))})', row)
+            return True
+        except sqlite3.Error as e:
+            if self._in_batch():
+                raise
+            print(f"Error appending {name} record to {self.database_path}: {e}")
+            return False
+
+    def extend(self, name, records):
+        """Append several events to a ``log`` dataset in one transaction."""
+        if not records:
+            return True
+        try:
+            self._ensure_imported(name)
+            spec = DATASETS[name]
+            rows = [self._row(name, self._record_key(name, record), record) for record in records]
+            columns = ', '.join(['key'] + [f'"{c}"' for c in spec['columns']] + ['data'])
+            with self._transaction() as conn:
+                self._bump_generation(conn, name)
+                conn.executemany(f'INSERT INTO "{name}" ({columns}) VALUES ({", ".join("?" * len(rows[0]))})', rows)
+            return True
+        except sqlite3.Error as e:
+            if self._in_batch():
+                raise
+            print(f"Error appending {name} records to {self.database_path}: {e}")
+            return False
+
+    def apply(self, name, changes, snapshot=None):
+        """Write several put/delete changes of one dataset in one transaction.
+
+        Args:
+            name: Dataset name
+            changes: Dictionary of key -> ('put', value) or ('delete', None)
+            snapshot: Unused; accepted for compatibility with the JSON backend
+        """
+        with self.batch():
+            for key, (op, value) in changes.items():
+                if op == 'put':
+                    self.put(name, key, value)
+                else:
+                    self.delete(name, key)
+        return True
+
+
+# Stamp recorded for a dataset whose flush failed, so it is reloaded
+_STALE = object()
+
+
+class TrackedStorage:
+    """Per-manager view of a storage backend that remembers dataset stamps.
+
+    The stamp of a dataset is recorded whenever the manager loads it and
+    after the manager's own writes, so ``changed()`` only reports writes made
+    by other processes. If another process wrote first, the stamp is left
+    alone so the next ``changed()`` still triggers a reload.
+
+    While a unit of work is active on the calling thread, writes are queued
+    on it instead of being performed immediately.
+
+    Listeners registered with ``add_listener`` are told about every load and
+    write the manager makes, so read models built over several managers can
+    follow their changes.
+    """
+
+    def __init__(self, backend):
+        """Wrap a storage backend.
+
+        Args:
+            backend: JsonStorageBackend or SqliteStorageBackend instance
+        """
+        self.backend = backend
+        self.data_dir = backend.data_dir
+        self._stamps = {}
+        # ``log`` dataset -> position up to which it has been read or written
+        self._log_positions = {}
+        self._listeners = []
+
+    def add_listener(self, listener):
+        """Call ``listener(name, key)`` after each load or write of a dataset.
+
+        ``key`` is the record written by a put or delete, or None when the
+        whole dataset was loaded or saved.
+        """
+        self._listeners.append(listener)
+
+    def _notify(self, name, key=None):
+        """Tell the listeners that a dataset (or one of its records) changed."""
+        for listener in self._listeners:
+            listener(name, key)
+
+    def changed(self, name):
+        """Check whether a dataset was changed elsewhere since it was last read or written."""
+        return name in self._stamps and self.backend.stamp(name) != self._stamps[name]
+
+    def _write(self, name, write):
+        """Run a write and record the new stamp if nobody else wrote in between."""
+        up_to_date = self.backend.stamp(name) == self._stamps.get(name)
+        result = write()
+        if up_to_date:
+            self._stamps[name] = self.backend.stamp(name)
+        if name in self._log_positions:
+            # Past this write, unless events written elsewhere were not read yet
+            self._log_positions[name] = self.backend.log_position(name) if up_to_date else None
+        return result
+
+    def mark_stale(self, name):
+        """Force the next changed() check of a dataset to report a change."""
+        self._stamps[name] = _STALE
+
+    def stamp(self, name):
+        """Get the backend's current stamp for a dataset."""
+        return self.backend.stamp(name)
+
+    def _flush_pending(self, name):
+        """Write out queued changes to a dataset before it is read."""
+        uow = current_unit_of_work()
+        if uow is not None:
+            uow.flush(self.backend, name)
+
+    def exists(self, name):
+        """Check whether a dataset has been stored."""
+        self._flush_pending(name)
+        exists = self.backend.exists(name)
+        if not exists:
+            # Remember the missing dataset so its creation elsewhere is noticed
+            self._stamps.setdefault(name, self.backend.stamp(name))
+        return exists
+
+    def load(self, name):
+        """Load a whole dataset and remember its stamp."""
+        self._flush_pending(name)
+        stamp = self.backend.stamp(name)
+        if DATASETS[name]['kind'] == 'log':
+            data, self._log_positions[name] = self.backend.read_log(name)
+        else:
+            data = self.backend.load(name)
+        # Loading may have migrated or imported the dataset, changing its stamp
+        self._stamps[name] = stamp if stamp is not None else self.backend.stamp(name)
+        self._notify(name)
+        return data
+
+    def load_appended(self, name):
+        """Read the events appended to a ``log`` dataset since it was last read.
+
+        Returns:
+            List of the new events, or None if the log has to be loaded whole
+            (it was rewritten, or this process wrote to it before reading what
+            was appended elsewhere)
+        """
+        self._flush_pending(name)
+        position = self._log_positions.get(name)
+        if position is None:
+            return None
+        stamp = self.backend.stamp(name)
+        result = self.backend.read_log(name, position)
+        if result is None:
+            return None
+        records, self._log_positions[name] = result
+        self._stamps[name] = stamp
+        return records
+
+    def save(self, name, data):
+        """Replace a whole dataset."""
+        self._notify(name)
+        uow = current_unit_of_work()
+        if uow is not None:
+            return uow.defer_save(self, name, data)
+        return self._write(name, lambda: self.backend.save(name, data))
+
+    def put(self, name, key, value, snapshot=None):
+        """Insert or replace one record."""
+        self._notify(name, key)
+        uow = current_unit_of_work()
+        if uow is not None:
+            return uow.defer_change(self, name, key, ('put', value), snapshot)
+        return self._write(name, lambda: self.backend.put(name, key, value, snapshot))
+
+    def delete(self, name, key, snapshot=None):
+        """Remove one record."""
+        self._notify(name, key)
+        uow = current_unit_of_work()
+        if uow is not None:
+            return uow.defer_change(self, name, key, ('delete', None), snapshot)
+        return self._write(name, lambda: self.backend.delete(name, key, snapshot))
+
+    def append(self, name, record):
+        """Append one event to a ``log`` dataset."""
+        uow = current_unit_of_work()
+        if uow is not None:
+            return uow.defer_append(self, name, record)
+        return self._write(name, lambda: self.backend.append(name, record))
+
+
+class UnitOfWork:
+    """Collects the writes of a multi-step mutation and flushes each dataset once.
+
+    Writes are coalesced per dataset: any number of put/delete calls become
+    one ``apply()`` (a single file rewrite for JSON), appended events one
+    ``extend()`` (a single write and fsync of the log), and a full ``save()``
+    absorbs the record changes made after it. ``commit()`` flushes every
+    dataset of a backend inside one ``batch()``, which on SQLite is a single
+    transaction. If a flush fails, the affected datasets are marked stale so
+    the managers reload them from storage on the next refresh.
+    """
+
+    def __init__(self):
+        """Initialize an empty unit of work."""
+        # (backend id, dataset) -> pending writes, in first-touched order
+        self._pending = {}
+
+    def _entry(self, tracked, name):
+        """Get the pending writes of a dataset, creating the entry if needed."""
+        key = (id(tracked.backend), name)
+        if key not in self._pending:
+            self._pending[key] = {
+                'tracked': tracked,
+                'name': name,
+                'data': None,
+                'changes': {},
+                'snapshot': None,
+                'appends': [],
+            }
+        return self._pending[key]
+
+    def defer_save(self, tracked, name, data):
+        """Queue a full save; it supersedes the record changes queued before it."""
+        entry = self._entry(tracked, name)
+        entry['data'] = data
+        entry['changes'].clear()
+        entry['appends'] = []
+        return True
+
+    def defer_change(self, tracked, name, key, change, snapshot):
+        """Queue a put or delete of one record; the last change per key wins."""
+        entry = self._entry(tracked, name)
+        if entry['data'] is not None and snapshot is not None:
+            # A full save is pending anyway: save the latest full dataset instead
+            entry['data'] = snapshot
+            return True
+        entry['changes'].pop(key, None)
+        entry['changes'][key] = change
+        entry['snapshot'] = snapshot
+        return True
+
+    def defer_append(self, tracked, name, record):
+        """Queue an event for a ``log`` dataset."""
+        entry = self._entry(tracked, name)
+        entry['appends'].append(record)
+        return True
+
+    def _flush_entry(self, entry):
+        """Write out the pending writes of one dataset."""
+        tracked, name = entry['tracked'], entry['name']
+        backend = tracked.backend
+
+        data = entry['data']
+        if data is not None:
+            data = data() if callable(data) else data
+            tracked._write(name, lambda: backend.save(name, data))
+        if entry['changes']:
+            tracked._write(name, lambda: backend.apply(name, entry['changes'], entry['snapshot']))
+        # Events already part of a pending full save of the log are written with it
+        saved = set(map(id, data)) if data is not None else set()
+        appends = [record for record in entry['appends'] if id(record) not in saved]
+        if appends:
+            tracked._write(name, lambda: backend.extend(name, appends))
+
+    def _flush(self, keys):
+        """Flush the given pending datasets, one batch per backend."""
+        entries = [self._pending.pop(key) for key in keys if key in self._pending]
+        if not entries:
+            return True
+
+        backends = {}
+        for entry in entries:
+            backends.setdefault(id(entry['tracked'].backend), (entry['tracked'].backend, []))[1].append(entry)
+
+        success = True
+        for backend, backend_entries in backends.values():
+            try:
+                with backend.batch():
+                    for entry in backend_entries:
+                        self._flush_entry(entry)
+            except Exception as e:
+                print(f"Error flushing {', '.join(entry['name'] for entry in backend_entries)}: {e}")
+                for entry in backend_entries:
+                    entry['tracked'].mark_stale(entry['name'])
+                success = False
+        return success
+
+    def flush(self, backend, name):
+        """Write out the pending writes of one dataset now (before it is read)."""
+        return self._flush([(id(backend), name)])
+
+    def commit(self):
+        """Write out every pending dataset.
+
+        Returns:
+            True if everything was written, False if any backend failed
+        """
+        return self._flush(list(self._pending))
+
+
+# Unit of work active on each thread (one per Flask request)
+_local_uow = threading.local()
+
+
+def current_unit_of_work():
+    """Get the unit of work active on the calling thread, if any."""
+    return getattr(_local_uow, 'uow', None)
+
+
+def begin_unit_of_work():
+    """Start queueing writes on the calling thread (joins an active unit of work)."""
+    uow = current_unit_of_work()
+    if uow is None:
+        uow = UnitOfWork()
+        _local_uow.uow = uow
+    return uow
+
+
+def end_unit_of_work():
+    """Stop queueing writes on the calling thread and flush everything queued."""
+    uow = current_unit_of_work()
+    if uow is None:
+        return True
+    _local_uow.uow = None
+    return uow.commit()
+
+
+@contextmanager
+def unit_of_work():
+    """Group the writes made inside the block so each dataset is written once.
+
+    Nested blocks join the outer unit of work and are flushed with it. The
+    managers update their in-memory data immediately, so queued writes are
+    flushed even when the block raises; storage never falls behind memory.
+    """
+    if current_unit_of_work() is not None:
+        yield current_unit_of_work()
+        return
+
+    uow = begin_unit_of_work()
+    try:
+        yield uow
+    finally:
+        end_unit_of_work()
+
+
+# Managers whose data is re-checked at the start of every request
+_tracked_managers = weakref.WeakSet()
+
+
+def track_manager(manager):
+    """Register a manager so refresh_managers() keeps it coherent with storage."""
+    _tracked_managers.add(manager)
+
+
+def refresh_managers():
+    """Reload any dataset another worker has changed, for every tracked manager."""
+    for manager in list(_tracked_managers):
+        try:
+            manager.refresh()
+        except Exception as e:
+            print(f"Error refreshing {type(manager).__name__}: {e}")
+
+
+# Backends are shared by every manager using the same data directory
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_storage_backend(data_dir='app/data', backend=None, database_path=None):
+    """Get the storage backend for a data directory.
+
+    Args:
+        data_dir: Directory containing the data files
+        backend: 'json' or 'sqlite' (default: STORAGE_BACKEND environment variable, then 'json')
+        database_path: SQLite database path (default: SQLITE_DATABASE environment variable)
+
+    Returns:
+        A JsonStorageBackend or SqliteStorageBackend instance
+    """
+    backend = (backend or os.environ.get('STORAGE_BACKEND') or BACKEND_JSON).lower()
+    database_path = database_path or os.environ.get('SQLITE_DATABASE') or None
+    cache_key = (backend, os.path.abspath(data_dir), database_path)
+
+    with _backends_lock:
+        if cache_key not in _backends:
+            if backend == BACKEND_SQLITE:
+                _backends[cache_key] = SqliteStorageBackend(data_dir, database_path)
+            elif backend == BACKEND_JSON:
+                _backends[cache_key] = JsonStorageBackend(data_dir)
+            else:
+                raise ValueError(f"Unknown storage backend: {backend}")
+        return _backends[cache_key]
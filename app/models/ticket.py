@@ -4,7 +4,7 @@ Ticket system for equipment management
 import os
 import uuid
 from datetime import datetime
-from app.models.json_utils import save_json, load_json, DateTimeEncoder
+from app.models.storage import get_storage_backend, TrackedStorage, track_manager
 
 class TicketStatus:
     """Status constants for the ticket system"""
@@ -153,26 +153,34 @@ class TicketComment:
 
 class TicketManager:
     """Manages tickets for equipment"""
-    def __init__(self, data_dir='app/data'):
+    def __init__(self, data_dir='app/data', storage=None):
         """Initialize the ticket manager"""
         self.data_dir = data_dir
         
         # Create the data directory if it doesn't exist
         os.makedirs(self.data_dir, exist_ok=True)
         
-        # Tickets file
-        self.tickets_file = os.path.join(data_dir, 'tickets.json')
-        
-        # Equipment conditions file - stores current condition of equipment
-        self.conditions_file = os.path.join(data_dir, 'equipment_conditions.json')
+        # Persistence for tickets and equipment conditions (the current
+        # condition of each piece of equipment)
+        self.storage = TrackedStorage(storage or get_storage_backend(data_dir))
         
         # Load data
         self.tickets = self._load_tickets()
         self.equipment_conditions = self._load_equipment_conditions()
         
+        # Pick up changes made by other workers at the start of each request
+        track_manager(self)
+        
+    def refresh(self):
+        """Reload any dataset that another process has changed since it was last read"""
+        if self.storage.changed('tickets'):
+            self.tickets = self._load_tickets()
+        if self.storage.changed('equipment_conditions'):
+            self.equipment_conditions = self._load_equipment_conditions()
+        
     def _load_tickets(self):
-        """Load tickets from file"""
-        tickets_data = load_json(self.tickets_file)
+        """Load tickets from storage"""
+        tickets_data = self.storage.load('tickets')
         if tickets_data:
             try:
                 return {t["id"]: Ticket.from_dict(t) for t in tickets_data}
@@ -181,18 +189,32 @@ class TicketManager:
                 return {}
         return {}
     
-    def _save_tickets(self):
-        """Save tickets to file"""
-        tickets_data = [ticket.to_dict() for ticket in self.tickets.values()]
-        save_json(tickets_data, self.tickets_file)
+    def _tickets_snapshot(self):
+        """Serialize all tickets for a full save"""
+        return [ticket.to_dict() for ticket in self.tickets.values()]
+    
+    def _save_tickets(self, ticket_id=None):
+        """Save tickets to storage, or only the given ticket (or its removal)"""
+        if ticket_id is None:
+            self.storage.save('tickets', self._tickets_snapshot())
+        elif ticket_id in self.tickets:
+            self.storage.put('tickets', ticket_id, self.tickets[ticket_id].to_dict(), self._tickets_snapshot)
+        else:
+            self.storage.delete('tickets', ticket_id, self._tickets_snapshot)
             
     def _load_equipment_conditions(self):
-        """Load equipment conditions from file"""
-        return load_json(self.conditions_file)
+        """Load equipment conditions from storage"""
+        return self.storage.load('equipment_conditions')
     
-    def _save_equipment_conditions(self):
-        """Save equipment conditions to file"""
-        save_json(self.equipment_conditions, self.conditions_file)
+    def _save_equipment_conditions(self, equipment_id=None):
+        """Save equipment conditions to storage, or only the given equipment's entry"""
+        if equipment_id is None:
+            self.storage.save('equipment_conditions', self.equipment_conditions)
+        elif equipment_id in self.equipment_conditions:
+            self.storage.put('equipment_conditions', equipment_id, self.equipment_conditions[equipment_id],
+                             lambda: self.equipment_conditions)
+        else:
+            self.storage.delete('equipment_conditions', equipment_id, lambda: self.equipment_conditions)
     
     def create_ticket(self, equipment_id, title, description, created_by, ticket_type=TicketType.ISSUE,
                      priority=TicketPriority.MEDIUM, equipment_condition=None):
@@ -213,12 +235,11 @@ class TicketManager:
         
         self.tickets[ticket.id] = ticket
         
-        # Update equipment condition based on the ticket
+        # Update equipment condition based on the ticket (saves the condition)
         self.update_equipment_condition(equipment_id, equipment_condition)
         
         # Save changes
-        self._save_tickets()
-        self._save_equipment_conditions()
+        self._save_tickets(ticket.id)
         
         return ticket
     
@@ -247,13 +268,12 @@ class TicketManager:
             elif kwargs["status"] == TicketStatus.CLOSED and not ticket.closed_at:
                 ticket.closed_at = datetime.now()
         
-        # Update equipment condition if specified
+        # Update equipment condition if specified (saves the condition)
         if "equipment_condition" in kwargs:
             self.update_equipment_condition(ticket.equipment_id, kwargs["equipment_condition"])
         
         # Save changes
-        self._save_tickets()
-        self._save_equipment_conditions()
+        self._save_tickets(ticket_id)
         
         return ticket
     
@@ -273,7 +293,7 @@ class TicketManager:
         ticket.updated_at = datetime.now()
         
         # Save changes
-        self._save_tickets()
+        self._save_tickets(ticket_id)
         
         return ticket_comment
     
@@ -338,7 +358,7 @@ class TicketManager:
             condition = EquipmentCondition.NORMAL
             
         self.equipment_conditions[equipment_id] = condition
-        self._save_equipment_conditions()
+        self._save_equipment_conditions(equipment_id)
         
         return condition
     
@@ -6,7 +6,7 @@ managing equipment transportation requests.
 import os
 import uuid
 from datetime import datetime, timedelta
-from app.models.json_utils import save_json, load_json, DateTimeEncoder
+from app.models.storage import get_storage_backend, TrackedStorage, track_manager
 
 class TransportStatus:
     """Status constants for the transport request system"""
@@ -182,22 +182,30 @@ class TransportComment:
 
 class TransportManager:
     """Manages transport requests for equipment"""
-    def __init__(self, data_dir='app/data'):
+    def __init__(self, data_dir='app/data', storage=None):
         """Initialize the transport request manager"""
         self.data_dir = data_dir
         
         # Create the data directory if it doesn't exist
         os.makedirs(self.data_dir, exist_ok=True)
         
-        # Transport requests file
-        self.transport_requests_file = os.path.join(data_dir, 'transport_requests.json')
+        # Persistence for transport requests
+        self.storage = TrackedStorage(storage or get_storage_backend(data_dir))
         
         # Load data
         self.transport_requests = self._load_transport_requests()
         
+        # Pick up changes made by other workers at the start of each request
+        track_manager(self)
+        
+    def refresh(self):
+        """Reload transport requests if another process has changed them since they were last read"""
+        if self.storage.changed('transport_requests'):
+            self.transport_requests = self._load_transport_requests()
+        
     def _load_transport_requests(self):
-        """Load transport requests from file"""
-        transport_data = load_json(self.transport_requests_file)
+        """Load transport requests from storage"""
+        transport_data = self.storage.load('transport_requests')
         if transport_data:
             try:
                 return {t["id"]: TransportRequest.from_dict(t) for t in transport_data}
@@ -206,10 +214,19 @@ class TransportManager:
                 return {}
         return {}
     
-    def _save_transport_requests(self):
-        """Save transport requests to file"""
-        transport_data = [req.to_dict() for req in self.transport_requests.values()]
-        save_json(transport_data, self.transport_requests_file)
+    def _transport_requests_snapshot(self):
+        """Serialize all transport requests for a full save"""
+        return [req.to_dict() for req in self.transport_requests.values()]
+    
+    def _save_transport_requests(self, request_id=None):
+        """Save transport requests to storage, or only the given request (or its removal)"""
+        if request_id is None:
+            self.storage.save('transport_requests', self._transport_requests_snapshot())
+        elif request_id in self.transport_requests:
+            self.storage.put('transport_requests', request_id, self.transport_requests[request_id].to_dict(),
+                             self._transport_requests_snapshot)
+        else:
+            self.storage.delete('transport_requests', request_id, self._transport_requests_snapshot)
     
     def create_transport_request(self, equipment_id, origin, destination, requested_by,
                               requested_date=None, special_instructions="", 
@@ -230,7 +247,7 @@ class TransportManager:
         self.transport_requests[transport_request.id] = transport_request
         
         # Save changes
-        self._save_transport_requests()
+        self._save_transport_requests(transport_request.id)
         
         return transport_request
     
@@ -261,7 +278,7 @@ class TransportManager:
                 transport_request.scheduled_date = transport_request.requested_date
         
         # Save changes
-        self._save_transport_requests()
+        self._save_transport_requests(request_id)
         
         return transport_request
     
@@ -281,7 +298,7 @@ class TransportManager:
         transport_request.updated_at = datetime.now()
         
         # Save changes
-        self._save_transport_requests()
+        self._save_transport_requests(request_id)
         
         return transport_comment
     
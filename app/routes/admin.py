@@ -2,9 +2,9 @@
 Admin routes for equipment management and reporting
 """
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify, send_file
-from app import equipment_manager, checkout_manager
+from app import equipment_manager, checkout_manager, ticket_manager
 from app.routes.checkout import admin_required, physicist_required
-from app.routes.dashboard import ticket_manager
+from app.models.storage import unit_of_work
 from datetime import datetime
 import json
 import os
@@ -30,10 +30,15 @@ def equipment_management():
     category = request.args.get('category')
     location = request.args.get('location')
     manufacturer = request.args.get('manufacturer')
+    search_query = request.args.get('q')
     view_mode = request.args.get('mode', 'normal') # 'normal' or 'direct'
 
     # Apply filters if provided
     filtered_equipment = all_equipment
+    if search_query:
+        # An exact id shows that record, anything else is a keyword search
+        record = equipment_manager.get_record(search_query.strip())
+        filtered_equipment = [record] if record is not None else equipment_manager.search_equipment(search_query)
     if category:
         filtered_equipment = [item for item in filtered_equipment if item.get('category') == category]
     if location:
@@ -41,6 +46,11 @@ def equipment_management():
     if manufacturer:
         filtered_equipment = [item for item in filtered_equipment if item.get('manufacturer') == manufacturer]
 
+    # Nothing found: suggest equipment with a similar id, serial or model number
+    suggestions = []
+    if search_query and not filtered_equipment:
+        suggestions = equipment_manager.find_similar_equipment(search_query)
+
     # Get unique values for filters
     manufacturers = equipment_manager.get_unique_manufacturers()
     locations = equipment_manager.get_unique_locations()
@@ -67,6 +77,8 @@ def equipment_management():
         selected_category=category,
         selected_location=location,
         selected_manufacturer=manufacturer,
+        search_query=search_query,
+        suggestions=suggestions,
         checkout_manager=checkout_manager,
         ticket_manager=ticket_manager
     )
@@ -121,17 +133,10 @@ def create_equipment():
     if not equipment_id:
         equipment_id = f"{category}-{manufacturer}-{serial_number}"
     
-    # Load existing equipment data using our custom utilities
-    from app.models.json_utils import load_json
-
-    equipment_json = os.path.join(equipment_manager.data_dir, 'equipment.json')
-    equipment_data = load_json(equipment_json) or []
-    
     # Check if equipment with this ID already exists
-    for item in equipment_data:
-        if item.get('id') == equipment_id:
-            flash(f'Equipment with ID {equipment_id} already exists', 'danger')
-            return redirect(url_for('admin.equipment_management'))
+    if equipment_manager.get_equipment_by_id(equipment_id):
+        flash(f'Equipment with ID {equipment_id} already exists', 'danger')
+        return redirect(url_for('admin.equipment_management'))
     
     # Create new equipment item
     new_equipment = {
@@ -146,18 +151,11 @@ def create_equipment():
         'notes': notes
     }
     
-    # Add to the list
-    equipment_data.append(new_equipment)
-    
-    # Save the updated data using our custom utilities
-    from app.models.json_utils import save_json
-
+    # Add it to the manager, which saves just this record
     try:
-        success = save_json(equipment_data, equipment_json, indent=2)
+        success = equipment_manager.add_equipment(new_equipment)
         if success:
             flash(f'Equipment {equipment_id} added successfully', 'success')
-            # Force reload of equipment data
-            equipment_manager.load_data()
         else:
             flash(f'Error saving equipment data', 'danger')
     except Exception as e:
@@ -179,45 +177,24 @@ def edit_equipment(equipment_id):
     calibration_due_date = request.form.get('calibration_due_date')
     notes = request.form.get('notes', '')
     
-    # Load existing equipment data
-    from app.models.json_utils import load_json
-
-    equipment_json = os.path.join(equipment_manager.data_dir, 'equipment.json')
-    equipment_data = load_json(equipment_json)
-
-    if not equipment_data:
-        flash('Error loading equipment data', 'danger')
-        return redirect(url_for('admin.equipment_management'))
-    
-    # Find and update the equipment item
-    found = False
-    for item in equipment_data:
-        if item.get('id') == equipment_id:
-            item.update({
-                'category': category,
-                'equipment_type': equipment_type,
-                'manufacturer': manufacturer,
-                'model': model,
-                'serial_number': serial_number,
-                'location': location,
-                'calibration_due_date': calibration_due_date,
-                'notes': notes
-            })
-            found = True
-            break
-    
-    if not found:
+    if not equipment_manager.get_equipment_by_id(equipment_id):
         flash(f'Equipment with ID {equipment_id} not found', 'danger')
         return redirect(url_for('admin.equipment_management'))
     
-    # Save the updated data
+    # Update the equipment item, which saves just this record
     try:
-        from app.models.json_utils import save_json
-        success = save_json(equipment_data, equipment_json, indent=2)
+        success = equipment_manager.update_equipment(equipment_id, {
+            'category': category,
+            'equipment_type': equipment_type,
+            'manufacturer': manufacturer,
+            'model': model,
+            'serial_number': serial_number,
+            'location': location,
+            'calibration_due_date': calibration_due_date,
+            'notes': notes
+        })
         if success:
             flash(f'Equipment {equipment_id} updated successfully', 'success')
-            # Force reload of equipment data
-            equipment_manager.load_data()
         else:
             flash(f'Error saving equipment data', 'danger')
     except Exception as e:
@@ -234,6 +211,8 @@ def delete_equipment(equipment_id):
     - Tickets associated with the equipment
     - Equipment status and checkout history
     - QR codes generated for the equipment
+
+    All data changes are written in one unit of work, each dataset once.
     """
     # Initialize counters for tracking what was deleted
     deleted_items = {
@@ -246,99 +225,70 @@ def delete_equipment(equipment_id):
     }
 
     try:
-        # 1. First, load and delete the equipment record
-        from app.models.json_utils import load_json
-
-        equipment_json = os.path.join(equipment_manager.data_dir, 'equipment.json')
-        equipment_data = load_json(equipment_json)
-
-        if not equipment_data:
-            flash('Error loading equipment data', 'danger')
-            return redirect(url_for('admin.equipment_management'))
-
-        # Find and remove the equipment item
-        found = False
-        for i, item in enumerate(equipment_data):
-            if item.get('id') == equipment_id:
-                del equipment_data[i]
-                found = True
-                deleted_items['equipment'] = 1
-                break
-
-        if not found:
-            flash(f'Equipment with ID {equipment_id} not found', 'danger')
-            return redirect(url_for('admin.equipment_management'))
-
-        # 2. Delete all tickets associated with this equipment
-        # First, get all tickets for this equipment
-        related_tickets = ticket_manager.get_tickets_by_equipment(equipment_id)
-
-        if related_tickets:
-            # Create a copy of ticket_manager.tickets before we modify it
-            tickets_dict = ticket_manager.tickets.copy()
-
-            # Remove tickets for this equipment
-            for ticket in related_tickets:
-                if ticket.id in tickets_dict:
-                    del tickets_dict[ticket.id]
+        with unit_of_work():
+            # 1. First, check that the equipment exists
+            if not equipment_manager.get_equipment_by_id(equipment_id):
+                flash(f'Equipment with ID {equipment_id} not found', 'danger')
+                return redirect(url_for('admin.equipment_management'))
+
+            # 2. Delete all tickets associated with this equipment
+            for ticket in ticket_manager.get_tickets_by_equipment(equipment_id):
+                if ticket.id in ticket_manager.tickets:
+                    del ticket_manager.tickets[ticket.id]
+                    ticket_manager._save_tickets(ticket.id)
                     deleted_items['tickets'] += 1
 
-            # Replace the tickets dictionary and save
-            ticket_manager.tickets = tickets_dict
-            ticket_manager._save_tickets()
-
-        # 3. Delete equipment condition record
-        if equipment_id in ticket_manager.equipment_conditions:
-            del ticket_manager.equipment_conditions[equipment_id]
-            ticket_manager._save_equipment_conditions()
-            deleted_items['conditions'] = 1
-
-        # 4. Delete equipment status record
-        if equipment_id in checkout_manager.equipment_status:
-            del checkout_manager.equipment_status[equipment_id]
-            checkout_manager._save_equipment_status()
-            deleted_items['status'] = 1
-
-        # 5. Filter checkout history to remove entries for this equipment
-        if checkout_manager.checkout_history:
-            original_count = len(checkout_manager.checkout_history)
-            checkout_manager.checkout_history = [
-                entry for entry in checkout_manager.checkout_history
-                if entry.get('equipment_id') != equipment_id
-            ]
-            deleted_items['history'] = original_count - len(checkout_manager.checkout_history)
-            checkout_manager._save_checkout_history()
-
-        # 6. Delete QR code files associated with this equipment
-        # Determine QR code directory
-        static_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static')
-        qr_dir = os.path.join(static_dir, 'qrcodes')
-
-        if os.path.exists(qr_dir):
-            # Delete standard QR code
-            standard_qr = os.path.join(qr_dir, f"qr_{equipment_id}.png")
-            if os.path.exists(standard_qr):
-                os.remove(standard_qr)
-                deleted_items['qr_codes'] += 1
-
-            # Delete legacy QR codes with hash
-            import glob
-            legacy_qr_pattern = os.path.join(qr_dir, f"qr_{equipment_id}_*.png")
-            for qr_file in glob.glob(legacy_qr_pattern):
-                os.remove(qr_file)
-                deleted_items['qr_codes'] += 1
-
-            # Delete URL text files if they exist
-            url_file = os.path.join(qr_dir, f"temp_url_{equipment_id}.txt")
-            if os.path.exists(url_file):
-                os.remove(url_file)
-
-        # 7. Finally, save the updated equipment data
-        from app.models.json_utils import save_json
-        save_json(equipment_data, equipment_json, indent=2)
-
-        # Force reload of equipment data
-        equipment_manager.load_data()
+            # 3. Delete equipment condition record
+            if equipment_id in ticket_manager.equipment_conditions:
+                del ticket_manager.equipment_conditions[equipment_id]
+                ticket_manager._save_equipment_conditions(equipment_id)
+                deleted_items['conditions'] = 1
+
+            # 4. Delete equipment status record
+            if equipment_id in checkout_manager.equipment_status:
+                del checkout_manager.equipment_status[equipment_id]
+                checkout_manager._save_equipment_status(equipment_id)
+                deleted_items['status'] = 1
+
+            # 5. Filter checkout history to remove entries for this equipment
+            if checkout_manager.checkout_history:
+                original_count = len(checkout_manager.checkout_history)
+                remaining_history = [
+                    entry for entry in checkout_manager.checkout_history
+                    if entry.get('equipment_id') != equipment_id
+                ]
+                deleted_items['history'] = original_count - len(remaining_history)
+                if deleted_items['history']:
+                    checkout_manager.checkout_history = remaining_history
+                    checkout_manager._save_checkout_history()
+
+            # 6. Delete QR code files associated with this equipment
+            # Determine QR code directory
+            static_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static')
+            qr_dir = os.path.join(static_dir, 'qrcodes')
+
+            if os.path.exists(qr_dir):
+                # Delete standard QR code
+                standard_qr = os.path.join(qr_dir, f"qr_{equipment_id}.png")
+                if os.path.exists(standard_qr):
+                    os.remove(standard_qr)
+                    deleted_items['qr_codes'] += 1
+
+                # Delete legacy QR codes with hash
+                import glob
+                legacy_qr_pattern = os.path.join(qr_dir, f"qr_{equipment_id}_*.png")
+                for qr_file in glob.glob(legacy_qr_pattern):
+                    os.remove(qr_file)
+                    deleted_items['qr_codes'] += 1
+
+                # Delete URL text files if they exist
+                url_file = os.path.join(qr_dir, f"temp_url_{equipment_id}.txt")
+                if os.path.exists(url_file):
+                    os.remove(url_file)
+
+            # 7. Finally, remove the equipment record
+            if equipment_manager.delete_equipment(equipment_id):
+                deleted_items['equipment'] = 1
 
         # Create a detailed success message
         success_msg = f"Equipment {equipment_id} deleted successfully with {deleted_items['tickets']} tickets, "
@@ -370,30 +320,9 @@ def edit_equipment_direct(equipment_id):
     print(f"DEBUG: Equipment data: {equipment}")
 
     # Ensure equipment contains the ID since it's used in the form
-    if equipment and 'id' not in equipment:
+    if 'id' not in equipment:
         equipment['id'] = equipment_id
 
-    # Get the equipment directly from JSON file as a fallback method
-    if not equipment or not all(key in equipment for key in ['category', 'equipment_type', 'manufacturer', 'model', 'serial_number', 'location']):
-        from app.models.json_utils import load_json
-
-        json_file = os.path.join(equipment_manager.data_dir, 'equipment.json')
-        all_equipment = load_json(json_file) or []
-
-        # Find the equipment item by ID
-        for item in all_equipment:
-            if item.get('id') == equipment_id:
-                equipment = item
-                print(f"DEBUG: Found equipment in direct JSON: {equipment}")
-                # Ensure id field is present
-                equipment['id'] = equipment_id
-                break
-
-    # If we still don't have valid equipment data, show an error
-    if not equipment:
-        flash(f'Error: Could not retrieve equipment data for ID {equipment_id}', 'danger')
-        return redirect(url_for('admin.equipment_management'))
-
     # Get standard values for dropdown lists
     standard_categories = standard_values_manager.get_categories()
 
@@ -438,45 +367,24 @@ def update_equipment_direct(equipment_id):
     calibration_due_date = request.form.get('calibration_due_date')
     notes = request.form.get('notes', '')
     
-    # Load existing equipment data
-    from app.models.json_utils import load_json
-
-    equipment_json = os.path.join(equipment_manager.data_dir, 'equipment.json')
-    equipment_data = load_json(equipment_json)
-
-    if not equipment_data:
-        flash('Error loading equipment data', 'danger')
-        return redirect(url_for('admin.equipment_management'))
-    
-    # Find and update the equipment item
-    found = False
-    for item in equipment_data:
-        if item.get('id') == equipment_id:
-            item.update({
-                'category': category,
-                'equipment_type': equipment_type,
-                'manufacturer': manufacturer,
-                'model': model,
-                'serial_number': serial_number,
-                'location': location,
-                'calibration_due_date': calibration_due_date,
-                'notes': notes
-            })
-            found = True
-            break
-    
-    if not found:
+    if not equipment_manager.get_equipment_by_id(equipment_id):
         flash(f'Equipment with ID {equipment_id} not found', 'danger')
         return redirect(url_for('admin.equipment_management'))
     
-    # Save the updated data
+    # Update the equipment item, which saves just this record
     try:
-        from app.models.json_utils import save_json
-        success = save_json(equipment_data, equipment_json, indent=2)
+        success = equipment_manager.update_equipment(equipment_id, {
+            'category': category,
+            'equipment_type': equipment_type,
+            'manufacturer': manufacturer,
+            'model': model,
+            'serial_number': serial_number,
+            'location': location,
+            'calibration_due_date': calibration_due_date,
+            'notes': notes
+        })
         if success:
             flash(f'Equipment {equipment_id} updated successfully', 'success')
-            # Force reload of equipment data
-            equipment_manager.load_data()
         else:
             flash(f'Error saving equipment data', 'danger')
     except Exception as e:
@@ -1001,8 +909,7 @@ def calendar_test():
 def calendar_events():
     """API endpoint to get calendar events for equipment deadlines and checkouts. Accessible to both admins and physicists."""
     from app import equipment_manager, checkout_manager
-    from datetime import datetime, timedelta
-    import re
+    from datetime import datetime
     from flask import jsonify, Response
 
     # Get all equipment
@@ -1017,43 +924,12 @@ def calendar_events():
     # Process calibration deadlines
     for equipment in all_equipment:
         try:
-            # Skip equipment without calibration dates
-            if not equipment.get('calibration_due_date'):
+            # Due date normalized when the equipment was loaded (end of month
+            # for MM/YYYY); skip equipment without a readable calibration date
+            calibration = equipment_manager.get_calibration_date(equipment['id'])
+            if calibration is None or calibration.due is None:
                 continue
-
-            # Parse calibration date (format can be MM/YYYY or MM-YYYY)
-            calibration_str = equipment['calibration_due_date']
-
-            # If format is MM/YYYY or MM-YYYY, convert to a date
-            if re.match(r'^\d{1,2}[/\-]\d{4}$', calibration_str):
-                month, year = re.split(r'[/\-]', calibration_str)
-                # Set due date to last day of the month
-                month = int(month)
-                year = int(year)
-
-                # Get last day of month
-                if month == 12:
-                    next_month = 1
-                    next_year = year + 1
-                else:
-                    next_month = month + 1
-                    next_year = year
-
-                last_day = (datetime(next_year, next_month, 1) - timedelta(days=1)).day
-                calibration_date = datetime(year, month, last_day)
-            else:
-                # Try other formats
-                try:
-                    # Try MM/DD/YYYY format
-                    calibration_date = datetime.strptime(calibration_str, '%m/%d/%Y')
-                except:
-                    try:
-                        # Try YYYY-MM-DD format
-                        calibration_date = datetime.strptime(calibration_str, '%Y-%m-%d')
-                    except:
-                        # Skip this equipment if we can't parse the date
-                        print(f"Could not parse calibration date: {calibration_str} for equipment {equipment['id']}")
-                        continue
+            calibration_date = calibration.due
 
             # Calculate days until calibration
             days_until_calibration = (calibration_date - today).days
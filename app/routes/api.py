@@ -2,34 +2,105 @@
 API routes for the Equipment Tracker
 """
 from flask import Blueprint, jsonify, request
-from app import equipment_manager
+from app import equipment_manager, equipment_view
 
 bp = Blueprint('api', __name__, url_prefix='/api')
 
+# Largest page /api/equipment returns
+MAX_PAGE_SIZE = 500
+
+# Query parameters of /api/equipment that filter on an equipment index
+INDEXED_FILTERS = ('category', 'location', 'manufacturer', 'model')
+
 @bp.route('/equipment')
 def get_equipment():
-    """Get all equipment or filtered by category, location, or search query."""
-    # Get query parameters for filtering
-    category = request.args.get('category')
-    location = request.args.get('location')
-    search_query = request.args.get('q')
+    """Get equipment, filtered, sorted and paginated.
+    
+    Query parameters:
+        category, location, manufacturer, model: Index filters; repeat a
+            parameter to accept several values (OR), combine parameters to
+            require all of them (AND). Locations match anywhere in the text.
+        status: 'available', 'checked_out' or 'in_transport'
+        condition: 'normal', 'warning' or 'critical'
+        q: Search query; results are ranked unless sorted
+        sort: Field to sort by (id, category, location, manufacturer, model,
+            calibration_due_date), prefixed with '-' for descending order
+        offset, limit: Page to return (everything when no limit is given;
+            at most MAX_PAGE_SIZE records per page)
+        fields: Comma-separated fields to return ('id' is always included)
+    """
+    filters = {name: request.args.getlist(name) for name in INDEXED_FILTERS if request.args.getlist(name)}
+    status_filter = request.args.get('status')
+    condition_filter = request.args.get('condition')
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    limit = request.args.get('limit', type=int)
+    if limit is not None:
+        limit = min(max(limit, 0), MAX_PAGE_SIZE)
+    
+    # Status and condition come from the equipment view, the rest from indexes
+    within = None
+    if status_filter or condition_filter:
+        within = equipment_view.ids_matching(status=status_filter, condition=condition_filter)
     
-    # Filter equipment based on parameters
-    if category:
-        equipment = equipment_manager.get_equipment_by_category(category)
-    elif location:
-        equipment = equipment_manager.get_equipment_by_location(location)
-    elif search_query:
-        equipment = equipment_manager.search_equipment(search_query)
-    else:
-        equipment = equipment_manager.get_all_equipment()
+    try:
+        total, equipment = equipment_manager.query_equipment(
+            filters=filters,
+            query=request.args.get('q'),
+            sort=request.args.get('sort'),
+            offset=offset,
+            limit=limit,
+            within=within
+        )
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
     
+    fields = request.args.get('fields')
+    if fields:
+        names = ['id'] + [name for name in fields.split(',') if name and name != 'id']
+        equipment = [{name: item.get(name) for name in names} for item in equipment]
+    
+    next_offset = offset + len(equipment)
     return jsonify({
         'status': 'success',
         'count': len(equipment),
+        'total': total,
+        'offset': offset,
+        'limit': limit,
+        'next_offset': next_offset if limit is not None and next_offset < total else None,
         'equipment': equipment
     })
 
+@bp.route('/facets')
+def get_facets():
+    """Get equipment counts per category, location, manufacturer, status,
+    condition and calibration status.
+    
+    Accepts the filters of /api/equipment (category, location, manufacturer,
+    model, status, condition, q) to count only the matching equipment.
+    """
+    filters = {name: request.args.getlist(name) for name in INDEXED_FILTERS if request.args.getlist(name)}
+    status_filter = request.args.get('status')
+    condition_filter = request.args.get('condition')
+    query = request.args.get('q')
+    days = request.args.get('days', 30, type=int)
+    
+    ids = None
+    if status_filter or condition_filter:
+        ids = equipment_view.ids_matching(status=status_filter, condition=condition_filter)
+    if filters or query:
+        _, equipment = equipment_manager.query_equipment(filters=filters, query=query, within=ids)
+        ids = [item['id'] for item in equipment]
+    facets = equipment_view.facets(ids=ids, days=days)
+    
+    return jsonify({
+        'status': 'success',
+        'total': facets.pop('total'),
+        'facets': facets
+    })
+
 @bp.route('/equipment/<string:equipment_id>')
 def get_equipment_by_id(equipment_id):
     """Get equipment by ID."""
@@ -2,8 +2,7 @@
 Calendar routes for tracking equipment deadlines and events
 """
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, send_file, Response
-from app import equipment_manager, checkout_manager
-from app.models.ticket import TicketManager
+from app import equipment_manager, checkout_manager, ticket_manager
 from datetime import datetime, timedelta
 import json
 import uuid
@@ -14,9 +13,6 @@ import pytz
 
 bp = Blueprint('calendar', __name__, url_prefix='/calendar')
 
-# Initialize ticket manager
-ticket_manager = TicketManager()
-
 @bp.route('/')
 def index():
     """Render the unified calendar page showing all deadlines."""
@@ -79,17 +75,8 @@ def ical_feed():
         uid = f"cal-{item['id']}-{uuid.uuid4().hex}"
         event.add('uid', uid)
         
-        # Parse date
-        try:
-            due_date = datetime.strptime(item['calibration_due_date'], '%m/%Y')
-            # Set to the last day of the month
-            if due_date.month == 12:
-                end_date = datetime(due_date.year + 1, 1, 1) - timedelta(days=1)
-            else:
-                end_date = datetime(due_date.year, due_date.month + 1, 1) - timedelta(days=1)
-        except:
-            # Default to today + 30 days if parsing fails
-            end_date = datetime.now() + timedelta(days=30)
+        # Due date normalized when the equipment was loaded
+        end_date = equipment_manager.get_calibration_date(item['id']).due
         
         event.add('dtstart', end_date.date())
         event.add('dtend', end_date.date())
@@ -165,32 +152,21 @@ def get_upcoming_calibrations():
     upcoming = []
     
     for item in all_equipment:
-        if 'calibration_due_date' not in item or not item['calibration_due_date']:
+        # Calibration due date normalized when the equipment was loaded
+        # (end of month for MM/YYYY); unreadable dates are skipped
+        calibration = equipment_manager.get_calibration_date(item['id'])
+        if calibration is None or calibration.due is None:
             continue
         
-        # Parse calibration due date
-        due_date_str = item['calibration_due_date']
-        try:
-            # Assuming format is MM/YYYY
-            due_date = datetime.strptime(due_date_str, '%m/%Y')
-            # Set to the last day of the month
-            if due_date.month == 12:
-                end_date = datetime(due_date.year + 1, 1, 1) - timedelta(days=1)
-            else:
-                end_date = datetime(due_date.year, due_date.month + 1, 1) - timedelta(days=1)
-            
-            # Calculate days left
-            days_left = (end_date - today).days
-            
-            # Only include if due within 90 days or overdue
-            if days_left <= 90:
-                equipment_item = item.copy()
-                equipment_item['days_left'] = days_left
-                equipment_item['due_date'] = end_date.strftime('%Y-%m-%d')
-                upcoming.append(equipment_item)
-        except Exception as e:
-            print(f"Error parsing date '{due_date_str}' for equipment {item.get('id')}: {e}")
-            continue
+        # Calculate days left
+        days_left = calibration.days_until_due(today)
+        
+        # Only include if due within 90 days or overdue
+        if days_left <= 90:
+            equipment_item = item.copy()
+            equipment_item['days_left'] = days_left
+            equipment_item['due_date'] = calibration.due.strftime('%Y-%m-%d')
+            upcoming.append(equipment_item)
     
     # Sort by days left (ascending)
     upcoming.sort(key=lambda x: x['days_left'])
@@ -199,42 +175,29 @@ def get_upcoming_calibrations():
 
 def get_equipment_returns():
     """Get upcoming equipment returns with days left calculation."""
-    checked_out = checkout_manager.get_checked_out_equipment()
     today = datetime.now()
     returns = []
     
-    for item in checked_out:
-        if 'expected_return' not in item or not item['expected_return']:
-            continue
+    # Checked out equipment in expected return order, with the dates already parsed
+    for return_date, equipment_id in checkout_manager.get_returns_due():
+        # Calculate days left
+        days_left = (return_date - today).days
         
-        # Parse expected return date
-        return_date_str = item['expected_return']
-        try:
-            return_date = datetime.fromisoformat(return_date_str)
-            
-            # Calculate days left
-            days_left = (return_date - today).days
-            
-            # Add days left to item
-            return_item = item.copy()
-            return_item['days_left'] = days_left
-            return_item['due_date'] = return_date.strftime('%Y-%m-%d')
-            
-            # Include equipment details
-            equipment = equipment_manager.get_equipment_by_id(item['id'])
-            if equipment:
-                return_item['manufacturer'] = equipment.get('manufacturer', '')
-                return_item['model'] = equipment.get('model', '')
-                return_item['serial_number'] = equipment.get('serial_number', '')
-                return_item['category'] = equipment.get('category', '')
-            
-            returns.append(return_item)
-        except Exception as e:
-            print(f"Error parsing date '{return_date_str}' for equipment {item.get('id')}: {e}")
-            continue
-    
-    # Sort by days left (ascending)
-    returns.sort(key=lambda x: x['days_left'])
+        # Add days left to item
+        return_item = checkout_manager.get_equipment_status(equipment_id).copy()
+        return_item['id'] = equipment_id
+        return_item['days_left'] = days_left
+        return_item['due_date'] = return_date.strftime('%Y-%m-%d')
+        
+        # Include equipment details
+        equipment = equipment_manager.get_equipment_by_id(equipment_id)
+        if equipment:
+            return_item['manufacturer'] = equipment.get('manufacturer', '')
+            return_item['model'] = equipment.get('model', '')
+            return_item['serial_number'] = equipment.get('serial_number', '')
+            return_item['category'] = equipment.get('category', '')
+        
+        returns.append(return_item)
     
     return returns
 
@@ -254,18 +217,11 @@ def generate_calendar_events(calibrations, returns):
                 # Already parsed date in YYYY-MM-DD format
                 due_date = due_date_str
             else:
-                # Parse from MM/YYYY format
-                try:
-                    month_year = datetime.strptime(due_date_str, '%m/%Y')
-                    # Set to the last day of the month
-                    if month_year.month == 12:
-                        end_date = datetime(month_year.year + 1, 1, 1) - timedelta(days=1)
-                    else:
-                        end_date = datetime(month_year.year, month_year.month + 1, 1) - timedelta(days=1)
-                    due_date = end_date.strftime('%Y-%m-%d')
-                except:
-                    # Skip if date parsing fails
+                # Use the due date normalized when the equipment was loaded
+                calibration = equipment_manager.get_calibration_date(item['id'])
+                if calibration is None or calibration.due is None:
                     continue
+                due_date = calibration.due.strftime('%Y-%m-%d')
             
             # Determine status and className based on days left
             days_left = item.get('days_left', 0)
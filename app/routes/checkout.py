@@ -2,10 +2,9 @@
 Checkout routes for equipment checkout system
 """
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
-from app import checkout_manager, equipment_manager, csrf
+from app import checkout_manager, equipment_manager, ticket_manager, csrf
 from app.models.forms import LoginForm, NotificationPreferencesForm
-from app.models.json_utils import DateTimeEncoder
-from datetime import datetime
+from datetime import datetime, timedelta
 import functools
 import json
 import os
@@ -88,15 +87,7 @@ def notification_preferences():
     """User notification preferences."""
     # Get current user data
     username = session['user']['username']
-    users_file_path = os.path.join(checkout_manager.data_dir, 'users.json')
-    
-    # Load all user data
-    try:
-        with open(users_file_path, 'r') as f:
-            users_data = json.load(f)
-    except:
-        flash('Could not load user data', 'danger')
-        return redirect(url_for('checkout.index'))
+    users_data = checkout_manager.users
     
     if username not in users_data:
         flash('User data not found', 'danger')
@@ -118,12 +109,11 @@ def notification_preferences():
         
         # Save updated user data
         try:
-            with open(users_file_path, 'w') as f:
-                json.dump(users_data, f, cls=DateTimeEncoder, indent=2)
+            if not checkout_manager._save_users():
+                raise IOError('user data could not be written')
             
             # Update session data
-            session['user'] = user_data
-            session['user']['username'] = username
+            session['user'] = checkout_manager.get_user(username)
             
             flash('Notification preferences updated successfully', 'success')
         except Exception as e:
@@ -445,7 +435,6 @@ def equipment_detail(equipment_id):
     history = checkout_manager.get_checkout_history(equipment_id=equipment_id)
 
     # Get tickets for this equipment
-    from app.routes.dashboard import ticket_manager
     tickets = ticket_manager.get_tickets_by_equipment(equipment_id)
 
     # Handle checkout/return actions
@@ -543,10 +532,8 @@ def admin():
             del user_info['password']
         users[username] = user_info
 
-    # Get equipment counts by status
-    status_counts = {}
-    for status in checkout_manager.STATUS_OPTIONS:
-        status_counts[status] = len(checkout_manager.get_equipment_by_status(status))
+    # Get equipment counts by status from the maintained status counters
+    status_counts = checkout_manager.get_status_counts(equipment_manager.get_equipment_ids())
 
     # Use the redesigned admin template
     return render_template(
@@ -778,7 +765,202 @@ def api_return_equipment(equipment_id):
             'status': 'error',
             'message': 'Failed to return equipment'
         }), 500
-        
+
+def _equipment_exists(equipment_id):
+    """Whether an equipment ID is known to the equipment manager."""
+    return equipment_manager.get_equipment_by_id(equipment_id) is not None
+
+@bp.route('/api/batch/checkout', methods=['POST'])
+def api_checkout_many():
+    """API endpoint to check out several pieces of equipment (or kits) at once.
+    
+    JSON body: items (equipment and kit IDs), location, and optionally
+    expected_return_days and notes. Nothing is checked out unless every
+    item can be.
+    """
+    # Require authentication
+    if 'user' not in session:
+        return jsonify({
+            'status': 'error',
+            'message': 'Authentication required'
+        }), 401
+    
+    data = request.json
+    
+    if not data or not isinstance(data.get('items'), list):
+        return jsonify({
+            'status': 'error',
+            'message': 'A list of items is required'
+        }), 400
+    
+    equipment_ids, errors = checkout_manager.checkout_many(
+        data['items'],
+        session['user']['username'],
+        data.get('location'),
+        data.get('expected_return_days', 1),
+        data.get('notes', ''),
+        equipment_exists=_equipment_exists
+    )
+    
+    if errors:
+        return jsonify({
+            'status': 'error',
+            'message': 'No equipment was checked out',
+            'errors': errors
+        }), 400
+    
+    return jsonify({
+        'status': 'success',
+        'message': f'{len(equipment_ids)} items checked out successfully',
+        'equipment_ids': equipment_ids
+    })
+
+@bp.route('/api/batch/return', methods=['POST'])
+def api_return_many():
+    """API endpoint to return several pieces of equipment (or kits) at once.
+    
+    JSON body: items (equipment and kit IDs), and optionally return_location
+    and notes. Nothing is returned unless every item is checked out.
+    """
+    # Require authentication
+    if 'user' not in session:
+        return jsonify({
+            'status': 'error',
+            'message': 'Authentication required'
+        }), 401
+    
+    data = request.json
+    
+    if not data or not isinstance(data.get('items'), list):
+        return jsonify({
+            'status': 'error',
+            'message': 'A list of items is required'
+        }), 400
+    
+    equipment_ids, errors = checkout_manager.return_many(
+        data['items'],
+        session['user']['username'],
+        data.get('return_location'),
+        data.get('notes', ''),
+        equipment_exists=_equipment_exists
+    )
+    
+    if errors:
+        return jsonify({
+            'status': 'error',
+            'message': 'No equipment was returned',
+            'errors': errors
+        }), 400
+    
+    return jsonify({
+        'status': 'success',
+        'message': f'{len(equipment_ids)} items returned successfully',
+        'equipment_ids': equipment_ids
+    })
+
+@bp.route('/api/kits', methods=['GET'])
+def api_kits():
+    """API endpoint to list the equipment kits."""
+    return jsonify({
+        'status': 'success',
+        'kits': checkout_manager.kits
+    })
+
+@bp.route('/api/kits/<string:kit_id>', methods=['PUT', 'DELETE'])
+def api_kit(kit_id):
+    """API endpoint to create, replace or delete an equipment kit."""
+    # Require a clinical physicist or administrator
+    if 'user' not in session:
+        return jsonify({
+            'status': 'error',
+            'message': 'Authentication required'
+        }), 401
+    if session['user'].get('role') not in ['admin', 'physicist']:
+        return jsonify({
+            'status': 'error',
+            'message': 'Clinical physicist privileges required'
+        }), 403
+    
+    if request.method == 'DELETE':
+        if not checkout_manager.delete_kit(kit_id):
+            return jsonify({
+                'status': 'error',
+                'message': 'Kit not found'
+            }), 404
+        return jsonify({
+            'status': 'success',
+            'message': 'Kit deleted successfully'
+        })
+    
+    data = request.json
+    
+    if not data or not isinstance(data.get('equipment_ids'), list):
+        return jsonify({
+            'status': 'error',
+            'message': 'A list of equipment_ids is required'
+        }), 400
+    
+    if not checkout_manager.save_kit(
+        kit_id,
+        data.get('name'),
+        data['equipment_ids'],
+        session['user']['username'],
+        equipment_exists=_equipment_exists
+    ):
+        return jsonify({
+            'status': 'error',
+            'message': 'Invalid kit: the kit ID must not be an equipment ID, and every item must be existing equipment'
+        }), 400
+    
+    return jsonify({
+        'status': 'success',
+        'message': 'Kit saved successfully',
+        'kit': checkout_manager.get_kit(kit_id)
+    })
+
+@bp.route('/api/history', methods=['GET'])
+def api_checkout_history():
+    """API endpoint to get checkout history in a time range.
+    
+    Query parameters: since and until (ISO 8601 dates or times, inclusive;
+    a date alone for until means the end of that day), and optionally
+    equipment_id, user and limit.
+    """
+    # Require authentication
+    if 'user' not in session:
+        return jsonify({
+            'status': 'error',
+            'message': 'Authentication required'
+        }), 401
+    
+    bounds = {}
+    for name in ('since', 'until'):
+        value = request.args.get(name)
+        if not value:
+            continue
+        try:
+            bounds[name] = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return jsonify({
+                'status': 'error',
+                'message': f'Invalid {name} value. Please use ISO 8601 format (YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS).'
+            }), 400
+        if name == 'until' and len(value) == 10:
+            bounds[name] += timedelta(days=1, microseconds=-1)
+    
+    history = checkout_manager.get_checkout_history(
+        equipment_id=request.args.get('equipment_id'),
+        user=request.args.get('user'),
+        limit=request.args.get('limit', type=int),
+        **bounds
+    )
+    
+    return jsonify({
+        'status': 'success',
+        'count': len(history),
+        'history': history
+    })
+
 @bp.route('/notifications/history')
 @physicist_required
 def notification_history():
@@ -3,13 +3,7 @@ Dashboard routes for the Equipment Tracker
 """
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from app.models.equipment import EquipmentDataManager
-from app import equipment_manager, checkout_manager
-from app.models.ticket import TicketManager
-from app.models.transport_request import TransportManager
-
-# Initialize managers
-ticket_manager = TicketManager()
-transport_manager = TransportManager()
+from app import equipment_manager, checkout_manager, ticket_manager, transport_manager, equipment_view
 from datetime import datetime
 
 bp = Blueprint('dashboard', __name__)
@@ -38,9 +32,8 @@ def index():
         latest_equipment=latest_equipment,
         transport_requests=transport_requests,
         open_tickets=open_tickets,
-        checkout_manager=checkout_manager,
-        ticket_manager=ticket_manager,
-        equipment_manager=equipment_manager
+        equipment_manager=equipment_manager,
+        equipment_view=equipment_view
     )
 
 @bp.route('/equipment')
@@ -63,62 +56,13 @@ def equipment_list():
     else:
         equipment = equipment_manager.get_all_equipment()
 
-    # Apply status filter if provided
-    if status_filter:
-        filtered_equipment = []
-        for item in equipment:
-            # Equipment items are dictionaries, use the 'id' key not attribute
-            item_id = item.get('id')
-            if not item_id:
-                continue
-
-            item_status = checkout_manager.get_equipment_status(item_id)
-
-            # Handle status filter - item_status is expected to be a dictionary
-            if status_filter == 'available' and not item_status.get('status') == "Checked Out":
-                filtered_equipment.append(item)
-            elif status_filter == 'checked_out' and item_status.get('status') == "Checked Out":
-                filtered_equipment.append(item)
-            elif status_filter == 'in_transport':
-                # Check if item is in transport
-                for req in transport_manager.get_pending_transport_requests():
-                    # Check if req is a dictionary or object
-                    if hasattr(req, 'equipment_id'):
-                        # Object with attributes
-                        if req.equipment_id == item_id and req.status not in ['completed', 'cancelled']:
-                            filtered_equipment.append(item)
-                            break
-                    else:
-                        # Dictionary with keys
-                        if req.get('equipment_id') == item_id and req.get('status') not in ['completed', 'cancelled']:
-                            filtered_equipment.append(item)
-                            break
-        equipment = filtered_equipment
-
-    # Apply condition filter if provided
-    if condition_filter:
-        filtered_equipment = []
-        for item in equipment:
-            # Equipment items are dictionaries, use the 'id' key not attribute
-            item_id = item.get('id')
-            if not item_id:
-                continue
-
-            # Get equipment condition
-            # Looking at equipment_conditions.json, conditions are stored as direct string values
-            item_condition = ticket_manager.get_equipment_condition(item_id)
-
-            # Add the item to filtered list if condition matches
-            if item_condition == condition_filter:
-                filtered_equipment.append(item)
-        equipment = filtered_equipment
+    # Apply status and condition filters in one pass over the joined rows
+    if status_filter or condition_filter:
+        equipment = equipment_view.filter(equipment, status=status_filter, condition=condition_filter)
 
     # Get unique locations and manufacturers for filters
     locations = equipment_manager.get_unique_locations()
 
-    # Get transport requests for status indicators
-    transport_requests = transport_manager.get_pending_transport_requests()
-
     return render_template(
         'dashboard/equipment_list.html',
         equipment=equipment,
@@ -128,9 +72,7 @@ def equipment_list():
         search_query=search_query,
         status_filter=status_filter,
         condition_filter=condition_filter,
-        checkout_manager=checkout_manager,
-        ticket_manager=ticket_manager,
-        transport_requests=transport_requests
+        equipment_view=equipment_view
     )
 
 @bp.route('/equipment/<string:equipment_id>')
@@ -140,6 +82,14 @@ def equipment_detail(equipment_id):
     equipment = equipment_manager.get_equipment_by_id(equipment_id)
 
     if not equipment:
+        # Offer the closest ids, serial or model numbers (mistyped or damaged labels)
+        suggestions = equipment_manager.find_similar_equipment(equipment_id)
+        if suggestions:
+            return render_template(
+                'equipment/not_found.html',
+                equipment_id=equipment_id,
+                suggestions=suggestions
+            ), 404
         flash('Equipment not found', 'error')
         return redirect(url_for('dashboard.equipment_list'))
 
@@ -237,47 +187,7 @@ def calibration_overview():
     filtered_percent = round(filtered_count / total_count * 100) if total_count > 0 else 0
     
     # Get counts by status for chart
-    status_counts = {
-        'current': 0,
-        'due_soon': 0,
-        'overdue': 0,
-        'unknown': 0
-    }
-    
-    for item in all_equipment:
-        date_str = str(item.get('calibration_due_date', ''))
-        cal_date = equipment_manager._parse_calibration_date(date_str)
-        
-        if not cal_date:
-            status_counts['unknown'] += 1
-            continue
-        
-        try:
-            # Convert ISO format string back to datetime for comparison
-            if isinstance(cal_date, str):
-                try:
-                    # Try to parse as ISO format
-                    cal_date_dt = datetime.fromisoformat(cal_date)
-                except ValueError:
-                    # If that fails, it might not be an ISO string, mark as unknown
-                    status_counts['unknown'] += 1
-                    continue
-            else:
-                cal_date_dt = cal_date
-                
-            # Now it's safe to calculate the difference
-            delta = cal_date_dt - datetime.now()
-            
-            if delta.days < 0:
-                status_counts['overdue'] += 1
-            elif delta.days <= 30:
-                status_counts['due_soon'] += 1
-            else:
-                status_counts['current'] += 1
-        except Exception as e:
-            # If anything goes wrong, count as unknown
-            status_counts['unknown'] += 1
-            continue
+    status_counts = equipment_manager.get_calibration_status_counts()
     
     return render_template(
         'dashboard/calibration.html',
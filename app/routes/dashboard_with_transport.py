@@ -2,17 +2,12 @@
 Dashboard routes with transport request integration
 """
 from flask import Blueprint, render_template, redirect, url_for, request, flash, session
-from app import equipment_manager, checkout_manager
-from app.models.ticket import TicketManager, EquipmentCondition
-from app.models.transport_request import TransportManager  # New import
+from app import equipment_manager, checkout_manager, ticket_manager, transport_manager
+from app.models.ticket import EquipmentCondition
 import os
 
 bp = Blueprint('dashboard_transport', __name__, url_prefix='/dashboard-transport')
 
-# Initialize managers
-ticket_manager = TicketManager()
-transport_manager = TransportManager()  # New transport manager instance
-
 def login_required(view):
     """View decorator that redirects anonymous users to the login page."""
     @functools.wraps(view)
@@ -2,15 +2,12 @@
 Equipment landing page routes for QR code scans
 """
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session
-from app import equipment_manager, checkout_manager
-from app.models.ticket import TicketManager, EquipmentCondition
+from app import equipment_manager, checkout_manager, ticket_manager
+from app.models.ticket import EquipmentCondition
 from datetime import datetime
 
 bp = Blueprint('equipment', __name__, url_prefix='/equipment')
 
-# Initialize ticket manager
-ticket_manager = TicketManager()
-
 @bp.route('/<string:equipment_id>')
 def landing_page(equipment_id):
     """Landing page for equipment QR code scans"""
@@ -18,6 +15,14 @@ def landing_page(equipment_id):
     equipment = equipment_manager.get_equipment_by_id(equipment_id)
     
     if not equipment:
+        # Offer the closest ids, serial or model numbers (mistyped or damaged labels)
+        suggestions = equipment_manager.find_similar_equipment(equipment_id)
+        if suggestions:
+            return render_template(
+                'equipment/not_found.html',
+                equipment_id=equipment_id,
+                suggestions=suggestions
+            ), 404
         flash('Equipment not found', 'danger')
         return redirect(url_for('dashboard.equipment_list'))
     
@@ -2,17 +2,14 @@
 QR code direct access routes - no login required
 """
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session
-from app import equipment_manager, checkout_manager, csrf
-from app.models.ticket import TicketManager, TicketStatus, TicketPriority, TicketType, EquipmentCondition
+from app import equipment_manager, checkout_manager, ticket_manager, csrf
+from app.models.ticket import TicketStatus, TicketPriority, TicketType, EquipmentCondition
 from datetime import datetime, timedelta
 import uuid
 
 # Create a completely separate blueprint for QR code access
 bp = Blueprint('qr', __name__, url_prefix='/qr')
 
-# Initialize ticket manager
-ticket_manager = TicketManager()
-
 @bp.route('/equipment/<string:equipment_id>')
 def equipment_detail(equipment_id):
     """View equipment details from QR code without login"""
@@ -20,8 +17,8 @@ def equipment_detail(equipment_id):
     equipment = equipment_manager.get_equipment_by_id(equipment_id)
 
     if not equipment:
-        flash('Equipment not found', 'error')
-        return redirect(url_for('equipment.landing_page'))
+        # The landing page offers similar equipment for unknown ids
+        return redirect(url_for('equipment.landing_page', equipment_id=equipment_id))
 
     # Get checkout status
     status = checkout_manager.get_equipment_status(equipment_id)
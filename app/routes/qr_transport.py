@@ -2,9 +2,9 @@
 QR code accessible transport request routes - no login required
 """
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session
-from app import equipment_manager, checkout_manager
+from app import equipment_manager, checkout_manager, transport_manager
 from app.models.transport_request import (
-    TransportManager, TransportStatus, TransportPriority, 
+    TransportStatus, TransportPriority, 
     TransportType, TransportRequest
 )
 from datetime import datetime, timedelta
@@ -13,9 +13,6 @@ import uuid
 # Create a blueprint for QR code transport access
 bp = Blueprint('qr_transport', __name__, url_prefix='/qr/transport')
 
-# Initialize transport manager
-transport_manager = TransportManager()
-
 @bp.route('/equipment/<string:equipment_id>')
 def request_transport(equipment_id):
     """Create transport request via QR code without login"""
@@ -362,8 +362,8 @@ def get_date_range_text(date_range, start_date, end_date):
 
 def generate_inventory_report(include_fields):
     """Generate an inventory report with all equipment."""
-    # Get all equipment
-    equipment_list = equipment_manager.get_all_equipment()
+    # Get all equipment (copies, since status fields are added below)
+    equipment_list = [item.copy() for item in equipment_manager.get_all_equipment()]
     
     # Add status information
     for item in equipment_list:
@@ -380,9 +380,7 @@ def generate_inventory_report(include_fields):
         grouped_data[category].append(item)
     
     # Count by status
-    status_counts = {}
-    for status in checkout_manager.STATUS_OPTIONS:
-        status_counts[status] = len([item for item in equipment_list if item.get('status') == status])
+    status_counts = checkout_manager.get_status_counts([item['id'] for item in equipment_list])
     
     return {
         'title': 'Equipment Inventory Report',
@@ -401,43 +399,21 @@ def generate_checkout_report(start_date, end_date, include_fields):
     # Get overdue equipment
     overdue = checkout_manager.get_overdue_equipment()
     
-    # Get checkout history
-    history = checkout_manager.get_checkout_history()
-    
-    # Filter history by date range if specified
+    # Get checkout history, by date range if specified
     if start_date and end_date:
-        filtered_history = []
-        errors = []
-        for entry in history:
-            try:
-                timestamp = entry.get('timestamp', '')
-                if timestamp:
-                    # Handle both ISO format and other formats
-                    if 'T' in timestamp:
-                        entry_date = datetime.fromisoformat(timestamp.split('T')[0])
-                    else:
-                        # Try multiple date formats
-                        for fmt in ['%Y-%m-%d', '%Y/%m/%d', '%m/%d/%Y', '%d-%m-%Y']:
-                            try:
-                                entry_date = datetime.strptime(timestamp.split(' ')[0], fmt)
-                                break
-                            except ValueError:
-                                continue
-                        else:
-                            # If we get here, none of the formats worked
-                            raise ValueError(f"Could not parse date: {timestamp}")
-                    
-                    if start_date <= entry_date <= end_date:
-                        filtered_history.append(entry)
-            except Exception as e:
-                # Log the error but continue processing other entries
-                print(f"Error parsing timestamp '{entry.get('timestamp', '')}': {str(e)}")
-                errors.append(entry)
+        # Entries are compared by day: from the first whole day at or after
+        # start_date to the end of end_date's day
+        since = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+        if since < start_date:
+            since += timedelta(days=1)
+        until = end_date.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1, microseconds=-1)
+        history = checkout_manager.get_checkout_history(since=since, until=until)
         
-        if errors:
-            print(f"Warning: {len(errors)} entries had invalid timestamps and were excluded from the report.")
-            
-        history = filtered_history
+        untimed = checkout_manager.history_index.untimed_count
+        if untimed:
+            print(f"Warning: {untimed} entries had invalid timestamps and were excluded from the report.")
+    else:
+        history = checkout_manager.get_checkout_history()
     
     return {
         'title': 'Equipment Checkout Report',
@@ -2,8 +2,8 @@
 Ticket and QR code landing page routes
 """
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
-from app import equipment_manager, checkout_manager, csrf
-from app.models.ticket import TicketManager, TicketStatus, TicketPriority, TicketType, EquipmentCondition
+from app import equipment_manager, checkout_manager, ticket_manager, csrf
+from app.models.ticket import TicketStatus, TicketPriority, TicketType, EquipmentCondition
 import functools
 import qrcode
 import io
@@ -12,9 +12,6 @@ from datetime import datetime
 
 bp = Blueprint('ticket', __name__, url_prefix='/ticket')
 
-# Initialize ticket manager
-ticket_manager = TicketManager()
-
 def login_required(view):
     """View decorator that redirects anonymous users to the login page."""
     @functools.wraps(view)
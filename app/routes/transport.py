@@ -2,9 +2,9 @@
 Transport request routes for equipment movement management
 """
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
-from app import equipment_manager, checkout_manager, csrf
+from app import equipment_manager, checkout_manager, transport_manager, csrf
 from app.models.transport_request import (
-    TransportManager, TransportStatus, TransportPriority, 
+    TransportStatus, TransportPriority, 
     TransportType, TransportRequest
 )
 import functools
@@ -13,9 +13,6 @@ import uuid
 
 bp = Blueprint('transport', __name__, url_prefix='/transport')
 
-# Initialize transport manager
-transport_manager = TransportManager()
-
 def login_required(view):
     """View decorator that redirects anonymous users to the login page."""
     @functools.wraps(view)
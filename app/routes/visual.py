@@ -2,7 +2,7 @@
 Visual dashboard routes for equipment status visualization
 """
 from flask import Blueprint, render_template, request, jsonify, session
-from app import equipment_manager, checkout_manager
+from app import equipment_manager, checkout_manager, equipment_view
 import random
 import functools
 
@@ -104,9 +104,9 @@ def api_equipment():
             node['size'] = max(15, min(40, 15 + node['count'] * 1.5))
     
     # Add equipment nodes
-    for item in equipment_list:
+    for item, row in zip(equipment_list, equipment_view.rows(equipment_list)):
         # Get equipment status
-        status = checkout_manager.get_equipment_status(item.get('id'))
+        status = row.status
         
         # Determine node color by status
         status_color = '#28a745'  # Default: green for 'In Storage'
@@ -150,14 +150,8 @@ def api_equipment():
 @bp.route('/api/equipment/status')
 def api_equipment_status():
     """API endpoint to get equipment status summary for visualization."""
-    # Get all status counts
-    status_counts = {status: 0 for status in checkout_manager.STATUS_OPTIONS}
-    
-    # Count equipment by status
-    for equipment_id in checkout_manager.equipment_status:
-        status = checkout_manager.equipment_status[equipment_id].get('status')
-        if status in status_counts:
-            status_counts[status] += 1
+    # Get all status counts from the maintained status counters
+    status_counts = checkout_manager.get_status_counts(equipment_manager.get_equipment_ids())
     
     # Format for visualization
     result = []
@@ -184,16 +178,12 @@ def api_equipment_status():
 @bp.route('/api/equipment/category')
 def api_equipment_category():
     """API endpoint to get equipment counts by category."""
-    # Get all equipment
-    equipment_list = equipment_manager.get_all_equipment()
-    
-    # Count equipment by category
-    category_counts = {}
-    for item in equipment_list:
-        category = item.get('category', 'Unknown')
-        if category not in category_counts:
-            category_counts[category] = 0
-        category_counts[category] += 1
+    # Count equipment by category from the maintained facet counters
+    facets = equipment_view.facets()
+    category_counts = dict(facets['category'])
+    uncategorized = facets['total'] - sum(category_counts.values())
+    if uncategorized:
+        category_counts['Unknown'] = category_counts.get('Unknown', 0) + uncategorized
     
     # Format for visualization
     result = []
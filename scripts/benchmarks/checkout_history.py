@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Checkout history benchmark.
+
+Builds a synthetic checkout history (one million entries by default, over
+5,000 pieces of equipment and 200 users, about 1% of them recorded out of
+timestamp order) and times the lookups the history pages make through
+JsonCheckoutManager.get_checkout_history:
+
+  - equipment:  all entries of one piece of equipment (equipment detail page)
+  - equip_10:   its 10 newest entries (detail page with transport)
+  - user:       all entries of one user (my checkouts page)
+  - equip_user: one user's entries for one piece of equipment
+  - recent_10:  the 10 newest entries overall (checkout index page)
+  - week:       the entries of one week (checkout report over a date range)
+
+The baseline is the previous implementation: filter the whole log, then
+sort the matches by timestamp; for the week, parse every timestamp of the
+log and keep those in the range, as the report builders did. The time to index the whole log (done when
+it is loaded) and to index one appended entry are reported as well.
+
+The app package is mapped without running app/__init__ (which starts Flask),
+so only the checkout modules are imported.
+
+Usage:
+  python scripts/benchmarks/checkout_history.py [--entries 1000000] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import types
+from datetime import datetime, timedelta
+
+base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+app_package = types.ModuleType('app')
+app_package.__path__ = [os.path.join(base_dir, 'app')]
+sys.modules['app'] = app_package
+sys.path.insert(0, base_dir)
+
+from app.models.json_checkout import JsonCheckoutManager
+from app.models.storage import JsonStorageBackend
+
+EQUIPMENT_COUNT = 5000
+USER_COUNT = 200
+
+
+def make_history(count, seed=7):
+    """Build history entries shaped like the ones JsonCheckoutManager records."""
+    rng = random.Random(seed)
+    started = datetime(2020, 1, 1)
+    history = []
+    for i in range(count):
+        timestamp = started + timedelta(seconds=i * 60)
+        if rng.random() < 0.01:
+            # Recorded late, e.g. by another worker
+            timestamp -= timedelta(minutes=rng.randint(1, 600))
+        history.append({
+            "id": f"hist-{i:07d}",
+            "equipment_id": f"EQ-{rng.randrange(EQUIPMENT_COUNT):05d}",
+            "timestamp": timestamp.isoformat(),
+            "previous_status": "In Storage",
+            "new_status": "Checked Out",
+            "previous_location": "Vault",
+            "new_location": f"Room {i % 40}",
+            "user": f"user{rng.randrange(USER_COUNT):03d}",
+            "notes": None,
+        })
+    return history
+
+
+def legacy_history(history, equipment_id=None, user=None, limit=None):
+    """The previous get_checkout_history: filter the whole log, then sort it."""
+    if equipment_id:
+        history = [record for record in history if record.get("equipment_id") == equipment_id]
+    if user:
+        history = [record for record in history if record.get("user") == user]
+    history = sorted(history, key=lambda x: x.get("timestamp", ""), reverse=True)
+    if limit and isinstance(limit, int) and limit > 0:
+        history = history[:limit]
+    return history
+
+
+def legacy_between(history, since, until):
+    """The previous report filter: parse every timestamp, keep those in the range."""
+    matches = [entry for entry in history if since <= datetime.fromisoformat(entry["timestamp"]) <= until]
+    return sorted(matches, key=lambda x: x.get("timestamp", ""), reverse=True)
+
+
+def best_of(repeat, func):
+    """Run func repeat times and return the fastest time in seconds and the last result."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    """Run the benchmark and print a timing table."""
+    parser = argparse.ArgumentParser(description="Benchmark checkout history lookups")
+    parser.add_argument('--entries', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    history = make_history(args.entries)
+    with tempfile.TemporaryDirectory() as data_dir:
+        manager = JsonCheckoutManager(data_dir, storage=JsonStorageBackend(data_dir))
+
+        started = time.perf_counter()
+        manager.checkout_history = history
+        print(f"Indexed {len(history)} entries in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+        # A piece of equipment and a user that appear together in the log
+        sample = history[len(history) // 2]
+        queries = {
+            'equipment': {'equipment_id': sample['equipment_id']},
+            'equip_10': {'equipment_id': sample['equipment_id'], 'limit': 10},
+            'user': {'user': sample['user']},
+            'equip_user': {'equipment_id': sample['equipment_id'], 'user': sample['user']},
+            'recent_10': {'limit': 10},
+        }
+        print(f"{'query':10s} {'rows':>6s} {'baseline ms':>12s} {'indexed ms':>11s} {'speedup':>8s}")
+        for name, kwargs in queries.items():
+            legacy_seconds, legacy_result = best_of(max(1, args.repeat // 2), lambda: legacy_history(history, **kwargs))
+            indexed_seconds, indexed_result = best_of(args.repeat, lambda: manager.get_checkout_history(**kwargs))
+            assert [entry['id'] for entry in indexed_result] == [entry['id'] for entry in legacy_result], name
+            print(f"{name:10s} {len(indexed_result):6d} {legacy_seconds * 1000:12.1f} {indexed_seconds * 1000:11.3f} "
+                  f"{legacy_seconds / indexed_seconds:7.0f}x")
+
+        since = datetime(2020, 1, 1) + timedelta(seconds=len(history) * 30)
+        until = since + timedelta(days=7)
+        legacy_seconds, legacy_result = best_of(1, lambda: legacy_between(history, since, until))
+        indexed_seconds, indexed_result = best_of(args.repeat, lambda: manager.get_checkout_history(since=since, until=until))
+        assert sorted(entry['id'] for entry in indexed_result) == sorted(entry['id'] for entry in legacy_result), 'week'
+        print(f"{'week':10s} {len(indexed_result):6d} {legacy_seconds * 1000:12.1f} {indexed_seconds * 1000:11.3f} "
+              f"{legacy_seconds / indexed_seconds:7.0f}x")
+
+        # Indexing one new entry (the storage append is not included)
+        entry = dict(history[-1], id='hist-new', timestamp=datetime(2030, 1, 1).isoformat())
+        started = time.perf_counter()
+        manager.history_index.add(entry)
+        print(f"{'append':10s} {'':6s} {'':12s} {(time.perf_counter() - started) * 1000:11.3f}")
+
+
+if __name__ == '__main__':
+    main()
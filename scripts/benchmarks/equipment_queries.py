@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Equipment query benchmark.
+
+Builds a synthetic equipment dataset, loads it with JsonEquipmentDataManager
+and times the getters the pages call on nearly every request:
+get_all_equipment, get_equipment_by_category, get_equipment_by_location
+(substring, exact and prefix), manufacturer lookups and search_equipment
+(free text and a partial serial number), and the calibration queries
+(due soon, a date window, status counts), and sorted pages of
+query_equipment (the first 50 records by manufacturer, and a filtered page
+sorted by model), and a fuzzy lookup of a mistyped serial number (find_similar_equipment,
+against the edit distance to every serial number). The previous DataFrame.iterrows()
+implementation of each getter, or the equivalent pandas filter, is timed on
+the same data as a baseline; the calibration baselines scan every record and
+compare its parsed due date, as the getters did before the date index. Search results are ranked, so they are compared
+to the baseline as sets; free-text search matches words rather than the
+whole phrase, so it must return at least the baseline's records. The fuzzy
+lookup must find serial numbers as close to the typo as the full scan's
+closest (several are equally close in the dense synthetic serials).
+
+Usage:
+  python scripts/benchmarks/equipment_queries.py [--records 10000 100000] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, base_dir)
+
+from app.models.json_equipment import JsonEquipmentDataManager
+from app.models.storage import JsonStorageBackend
+from app.models.calibration_dates import parse_calibration_date
+from app.models.equipment_fuzzy import compact, edit_distance
+
+CATEGORIES = ['Chamber', 'Electrometer', 'Survey Meter', 'Phantom', 'Diode']
+WINDOW = (datetime(2025, 3, 1), datetime(2025, 8, 31))
+# Serial number of EQ-001234 (SN0772019) with two digits swapped
+TYPO_SERIAL = 'SN0770219'
+
+
+def make_equipment(count):
+    """Build equipment records shaped like app/data/equipment.json."""
+    return [
+        {
+            'id': f"EQ-{i:06d}",
+            'category': CATEGORIES[i % len(CATEGORIES)],
+            'equipment_type': f"Type {i % 40}",
+            'manufacturer': f"Manufacturer {i % 25}",
+            'model': f"Model {i % 300}",
+            'serial_number': f"SN{i * 7919 % 1000003:07d}",
+            'location': f"Room {i % 120}",
+            'calibration_due_date': f"{(i % 12) + 1:02d}/{datetime.now().year - 1 + i % 4}",
+            'notes': 'Periodic QA device' if i % 3 else '',
+        }
+        for i in range(count)
+    ]
+
+
+def iterrows_records(df):
+    """Previous conversion of a DataFrame into record dicts."""
+    result = []
+    for idx, row in df.iterrows():
+        item_dict = row.to_dict()
+        item_dict['id'] = idx
+        result.append(item_dict)
+    return result
+
+
+def legacy_queries(manager):
+    """The previous pandas implementation of each getter."""
+    df = manager.all_equipment_df
+
+    def search(query):
+        mask = False
+        for col in ['manufacturer', 'model', 'serial_number', 'location', 'notes', 'equipment_type']:
+            if col in df.columns:
+                mask = mask | df[col].astype(str).str.lower().str.contains(query.lower(), na=False)
+        return iterrows_records(df[mask])
+
+    def calibration_scan(predicate):
+        now = datetime.now()
+        result = []
+        for item in iterrows_records(df):
+            parsed = parse_calibration_date(item.get('calibration_due_date'))
+            if parsed.due is not None and predicate(parsed.due, now):
+                result.append(item)
+        return result
+
+    def fuzzy():
+        typo = compact(TYPO_SERIAL)
+        distances = df['serial_number'].map(lambda serial: edit_distance(typo, compact(serial)))
+        return iterrows_records(df.loc[distances.nsmallest(5, keep='first').index])
+
+    def status_counts():
+        counts = {'current': 0, 'due_soon': 0, 'overdue': 0, 'unknown': 0}
+        now = datetime.now()
+        for value in df['calibration_due_date']:
+            counts[parse_calibration_date(value).status(now)[0]] += 1
+        return counts
+
+    return {
+        'all': lambda: iterrows_records(df),
+        'category': lambda: iterrows_records(df[df['category'] == 'Chamber']),
+        'location': lambda: iterrows_records(df[df['location'].str.contains('room 1', case=False, na=False)]),
+        'loc_exact': lambda: iterrows_records(df[df['location'].str.lower() == 'room 17']),
+        'loc_prefix': lambda: iterrows_records(df[df['location'].str.lower().str.startswith('room 11', na=False)]),
+        'maker': lambda: iterrows_records(df[df['manufacturer'] == 'Manufacturer 7']),
+        'search': lambda: search('manufacturer 7'),
+        'serial': lambda: iterrows_records(df[df['serial_number'].str.contains('12345', case=False, na=False)]),
+        'due_soon': lambda: calibration_scan(lambda due, now: (due - now).days <= 30),
+        'cal_window': lambda: calibration_scan(lambda due, now: WINDOW[0] <= due <= WINDOW[1]),
+        'cal_counts': status_counts,
+        'page': lambda: iterrows_records(df.sort_values('manufacturer', kind='stable').head(50)),
+        'page_filt': lambda: iterrows_records(
+            df[(df['category'] == 'Chamber') & (df['location'] == 'Room 10')].sort_values('model', kind='stable').head(50)),
+        'fuzzy': fuzzy,
+    }
+
+
+def cached_queries(manager):
+    """The current getters."""
+    return {
+        'all': manager.get_all_equipment,
+        'category': lambda: manager.get_equipment_by_category('Chamber'),
+        'location': lambda: manager.get_equipment_by_location('room 1'),
+        'loc_exact': lambda: manager.get_equipment_by_location('room 17', match='exact'),
+        'loc_prefix': lambda: manager.get_equipment_by_location('room 11', match='prefix'),
+        'maker': lambda: manager.lookup_equipment('manufacturer', 'Manufacturer 7'),
+        'search': lambda: manager.search_equipment('manufacturer 7'),
+        'serial': lambda: manager.search_equipment('sn:12345'),
+        'due_soon': manager.get_calibration_due_soon,
+        'cal_window': lambda: manager.filter_by_calibration_date(*WINDOW),
+        'cal_counts': manager.get_calibration_status_counts,
+        'page': lambda: manager.query_equipment(sort='manufacturer', limit=50)[1],
+        'page_filt': lambda: manager.query_equipment(
+            filters={'category': ['Chamber'], 'location': ['^Room 10$']}, sort='model', limit=50)[1],
+        'fuzzy': lambda: [item for item, _ in manager.find_similar_equipment(TYPO_SERIAL)],
+    }
+
+
+def check_result(name, cached, legacy):
+    """Assert that a query returned what its baseline returned."""
+    if isinstance(cached, dict):
+        assert cached == legacy, name
+        return
+    cached_ids = [item['id'] for item in cached]
+    legacy_ids = [item['id'] for item in legacy]
+    if name == 'search':
+        assert set(legacy_ids) <= set(cached_ids), name
+    elif name == 'fuzzy':
+        closest = lambda items: min(edit_distance(compact(TYPO_SERIAL), compact(item['serial_number'])) for item in items)
+        assert closest(cached) == closest(legacy), name
+    elif name == 'serial':
+        assert sorted(cached_ids) == sorted(legacy_ids), name
+    else:
+        assert cached_ids == legacy_ids, name
+
+
+def best_of(repeat, func):
+    """Run func repeat times and return the fastest time in seconds and the last result."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    """Run the benchmark and print a timing table."""
+    parser = argparse.ArgumentParser(description="Benchmark equipment manager queries")
+    parser.add_argument('--records', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'records':>8s} {'query':10s} {'rows':>7s} {'baseline ms':>12s} {'cached ms':>10s} {'speedup':>8s}")
+    for count in args.records:
+        with tempfile.TemporaryDirectory() as data_dir:
+            with open(os.path.join(data_dir, 'equipment.json'), 'w') as f:
+                json.dump(make_equipment(count), f)
+
+            started = time.perf_counter()
+            manager = JsonEquipmentDataManager(data_dir, storage=JsonStorageBackend(data_dir))
+            print(f"{count:8d} {'load':10s} {count:7d} {'':>12s} {(time.perf_counter() - started) * 1000:10.1f}")
+
+            legacy = legacy_queries(manager)
+            for name, query in cached_queries(manager).items():
+                legacy_seconds, legacy_result = best_of(max(1, args.repeat // 2), legacy[name])
+                cached_seconds, cached_result = best_of(args.repeat, query)
+                check_result(name, cached_result, legacy_result)
+                print(f"{count:8d} {name:10s} {len(cached_result):7d} {legacy_seconds * 1000:12.1f} "
+                      f"{cached_seconds * 1000:10.2f} {legacy_seconds / cached_seconds:7.0f}x")
+
+
+if __name__ == '__main__':
+    main()
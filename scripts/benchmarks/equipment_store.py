@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Equipment store cold-start benchmark.
+
+Measures what one worker pays to bring up the equipment manager: the time to
+import it, the time to load a synthetic equipment file, and the resident
+memory (RSS) of the process afterwards. Each measurement runs in a fresh
+interpreter so imports and memory are not shared between runs.
+
+Two stores are compared on the same file:
+  - baseline: the previous pipeline, which imported pandas, built a DataFrame
+    of every record and turned it back into NaN-filled record dictionaries
+  - compact:  the current JsonEquipmentDataManager, which keeps the stored
+    records (with interned category, manufacturer, location... strings) and
+    only imports pandas when an analytics caller asks for a DataFrame
+
+Both stores build the same search, secondary and calibration indexes.
+
+The app package is mapped without running app/__init__ (which starts Flask),
+so only the equipment modules are imported.
+
+Usage:
+  python scripts/benchmarks/equipment_store.py [--records 10000 100000]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from equipment_queries import make_equipment
+
+# Runs in the child interpreter: prints a JSON line of measurements
+CHILD = r'''
+import json, os, sys, time, types
+
+def rss_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+base_dir, data_dir, mode = sys.argv[1:4]
+app = types.ModuleType('app')
+app.__path__ = [os.path.join(base_dir, 'app')]
+sys.modules['app'] = app
+sys.path.insert(0, base_dir)
+
+started = time.perf_counter()
+if mode == 'baseline':
+    import pandas as pd
+from app.models.json_equipment import FrozenRecord, JsonEquipmentDataManager
+from app.models.storage import JsonStorageBackend
+imported = time.perf_counter()
+
+storage = JsonStorageBackend(data_dir)
+if mode == 'baseline':
+    equipment_data = storage.load('equipment')
+    df = pd.DataFrame(equipment_data)
+    stored = {item['id']: item for item in equipment_data}
+    # The previous manager kept both the stored items and the records
+    records = {equipment_id: FrozenRecord(row, frozenset())
+               for equipment_id, row in df.set_index('id', drop=False).to_dict('index').items()}
+    # Same indexes as the compact store, built by the manager's own code
+    manager = JsonEquipmentDataManager(os.path.join(data_dir, 'missing'),
+                                       storage=JsonStorageBackend(os.path.join(data_dir, 'missing')))
+    for equipment_id, record in records.items():
+        manager._index_record(equipment_id, None, record, bulk=True)
+    manager.calibration_index.rebuild({equipment_id: calibration.due
+                                       for equipment_id, calibration in manager._calibration.items()})
+    count = len(records)
+else:
+    manager = JsonEquipmentDataManager(data_dir, storage=storage)
+    count = len(manager.get_all_equipment())
+loaded = time.perf_counter()
+
+print(json.dumps({
+    'records': count,
+    'import_ms': (imported - started) * 1000,
+    'load_ms': (loaded - imported) * 1000,
+    'rss_mb': rss_mb(),
+    'pandas': 'pandas' in sys.modules,
+}))
+'''
+
+
+def measure(data_dir, mode):
+    """Run one cold start in a fresh interpreter and return its measurements."""
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD, base_dir, data_dir, mode],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    # The manager prints load messages; the measurements are the last line
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def best_of(repeat, data_dir, mode):
+    """Keep the fastest of several cold starts (RSS barely varies)."""
+    runs = [measure(data_dir, mode) for _ in range(repeat)]
+    return min(runs, key=lambda run: run['import_ms'] + run['load_ms'])
+
+
+def main():
+    """Run the benchmark and print a table."""
+    parser = argparse.ArgumentParser(description="Benchmark equipment store cold start and memory")
+    parser.add_argument('--records', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'records':>8s} {'store':9s} {'import ms':>10s} {'load ms':>9s} {'total ms':>9s} {'RSS MB':>8s} {'pandas':>7s}")
+    for count in args.records:
+        with tempfile.TemporaryDirectory() as data_dir:
+            with open(os.path.join(data_dir, 'equipment.json'), 'w') as f:
+                json.dump(make_equipment(count), f)
+
+            results = {mode: best_of(args.repeat, data_dir, mode) for mode in ('baseline', 'compact')}
+            for mode, result in results.items():
+                assert result['records'] == count, mode
+                print(f"{count:8d} {mode:9s} {result['import_ms']:10.1f} {result['load_ms']:9.1f} "
+                      f"{result['import_ms'] + result['load_ms']:9.1f} {result['rss_mb']:8.1f} "
+                      f"{'yes' if result['pandas'] else 'no':>7s}")
+            baseline, compact = results['baseline'], results['compact']
+            print(f"{count:8d} {'saving':9s} {'':>10s} {'':>9s} "
+                  f"{baseline['import_ms'] + baseline['load_ms'] - compact['import_ms'] - compact['load_ms']:9.1f} "
+                  f"{baseline['rss_mb'] - compact['rss_mb']:8.1f}")
+
+
+if __name__ == '__main__':
+    main()
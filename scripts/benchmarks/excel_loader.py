@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Excel equipment loader benchmark.
+
+Writes a synthetic pair of workbooks laid out like the ones in Resources/
+(a Chambers and an Electrometers sheet in one file, a Survey Meters sheet in
+the other; a title row, column names on the third row) with 50k equipment
+rows in total, and times EquipmentDataManager's loading steps:
+
+  - clean:    _clean_dataframe on the three sheets once they are read. The
+              baseline is the previous per-row pipeline: the id built by a
+              lambda per row (apply(axis=1)) and raw_data by dropna().to_dict()
+              and json.dumps per row. The baseline gets the two fixes made
+              with the rewrite (the category of every row, and raw_data
+              aligned with its row) so the results can be compared.
+  - parse:    reading and cleaning all three sheets. The baseline reads each
+              sheet with its own read_excel call (the chambers workbook is
+              opened twice) and cleans it with the per-row pipeline; the
+              current loader opens each workbook once, and parses the two
+              workbooks in worker processes when more than one CPU is available.
+  - snapshot: a later load, from the binary snapshot of the parsed sheets.
+
+The app package is mapped without running app/__init__ (which starts Flask),
+so only the equipment modules are imported.
+
+Usage:
+  python scripts/benchmarks/excel_loader.py [--rows 50000] [--repeat 3]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import types
+from datetime import datetime, timedelta
+
+base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+app_package = types.ModuleType('app')
+app_package.__path__ = [os.path.join(base_dir, 'app')]
+sys.modules['app'] = app_package
+sys.path.insert(0, base_dir)
+
+import openpyxl
+import pandas as pd
+from app.models import equipment
+from app.models.equipment import EquipmentDataManager, CATEGORY_NAMES
+from app.models.json_utils import DateTimeEncoder
+
+COLUMNS = ['Type', 'Manufacturer', 'Model', 'SN', 'Location', 'Cal Due Date', 'Comments']
+MANUFACTURERS = ['PTW', 'Standard Imaging', 'Sun Nuclear', 'IBA Dosimetry', 'Radcal', 'Fluke Biomedical']
+
+# Share of the rows in each sheet
+SHEET_SHARES = {'Chambers': 0.4, 'Electrometers': 0.2, 'Survey Meters': 0.4}
+
+
+def write_workbook(file_path, sheets, start=0):
+    """Write a workbook of synthetic equipment sheets.
+
+    Args:
+        file_path: Path of the workbook to write
+        sheets: Mapping of sheet name -> number of equipment rows
+        start: Number of the first row, to keep serial numbers distinct
+    """
+    workbook = openpyxl.Workbook(write_only=True)
+    base_date = datetime(2025, 1, 1)
+    number = start
+    for sheet_name, rows in sheets.items():
+        sheet = workbook.create_sheet(sheet_name)
+        sheet.append([f"Physics Equipment List - {sheet_name}"])
+        sheet.append([])
+        sheet.append(COLUMNS + (['Chk Source'] if sheet_name == 'Survey Meters' else []))
+        sheet.append([])
+        for _ in range(rows):
+            row = [
+                f"{sheet_name[:-1].lower()} type {number % 7}",
+                MANUFACTURERS[number % len(MANUFACTURERS)],
+                f"Model {number % 90}",
+                f"{number % 100:02d}-{number:06d}",
+                f"Room {number % 40}",
+                base_date + timedelta(days=number % 700),
+                'Annual calibration required' if number % 4 == 0 else None,
+            ]
+            if sheet_name == 'Survey Meters':
+                row.append('Cs-137' if number % 2 else None)
+            sheet.append(row)
+            number += 1
+    workbook.save(file_path)
+    return number
+
+
+def legacy_clean_dataframe(df, equipment_type):
+    """The previous per-row cleaning, with the category and raw_data fixes."""
+    df = df.dropna(how='all')
+    new_df = pd.DataFrame(index=df.index)
+    new_df['category'] = CATEGORY_NAMES[equipment_type]
+    for excel_col, model_col in EquipmentDataManager.COLUMN_MAPPING[equipment_type].items():
+        new_df[model_col] = df[excel_col] if excel_col in df.columns else None
+    new_df['id'] = new_df.apply(
+        lambda row: f"{row['category']}-{str(row.get('manufacturer', '')).replace(' ', '_')}-{str(row.get('serial_number', '')).replace(' ', '_')}",
+        axis=1
+    )
+    new_df['raw_data'] = df.apply(lambda x: json.dumps(x.dropna().to_dict(), cls=DateTimeEncoder), axis=1)
+    return new_df.set_index('id')
+
+
+def legacy_parse(manager):
+    """The previous loading: one read_excel call per sheet, per-row cleaning."""
+    frames = []
+    for file_path, sheets in manager._workbook_jobs():
+        for sheet_name, equipment_type in sheets:
+            raw = pd.read_excel(file_path, sheet_name=sheet_name)
+            raw.columns = raw.iloc[1]
+            frames.append(legacy_clean_dataframe(raw.iloc[3:].reset_index(drop=True), equipment_type))
+    return tuple(frames)
+
+
+def read_raw_sheets(manager):
+    """Read the three sheets, with their column names set and title rows skipped."""
+    raw_sheets = []
+    for file_path, sheets in manager._workbook_jobs():
+        for sheet_name, equipment_type in sheets:
+            raw = pd.read_excel(file_path, sheet_name=sheet_name)
+            raw.columns = raw.iloc[1]
+            raw_sheets.append((raw.iloc[3:].reset_index(drop=True), equipment_type))
+    return raw_sheets
+
+
+def best_of(repeat, func):
+    """Run func repeat times and return the fastest time in seconds and the last result."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def check_frames(current, legacy):
+    """Assert that both pipelines produced the same DataFrames."""
+    for current_df, legacy_df in zip(current, legacy):
+        pd.testing.assert_frame_equal(current_df, legacy_df, check_dtype=False)
+
+
+def main():
+    """Run the benchmark and print a timing table."""
+    parser = argparse.ArgumentParser(description="Benchmark the Excel equipment loader")
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        manager = EquipmentDataManager(data_dir, snapshot_path=os.path.join(data_dir, 'snapshot.pickle'))
+        # openpyxl writes .xlsx files; the loader takes the workbook paths from these attributes
+        manager.chambers_file = os.path.join(data_dir, 'chambers.xlsx')
+        manager.survey_meters_file = os.path.join(data_dir, 'survey_meters.xlsx')
+        rows = {name: int(args.rows * share) for name, share in SHEET_SHARES.items()}
+        started = time.perf_counter()
+        number = write_workbook(manager.chambers_file, {name: rows[name] for name in ('Chambers', 'Electrometers')})
+        write_workbook(manager.survey_meters_file, {'Survey Meters': rows['Survey Meters']}, start=number)
+        print(f"Wrote {sum(rows.values())} rows in {time.perf_counter() - started:.1f} s")
+
+        raw_sheets = read_raw_sheets(manager)
+        legacy_seconds, legacy_frames = best_of(args.repeat, lambda: tuple(
+            legacy_clean_dataframe(df, equipment_type) for df, equipment_type in raw_sheets))
+        current_seconds, current_frames = best_of(args.repeat, lambda: tuple(
+            EquipmentDataManager._clean_dataframe(df, equipment_type) for df, equipment_type in raw_sheets))
+        check_frames(current_frames, legacy_frames)
+
+        print(f"{'step':10s} {'baseline ms':>12s} {'current ms':>11s} {'speedup':>8s}")
+        print(f"{'clean':10s} {legacy_seconds * 1000:12.1f} {current_seconds * 1000:11.1f} "
+              f"{legacy_seconds / current_seconds:7.1f}x")
+
+        equipment.PARALLEL_PARSE_MIN_BYTES = 0
+        parallel = equipment._parse_in_parallel([manager.chambers_file, manager.survey_meters_file])
+        legacy_seconds, legacy_frames = best_of(1, lambda: legacy_parse(manager))
+        current_seconds, current_frames = best_of(1, lambda: manager._parse_workbooks(parallel=True))
+        check_frames(current_frames, legacy_frames)
+        print(f"{'parse':10s} {legacy_seconds * 1000:12.1f} {current_seconds * 1000:11.1f} "
+              f"{legacy_seconds / current_seconds:7.1f}x")
+
+        manager.load_data()
+        snapshot_seconds, _ = best_of(args.repeat, manager.load_data)
+        print(f"{'snapshot':10s} {'':>12s} {snapshot_seconds * 1000:11.1f} "
+              f"{legacy_seconds / snapshot_seconds:7.1f}x")
+        if not parallel:
+            print("(one CPU available: the workbooks were parsed in this process)")
+
+
+if __name__ == '__main__':
+    main()
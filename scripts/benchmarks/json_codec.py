@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+JSON load/save throughput benchmark.
+
+Writes and reads synthetic equipment and ticket datasets with every JSON
+codec available (orjson, standard library) through save_json/load_json, and
+with the previous implementation (deep copy with json_safe_copy before
+dumping, a regex-style object_hook guessing datetimes on load) as a baseline.
+
+Usage:
+  python scripts/benchmarks/json_codec.py [--records 10000 100000] [--repeat 3]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, base_dir)
+
+from app.models import json_utils
+from app.models.json_utils import save_json, load_json, json_safe_copy, DateTimeEncoder, set_codec
+
+TICKET_DATE_FIELDS = ('created_at', 'updated_at', 'resolved_at', 'closed_at')
+
+
+def make_equipment(count):
+    """Build equipment records shaped like app/data/equipment.json."""
+    categories = ['Chamber', 'Electrometer', 'Survey Meter', 'Phantom', 'Diode']
+    return [
+        {
+            'id': f"EQ-{i:06d}",
+            'category': categories[i % len(categories)],
+            'type': f"Type {i % 40}",
+            'manufacturer': f"Manufacturer {i % 25}",
+            'model': f"Model {i % 300}",
+            'serial_number': f"SN{i * 7919 % 1000003:07d}",
+            'location': f"Room {i % 120}",
+            'calibration_date': f"{(i % 12) + 1:02d}/{2020 + i % 6}",
+            'notes': 'Periodic QA device' if i % 3 else '',
+        }
+        for i in range(count)
+    ]
+
+
+def make_tickets(count):
+    """Build ticket records with real datetime values."""
+    start = datetime(2024, 1, 1, 8, 30)
+    return [
+        {
+            'id': str(uuid.UUID(int=i)),
+            'equipment_id': f"EQ-{i % 5000:06d}",
+            'title': f"Ticket {i}",
+            'description': 'Connector is loose and needs to be replaced',
+            'status': 'open' if i % 4 else 'closed',
+            'created_at': start + timedelta(minutes=i),
+            'updated_at': start + timedelta(minutes=i, seconds=30),
+            'resolved_at': None,
+            'closed_at': start + timedelta(days=1, minutes=i) if i % 4 == 0 else None,
+            'comments': [],
+        }
+        for i in range(count)
+    ]
+
+
+class LegacyDateTimeDecoder(json.JSONDecoder):
+    """The datetime-guessing decoder save/load_json used to apply to every object."""
+
+    def __init__(self, *args, **kwargs):
+        json.JSONDecoder.__init__(self, object_hook=self.object_hook, *args, **kwargs)
+
+    def object_hook(self, obj):
+        for key, value in obj.items():
+            if isinstance(value, str):
+                try:
+                    if 'T' in value and ('+' in value or 'Z' in value or '-' in value[10:]):
+                        obj[key] = datetime.fromisoformat(value.replace('Z', '+00:00'))
+                except (ValueError, TypeError):
+                    pass
+        return obj
+
+
+def legacy_save(data, path, date_fields=None):
+    """Previous save_json: deep copy, then json.dump in place."""
+    with open(path, 'w') as f:
+        json.dump(json_safe_copy(data), f, cls=DateTimeEncoder, indent=2)
+
+
+def legacy_load(path, date_fields=None):
+    """Previous load_json."""
+    with open(path, 'r') as f:
+        return json.load(f, cls=LegacyDateTimeDecoder)
+
+
+def best_of(repeat, func):
+    """Run func repeat times and return the fastest time in seconds."""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def main():
+    """Run the benchmark and print a throughput table."""
+    parser = argparse.ArgumentParser(description="Benchmark JSON load/save throughput")
+    parser.add_argument('--records', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    implementations = [('legacy', legacy_save, legacy_load)]
+    for name in ['json', 'orjson']:
+        if name == 'orjson' and not json_utils.ORJSON_AVAILABLE:
+            print("orjson is not installed; skipping it")
+            continue
+        implementations.append((name, save_json, load_json))
+
+    print(f"{'dataset':10s} {'records':>8s} {'codec':8s} {'MiB':>7s} {'save ms':>9s} {'load ms':>9s} {'save MiB/s':>11s} {'load MiB/s':>11s}")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for count in args.records:
+            for dataset, data, date_fields in [
+                ('equipment', make_equipment(count), None),
+                ('tickets', make_tickets(count), TICKET_DATE_FIELDS),
+            ]:
+                for name, save, load in implementations:
+                    if name != 'legacy':
+                        set_codec(name)
+                    path = os.path.join(temp_dir, f"{dataset}_{count}_{name}.json")
+                    save_seconds = best_of(args.repeat, lambda: save(data, path))
+                    load_seconds = best_of(args.repeat, lambda: load(path, date_fields=date_fields))
+                    size = os.path.getsize(path) / (1024 * 1024)
+                    print(f"{dataset:10s} {count:8d} {name:8s} {size:7.1f} {save_seconds * 1000:9.1f} "
+                          f"{load_seconds * 1000:9.1f} {size / save_seconds:11.1f} {size / load_seconds:11.1f}")
+    set_codec()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the data managers.
+
+Imports the Flask application and reports how long that took, the memory
+allocated while importing, how many instances of each manager class exist
+and whether the blueprints share them. Run it before and after changes to
+how the managers are created.
+
+Usage:
+  python scripts/benchmarks/manager_registry.py [--touch]
+
+Options:
+  --touch    Use every manager once so the lazily created ones are loaded too
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, base_dir)
+os.chdir(base_dir)
+
+MANAGER_CLASSES = [
+    'JsonEquipmentDataManager',
+    'JsonCheckoutManager',
+    'StandardValuesManager',
+    'TicketManager',
+    'TransportManager',
+]
+
+
+def count_instances():
+    """Count live instances of each manager class."""
+    counts = {name: 0 for name in MANAGER_CLASSES}
+    for obj in gc.get_objects():
+        name = type(obj).__name__
+        if name in counts:
+            counts[name] += 1
+    return counts
+
+
+def unwrap(manager):
+    """Get the object behind a proxy; plain instances are returned as-is."""
+    return getattr(manager, '_get_current_object', lambda: manager)()
+
+
+def main():
+    """Import the application and print startup measurements."""
+    parser = argparse.ArgumentParser(description="Measure data manager startup cost")
+    parser.add_argument('--touch', action='store_true', help='Load every manager after import')
+    args = parser.parse_args()
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    import app
+    import_seconds = time.perf_counter() - started
+    _, import_peak = tracemalloc.get_traced_memory()
+
+    if args.touch:
+        app.equipment_manager.get_all_equipment()
+        app.checkout_manager.get_checked_out_equipment()
+        app.standard_values_manager.get_categories()
+        app.ticket_manager.get_all_tickets()
+        app.transport_manager.get_all_transport_requests()
+    total_seconds = time.perf_counter() - started
+    _, total_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"import app:           {import_seconds * 1000:8.1f} ms, peak {import_peak / 1024:10.1f} KiB")
+    print(f"import app + use:     {total_seconds * 1000:8.1f} ms, peak {total_peak / 1024:10.1f} KiB")
+
+    print("\nManager instances:")
+    for name, count in count_instances().items():
+        print(f"  {name:26s} {count}")
+
+    # Every blueprint should see the same object
+    from app.routes import dashboard, ticket, qr_access, equipment_landing, transport, qr_transport
+    ticket_ids = {id(unwrap(module.ticket_manager))
+                  for module in (dashboard, ticket, qr_access, equipment_landing)}
+    transport_ids = {id(unwrap(module.transport_manager))
+                     for module in (dashboard, transport, qr_transport)}
+    print(f"\nDistinct ticket managers seen by blueprints:    {len(ticket_ids)}")
+    print(f"Distinct transport managers seen by blueprints: {len(transport_ids)}")
+
+    registry = getattr(app, 'managers', None)
+    if registry is not None:
+        print("\nRegistry:")
+        for name, info in registry.stats().items():
+            loaded = f"{info['init_seconds'] * 1000:.1f} ms" if info['loaded'] else 'not loaded'
+            print(f"  {name:16s} {loaded}")
+
+
+if __name__ == '__main__':
+    main()
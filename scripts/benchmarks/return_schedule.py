@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Expected-return schedule benchmark.
+
+Builds a synthetic status dataset (100,000 pieces of equipment by default,
+half of them checked out, expected back from two days ago to thirty days
+from now) and times the lookups made through JsonCheckoutManager:
+
+  - overdue:   get_overdue_equipment (checkout page, checkout reports)
+  - due_24h:   the equipment due back in the next 24 hours
+  - next_due:  the next return due (when to run a reminder job)
+
+The baseline is the previous implementation: scan every status entry and
+parse its expected_return (for overdue, the previous get_overdue_equipment).
+The time to record one checkout is reported as well.
+
+The app package is mapped without running app/__init__ (which starts Flask),
+so only the checkout modules are imported.
+
+Usage:
+  python scripts/benchmarks/return_schedule.py [--equipment 100000] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import types
+from datetime import datetime, timedelta
+
+base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+app_package = types.ModuleType('app')
+app_package.__path__ = [os.path.join(base_dir, 'app')]
+sys.modules['app'] = app_package
+sys.path.insert(0, base_dir)
+
+from app.models.json_checkout import JsonCheckoutManager
+from app.models.storage import JsonStorageBackend
+
+
+def make_statuses(count, now, seed=11):
+    """Build status entries shaped like the ones JsonCheckoutManager records."""
+    rng = random.Random(seed)
+    statuses = {}
+    for i in range(count):
+        checked_out = rng.random() < 0.5
+        statuses[f"EQ-{i:06d}"] = {
+            "status": "Checked Out" if checked_out else "In Storage",
+            "location": f"Room {i % 40}",
+            "checked_out_by": f"user{i % 200:03d}" if checked_out else None,
+            "checked_out_time": None,
+            "expected_return": (now + timedelta(hours=rng.uniform(-48, 720))).isoformat() if checked_out else None,
+            "notes": "",
+        }
+    return statuses
+
+
+def scan_due(statuses, since=None, until=None):
+    """The previous lookups: parse every expected return, keep those in the range."""
+    due = []
+    for equipment_id, status in statuses.items():
+        if status.get("status") != "Checked Out" or not status.get("expected_return"):
+            continue
+        try:
+            return_date = datetime.fromisoformat(status["expected_return"])
+        except ValueError:
+            continue
+        if (since is None or since <= return_date) and (until is None or return_date < until):
+            due.append((return_date, equipment_id))
+    return sorted(due)
+
+
+def legacy_overdue(statuses):
+    """The previous get_overdue_equipment: scan and parse every status entry."""
+    now = datetime.now()
+    overdue = []
+    for equipment_id, status in statuses.items():
+        if status.get("status") != "Checked Out":
+            continue
+        expected_return = status.get("expected_return")
+        if not expected_return:
+            continue
+        try:
+            return_date = datetime.fromisoformat(expected_return)
+            if return_date < now:
+                item = status.copy()
+                item["id"] = equipment_id
+                item["days_overdue"] = (now - return_date).days
+                overdue.append(item)
+        except:
+            continue
+    return overdue
+
+
+def best_of(repeat, func):
+    """Run func repeat times and return the fastest time in seconds and the last result."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    """Run the benchmark and print a timing table."""
+    parser = argparse.ArgumentParser(description="Benchmark expected-return lookups")
+    parser.add_argument('--equipment', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    statuses = make_statuses(args.equipment, datetime.now())
+    with tempfile.TemporaryDirectory() as data_dir:
+        manager = JsonCheckoutManager(data_dir, storage=JsonStorageBackend(data_dir))
+
+        started = time.perf_counter()
+        manager.equipment_status = statuses
+        print(f"Scheduled {len(manager.return_schedule)} returns in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+        now = datetime.now()
+        queries = {
+            'overdue': (lambda: legacy_overdue(statuses), manager.get_overdue_equipment),
+            'due_24h': (lambda: scan_due(statuses, since=now, until=now + timedelta(hours=24)),
+                        lambda: manager.return_schedule.due_between(now, now + timedelta(hours=24))),
+            'next_due': (lambda: scan_due(statuses)[:1],
+                         lambda: [manager.get_next_return_due()]),
+        }
+        print(f"{'query':10s} {'rows':>6s} {'baseline ms':>12s} {'heap ms':>11s} {'speedup':>8s}")
+        for name, (baseline, current) in queries.items():
+            baseline_seconds, baseline_result = best_of(max(1, args.repeat // 2), baseline)
+            current_seconds, current_result = best_of(args.repeat, current)
+            ids = lambda result: sorted(row['id'] if isinstance(row, dict) else row[1] for row in result)
+            assert ids(current_result) == ids(baseline_result), name
+            print(f"{name:10s} {len(current_result):6d} {baseline_seconds * 1000:12.1f} {current_seconds * 1000:11.3f} "
+                  f"{baseline_seconds / current_seconds:7.0f}x")
+
+        # Recording one checkout (the storage write is not included)
+        status = dict(statuses['EQ-000000'], status="Checked Out",
+                      expected_return=(now + timedelta(days=1)).isoformat())
+        manager.equipment_status['EQ-000000'] = status
+        started = time.perf_counter()
+        manager.return_schedule.update('EQ-000000', status)
+        print(f"{'checkout':10s} {'':6s} {'':12s} {(time.perf_counter() - started) * 1000:11.3f}")
+
+
+if __name__ == '__main__':
+    main()
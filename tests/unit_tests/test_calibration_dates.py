@@ -0,0 +1,22 @@
+"""
+Test calibration due date normalization
+"""
+from datetime import datetime
+from app.models.calibration_dates import parse_calibration_date
+
+def test_dates_are_normalized_with_diagnostics():
+    """Month-only dates fall due at month end; unreadable text says why"""
+    assert parse_calibration_date('02/2024').due == datetime(2024, 2, 29)
+    assert parse_calibration_date('May 2025').due == datetime(2025, 5, 31)
+    assert parse_calibration_date('05/15/2025').due == datetime(2025, 5, 15)
+
+    repaired = parse_calibration_date('05/2025 - repaired')
+    assert (repaired.due, repaired.format, repaired.note) == (datetime(2025, 5, 31), 'MM/YYYY', 'repaired')
+
+    overdue = parse_calibration_date('Overdue')
+    assert (overdue.due, overdue.flag, overdue.error) == (None, 'overdue', 'unrecognized format')
+    assert parse_calibration_date('13/2025').error == 'invalid date (month 13 out of range)'
+    assert parse_calibration_date(float('nan')).error == 'missing'
+
+    assert parse_calibration_date('06/2025').status(now=datetime(2025, 6, 10)) == ('due_soon', 20)
+    assert parse_calibration_date('06/2025').status(now=datetime(2025, 7, 2))[0] == 'overdue'
@@ -0,0 +1,42 @@
+"""
+Test batch checkout and return of equipment and kits
+"""
+import json
+import os
+from app.models import storage
+from app.models.json_checkout import JsonCheckoutManager
+
+def test_kit_checkout_is_validated_and_written_once(tmp_path, monkeypatch):
+    """A batch is refused as a whole if one item fails, and persisted once otherwise"""
+    checkout_manager = JsonCheckoutManager(str(tmp_path))
+    known = {'EQ-chamber', 'EQ-electrometer', 'EQ-cable', 'EQ-other'}
+    exists = known.__contains__
+    assert not checkout_manager.save_kit('EQ-other', 'Shadowing kit', ['EQ-cable'], equipment_exists=exists)
+    assert checkout_manager.save_kit('KIT-QA', 'Annual QA', ['EQ-chamber', 'EQ-electrometer', 'EQ-cable'],
+                                     equipment_exists=exists)
+
+    checkout_manager.checkout_equipment('EQ-other', 'therapist', 'Room 2')
+    ids, errors = checkout_manager.checkout_many(['KIT-QA', 'EQ-other', 'EQ-missing'], 'physicist', 'Vault',
+                                                 equipment_exists=exists)
+    assert ids == [] and errors == ['EQ-other: already checked out by therapist', 'EQ-missing: equipment not found']
+    assert checkout_manager.get_equipment_status('EQ-chamber')['status'] == 'In Storage'
+
+    # One rewrite of the status file and one append to the history log
+    writes = []
+    for function in ('save_json', 'save_jsonl', 'extend_jsonl', 'append_jsonl'):
+        original = getattr(storage, function)
+        monkeypatch.setattr(storage, function, lambda data, path, _original=original: writes.append(
+            os.path.basename(path)) or _original(data, path))
+
+    ids, errors = checkout_manager.checkout_many(['KIT-QA', 'EQ-cable'], 'physicist', 'Vault', 7, equipment_exists=exists)
+    assert errors == [] and ids == ['EQ-chamber', 'EQ-electrometer', 'EQ-cable']
+    assert sorted(writes) == ['checkout_history.jsonl', 'equipment_status.json']
+    assert all(checkout_manager.get_equipment_status(equipment_id)['status'] == 'Checked Out' for equipment_id in ids)
+    assert len((tmp_path / 'checkout_history.jsonl').read_text().splitlines()) == 4
+
+    ids, errors = checkout_manager.return_many(['KIT-QA'], 'physicist', 'Vault')
+    assert ids == ['EQ-chamber', 'EQ-electrometer', 'EQ-cable'] and errors == []
+    statuses = json.loads((tmp_path / 'equipment_status.json').read_text())
+    assert [statuses[equipment_id]['status'] for equipment_id in ids] == ['In Storage'] * 3
+    assert checkout_manager.return_many(['KIT-QA'], 'physicist')[1] == [
+        'EQ-chamber: In Storage', 'EQ-electrometer: In Storage', 'EQ-cable: In Storage']
@@ -0,0 +1,130 @@
+"""
+Test the append-only checkout history log
+"""
+import json
+import pytest
+from app.models.json_checkout import JsonCheckoutManager
+from app.models.storage import JsonStorageBackend, SqliteStorageBackend
+
+def test_legacy_history_is_migrated(tmp_path):
+    """The old checkout_history.json array is converted to JSON Lines once"""
+    legacy = [{"id": "hist-001", "equipment_id": "EQ-1", "timestamp": "2025-05-01T10:00:00"}]
+    (tmp_path / 'checkout_history.json').write_text(json.dumps(legacy))
+
+    checkout_manager = JsonCheckoutManager(str(tmp_path))
+
+    assert checkout_manager.checkout_history == legacy
+    assert (tmp_path / 'checkout_history.jsonl').exists()
+    assert not (tmp_path / 'checkout_history.json').exists()
+    assert (tmp_path / 'checkout_history.json.migrated').exists()
+
+def test_status_change_appends_one_line(tmp_path):
+    """Each status change appends exactly one line to the history log"""
+    checkout_manager = JsonCheckoutManager(str(tmp_path))
+    history_file = tmp_path / 'checkout_history.jsonl'
+
+    checkout_manager.checkout_equipment('EQ-1', 'physicist', 'Hammond')
+    checkout_manager.return_equipment('EQ-1', 'physicist')
+
+    lines = history_file.read_text().splitlines()
+    assert len(lines) == 2
+    assert json.loads(lines[1])['new_status'] == 'In Storage'
+
+    reloaded = JsonCheckoutManager(str(tmp_path))
+    assert [entry['id'] for entry in reloaded.checkout_history] == [json.loads(line)['id'] for line in lines]
+
+@pytest.mark.parametrize('backend', [JsonStorageBackend, SqliteStorageBackend])
+def test_refresh_reads_only_appended_history(tmp_path, backend):
+    """Another worker's appends are indexed without reloading the whole log"""
+    writer = JsonCheckoutManager(str(tmp_path), storage=backend(str(tmp_path)))
+    reader = JsonCheckoutManager(str(tmp_path), storage=backend(str(tmp_path)))
+    writer.checkout_equipment('EQ-1', 'physicist', 'Hammond')
+    reader.refresh()
+
+    def no_rebuild(entries):
+        raise AssertionError('history reloaded whole')
+    rebuild, reader.history_index.rebuild = reader.history_index.rebuild, no_rebuild
+    writer.return_equipment('EQ-1', 'physicist')
+    writer.checkout_equipment('EQ-2', 'physicist', 'Hammond')
+    reader.refresh()
+    reader.checkout_equipment('EQ-3', 'physicist', 'Hammond')
+    writer.refresh()
+    reader.refresh()
+    assert [entry['id'] for entry in reader.checkout_history] == [entry['id'] for entry in writer.checkout_history]
+    assert [entry['equipment_id'] for entry in reader.get_checkout_history(limit=2)] == ['EQ-3', 'EQ-2']
+
+    # A rewritten log is loaded whole
+    reader.history_index.rebuild = rebuild
+    writer.checkout_history = writer.checkout_history[1:]
+    writer._save_checkout_history()
+    reader.refresh()
+    assert [entry['id'] for entry in reader.checkout_history] == [entry['id'] for entry in writer.checkout_history]
+
+def test_torn_line_is_skipped(tmp_path):
+    """A partially written trailing line does not corrupt later appends"""
+    history_file = tmp_path / 'checkout_history.jsonl'
+    history_file.write_text('{"id": "ok", "equipment_id": "EQ-1"}\n{"id": "torn')
+
+    checkout_manager = JsonCheckoutManager(str(tmp_path))
+    checkout_manager.checkout_equipment('EQ-2', 'physicist', 'Hammond')
+
+    reloaded = JsonCheckoutManager(str(tmp_path))
+    assert [entry['equipment_id'] for entry in reloaded.checkout_history] == ['EQ-1', 'EQ-2']
+
+def test_history_lookups_match_a_full_sort(tmp_path):
+    """Indexed lookups return what filtering and sorting the whole log returned"""
+    history_file = tmp_path / 'checkout_history.jsonl'
+    timestamps = ['2025-05-03T10:00:00', '2025-05-01T10:00:00', '2025-05-03T10:00:00', '2025-05-02T10:00:00', None]
+    history_file.write_text(''.join(
+        json.dumps({"id": f"h{i}", "equipment_id": f"EQ-{i % 2}", "user": f"user{i % 3}", "timestamp": timestamp}) + '\n'
+        for i, timestamp in enumerate(timestamps)))
+    checkout_manager = JsonCheckoutManager(str(tmp_path))
+    checkout_manager.checkout_equipment('EQ-1', 'user1', 'Hammond')
+    # An entry recorded out of order
+    checkout_manager._append_checkout_history({"id": "late", "equipment_id": "EQ-1", "user": "user1",
+                                               "timestamp": '2025-05-02T12:00:00'})
+
+    def full_sort(equipment_id=None, user=None):
+        history = [entry for entry in checkout_manager.checkout_history
+                   if (not equipment_id or entry['equipment_id'] == equipment_id) and (not user or entry['user'] == user)]
+        return [entry['id'] for entry in sorted(history, key=lambda x: x.get('timestamp') or '', reverse=True)]
+
+    ids = lambda history: [entry['id'] for entry in history]
+    for equipment_id, user in [(None, None), ('EQ-0', None), ('EQ-1', None), (None, 'user1'), ('EQ-1', 'user1'), ('EQ-9', None)]:
+        assert ids(checkout_manager.get_checkout_history(equipment_id=equipment_id, user=user)) == full_sort(equipment_id, user)
+    assert ids(checkout_manager.get_checkout_history(limit=2)) == full_sort()[:2]
+
+    # Replacing the log (as the admin equipment deletion does) re-indexes it
+    checkout_manager.checkout_history = [entry for entry in checkout_manager.checkout_history if entry['equipment_id'] != 'EQ-1']
+    assert ids(checkout_manager.get_checkout_history(user='user1')) == full_sort(user='user1') == ['h4']
+
+def test_history_time_range_matches_parsing_every_timestamp(tmp_path):
+    """Time range lookups return the entries a scan parsing every timestamp finds"""
+    from datetime import datetime, timedelta
+    timestamps = ['2025-05-03T10:00:00', '2025-05-01 08:30:00', '2025/05/02', 'not a date', None,
+                  '2025-05-04T09:00:00Z', '05/02/2025']
+    history_file = tmp_path / 'checkout_history.jsonl'
+    history_file.write_text(''.join(
+        json.dumps({"id": f"h{i}", "equipment_id": f"EQ-{i % 2}", "user": "user1", "timestamp": timestamp}) + '\n'
+        for i, timestamp in enumerate(timestamps)))
+    checkout_manager = JsonCheckoutManager(str(tmp_path))
+    # An entry recorded out of order
+    checkout_manager._append_checkout_history({"id": "late", "equipment_id": "EQ-1", "user": "user1",
+                                               "timestamp": '2025-05-02T12:00:00'})
+
+    parsed = {'h0': datetime(2025, 5, 3, 10), 'h1': datetime(2025, 5, 1, 8, 30), 'h2': datetime(2025, 5, 2),
+              'h5': datetime(2025, 5, 4, 9), 'h6': datetime(2025, 5, 2), 'late': datetime(2025, 5, 2, 12)}
+    assert checkout_manager.history_index.untimed_count == 2
+
+    ids = lambda history: [entry['id'] for entry in history]
+    for since, until in [(datetime(2025, 5, 2), datetime(2025, 5, 3, 10)), (None, datetime(2025, 5, 2)),
+                         (datetime(2025, 5, 2, 0, 0, 1), None), (datetime(2026, 1, 1), None)]:
+        for equipment_id in (None, 'EQ-1'):
+            expected = sorted((entry_id for entry_id, moment in parsed.items()
+                               if (since is None or since <= moment) and (until is None or moment <= until)
+                               and (equipment_id is None or entry_id == 'late' or int(entry_id[1:]) % 2 == 1)),
+                              key=lambda entry_id: parsed[entry_id], reverse=True)
+            result = ids(checkout_manager.get_checkout_history(equipment_id=equipment_id, since=since, until=until))
+            assert sorted(result) == sorted(expected)
+            assert [parsed[entry_id] for entry_id in result] == [parsed[entry_id] for entry_id in expected]
+    assert ids(checkout_manager.history_index.between(datetime(2025, 5, 2), datetime(2025, 5, 2, 23))) == ['h2', 'h6', 'late']
@@ -0,0 +1,215 @@
+"""
+Test the JSON equipment manager's cached records
+"""
+import json
+import pytest
+from datetime import datetime, timedelta
+from app.models.json_equipment import JsonEquipmentDataManager
+from app.models.storage import JsonStorageBackend, SqliteStorageBackend
+
+EQUIPMENT = [
+    {"id": "EQ-1", "category": "Chamber", "manufacturer": "PTW", "model": "30013",
+     "serial_number": "1001", "location": "Room 101"},
+    {"id": "EQ-2", "category": "Electrometer", "manufacturer": "Standard Imaging", "model": "MAX 4000",
+     "serial_number": "2002", "location": "Physics Lab"},
+    {"id": "EQ-3", "category": "Chamber", "manufacturer": "Exradin", "model": "A12",
+     "serial_number": "3003", "location": None, "notes": "Spare"},
+]
+
+def make_manager(tmp_path):
+    """Create a manager over a fresh data directory"""
+    (tmp_path / 'equipment.json').write_text(json.dumps(EQUIPMENT))
+    return JsonEquipmentDataManager(str(tmp_path), storage=JsonStorageBackend(str(tmp_path)))
+
+def test_records_are_shared_and_read_only(tmp_path):
+    """Getters serve the same read-only records; copies are writable"""
+    manager = make_manager(tmp_path)
+
+    first = manager.get_all_equipment()
+    assert [item['id'] for item in first] == ['EQ-1', 'EQ-2', 'EQ-3']
+    assert first[0] is manager.get_all_equipment()[0]
+    assert manager.get_equipment_by_category('Chamber')[0] is first[0]
+
+    with pytest.raises(TypeError):
+        first[0]['location'] = 'Vault'
+
+    copy = first[0].copy()
+    copy['location'] = 'Vault'
+    assert manager.get_equipment_by_id('EQ-1')['location'] == 'Room 101'
+
+def test_filters_match_previous_behaviour(tmp_path):
+    """Location and keyword filters stay case-insensitive pattern matches"""
+    manager = make_manager(tmp_path)
+
+    assert [item['id'] for item in manager.get_equipment_by_location('room')] == ['EQ-1']
+    assert [item['id'] for item in manager.get_equipment_by_location('^phys')] == ['EQ-2']
+    assert [item['id'] for item in manager.search_equipment('max 4')] == ['EQ-2']
+    assert [item['id'] for item in manager.search_equipment('spare')] == ['EQ-3']
+    assert manager.search_equipment('(') == []
+
+def test_indexes_follow_reloads(tmp_path):
+    """Index lookups are exact or prefix matches and track changed records"""
+    manager = make_manager(tmp_path)
+
+    assert [item['id'] for item in manager.get_equipment_by_location('  room   101', match='exact')] == ['EQ-1']
+    assert [item['id'] for item in manager.get_equipment_by_location('PHYS', match='prefix')] == ['EQ-2']
+    assert [item['id'] for item in manager.lookup_equipment('model', 'A', prefix=True)] == ['EQ-3']
+    assert manager.get_unique_manufacturers() == ['Exradin', 'PTW', 'Standard Imaging']
+
+    changed = [dict(item) for item in EQUIPMENT[1:]]
+    changed[1]['category'] = 'Electrometer'
+    changed.append({"id": "EQ-4", "category": "Chamber", "manufacturer": "PTW", "location": "Room 102"})
+    (tmp_path / 'equipment.json').write_text(json.dumps(changed))
+    manager.load_data()
+
+    assert [item['id'] for item in manager.get_equipment_by_category('Electrometer')] == ['EQ-2', 'EQ-3']
+    assert [item['id'] for item in manager.get_equipment_by_category('Chamber')] == ['EQ-4']
+    assert [item['id'] for item in manager.lookup_equipment('manufacturer', 'PTW')] == ['EQ-4']
+    assert [item['id'] for item in manager.get_equipment_by_location('room 10', match='prefix')] == ['EQ-4']
+
+def test_search_is_ranked_and_scoped(tmp_path):
+    """Search ANDs its terms, ranks the results and honours field scopes"""
+    manager = make_manager(tmp_path)
+
+    assert manager.search_equipment('standard max') == [manager.get_all_equipment()[1]]
+    assert manager.search_equipment('room lab') == []
+    # A serial number prefix outranks a model prefix
+    assert [item['id'] for item in manager.search_equipment('30')] == ['EQ-3', 'EQ-1']
+    assert [item['id'] for item in manager.search_equipment('sn:003')] == ['EQ-3']
+    assert [item['id'] for item in manager.search_equipment('model:30013')] == ['EQ-1']
+    assert manager.search_equipment('sn:ptw') == []
+    # Any part of a word matches, as the substring scan it replaced did
+    assert [item['id'] for item in manager.search_equipment('0013')] == ['EQ-1']
+    assert [item['id'] for item in manager.search_equipment('ysics')] == ['EQ-2']
+    assert [item['id'] for item in manager.search_equipment('12')] == ['EQ-3']
+
+    changed = [dict(item) for item in EQUIPMENT]
+    changed[0]['serial_number'] = 'XK-7731'
+    (tmp_path / 'equipment.json').write_text(json.dumps(changed))
+    manager.load_data()
+
+    assert [item['id'] for item in manager.search_equipment('773')] == ['EQ-1']
+    assert manager.search_equipment('sn:1001') == []
+
+def test_calibration_dates_are_parsed_once_per_change(tmp_path):
+    """Calibration queries read the due dates normalized at load time"""
+    changed = [dict(item) for item in EQUIPMENT]
+    changed[0]['calibration_due_date'] = '01/2000'
+    changed[1]['calibration_due_date'] = '12/2999 - repaired'
+    changed[2]['calibration_due_date'] = 'sometime'
+    (tmp_path / 'equipment.json').write_text(json.dumps(changed))
+    manager = JsonEquipmentDataManager(str(tmp_path), storage=JsonStorageBackend(str(tmp_path)))
+
+    assert manager.get_calibration_date('EQ-2').due == datetime(2999, 12, 31)
+    assert manager.get_calibration_diagnostics() == [
+        {'id': 'EQ-3', 'text': 'sometime', 'error': 'unrecognized format'}]
+    assert manager.get_calibration_status_counts() == {'current': 1, 'due_soon': 0, 'overdue': 1, 'unknown': 1}
+    assert [item['id'] for item in manager.get_calibration_due_soon()] == ['EQ-1']
+    assert [item['id'] for item in manager.filter_by_calibration_date(status='unknown')] == ['EQ-3']
+    assert [item['id'] for item in manager.filter_by_calibration_date(start_date=datetime(2020, 1, 1))] == ['EQ-2']
+
+def test_calibration_windows_follow_due_date_changes(tmp_path):
+    """Status buckets and date windows come from the sorted due date index"""
+    today = datetime.now()
+    due = lambda days: (today + timedelta(days=days)).strftime('%m/%d/%Y')
+    changed = [dict(item) for item in EQUIPMENT]
+    changed[0]['calibration_due_date'] = due(-3)
+    changed[1]['calibration_due_date'] = due(10)
+    changed[2]['calibration_due_date'] = due(90)
+    (tmp_path / 'equipment.json').write_text(json.dumps(changed))
+    manager = JsonEquipmentDataManager(str(tmp_path), storage=JsonStorageBackend(str(tmp_path)))
+
+    assert manager.get_calibration_status_counts() == {'current': 1, 'due_soon': 1, 'overdue': 1, 'unknown': 0}
+    assert [item['id'] for item in manager.filter_by_calibration_date(status='due_soon')] == ['EQ-2']
+    window = manager.filter_by_calibration_date(start_date=today - timedelta(days=5), end_date=today + timedelta(days=30))
+    assert [(item['id'], item['calibration_status']) for item in window] == [('EQ-1', 'overdue'), ('EQ-2', 'due_soon')]
+
+    changed[2]['calibration_due_date'] = due(5)
+    changed[1]['notes'] = 'Loaner'
+    (tmp_path / 'equipment.json').write_text(json.dumps(changed))
+    manager.load_data()
+
+    assert [item['id'] for item in manager.get_calibration_due_soon()] == ['EQ-1', 'EQ-2', 'EQ-3']
+    assert manager.filter_by_calibration_date(status='current') == []
+
+@pytest.mark.parametrize('backend', [JsonStorageBackend, SqliteStorageBackend])
+def test_mutations_update_indexes_and_persist(tmp_path, monkeypatch, backend):
+    """add/update/delete change the records in place and save only that record"""
+    (tmp_path / 'equipment.json').write_text(json.dumps(EQUIPMENT))
+    storage = backend(str(tmp_path))
+    manager = JsonEquipmentDataManager(str(tmp_path), storage=storage)
+    monkeypatch.setattr(manager, 'load_data', lambda: pytest.fail("mutations must not reload"))
+
+    assert manager.add_equipment({"id": "EQ-4", "category": "Chamber", "manufacturer": "IBA",
+                                  "serial_number": "4004", "calibration_due_date": "01/2000"})
+    assert not manager.add_equipment({"id": "EQ-4"})
+    assert manager.update_equipment('EQ-1', {"location": "Vault", "id": "ignored"})
+    assert manager.delete_equipment('EQ-2')
+    assert not manager.delete_equipment('EQ-2')
+
+    assert [item['id'] for item in manager.get_equipment_by_category('Chamber')] == ['EQ-1', 'EQ-3', 'EQ-4']
+    assert [item['id'] for item in manager.get_equipment_by_location('vault', match='exact')] == ['EQ-1']
+    assert [item['id'] for item in manager.search_equipment('sn:4004')] == ['EQ-4']
+    assert manager.search_equipment('standard') == []
+    assert manager.get_calibration_status_counts()['overdue'] == 1
+    assert list(manager.all_equipment_df.index) == ['EQ-1', 'EQ-3', 'EQ-4']
+
+    stored = {item['id']: item for item in backend(str(tmp_path)).load('equipment')}
+    assert sorted(stored) == ['EQ-1', 'EQ-3', 'EQ-4']
+    assert stored['EQ-1']['location'] == 'Vault' and stored['EQ-1']['model'] == '30013'
+    assert 'notes' not in stored['EQ-4']
+
+def test_records_are_stored_items_with_lazy_dataframes(tmp_path):
+    """Records keep the stored fields and share strings; DataFrames are built on demand"""
+    duplicated = EQUIPMENT + [{"id": "EQ-1", "category": "Chamber"}, {"category": "Chamber"}]
+    (tmp_path / 'equipment.json').write_text(json.dumps(duplicated))
+    manager = JsonEquipmentDataManager(str(tmp_path), storage=JsonStorageBackend(str(tmp_path)))
+
+    first, second, third = manager.get_all_equipment()
+    assert dict(first) == EQUIPMENT[0]
+    assert first['notes'] is None and 'notes' not in first
+    assert manager.get_equipment_by_id('EQ-1')['notes'] is None
+    assert first['category'] is third['category']
+
+    # Saving would drop the unreadable records, so edits are refused
+    assert not manager.update_equipment('EQ-1', {'location': 'Vault'})
+    assert json.loads((tmp_path / 'equipment.json').read_text()) == duplicated
+
+    assert manager._all_equipment_df is None
+    assert list(manager.chambers_df.index) == ['EQ-1', 'EQ-3']
+    assert manager.all_equipment_df.loc['EQ-3', 'notes'] == 'Spare'
+
+def test_query_filters_sorts_and_pages(tmp_path):
+    """query_equipment ANDs index filters, sorts with file-order ties and pages"""
+    manager = make_manager(tmp_path)
+    ids = lambda result: (result[0], [item['id'] for item in result[1]])
+
+    assert ids(manager.query_equipment(sort='manufacturer')) == (3, ['EQ-3', 'EQ-1', 'EQ-2'])
+    assert ids(manager.query_equipment(sort='-location', limit=2)) == (3, ['EQ-1', 'EQ-2'])
+    assert ids(manager.query_equipment(sort='-location', offset=2)) == (3, ['EQ-3'])
+    assert ids(manager.query_equipment(filters={'category': ['Chamber']}, sort='-manufacturer')) == (2, ['EQ-1', 'EQ-3'])
+    assert ids(manager.query_equipment(filters={'category': ['Chamber'], 'location': ['room']})) == (1, ['EQ-1'])
+    assert ids(manager.query_equipment(filters={'manufacturer': ['PTW', 'Exradin']}, within={'EQ-3'})) == (1, ['EQ-3'])
+    assert ids(manager.query_equipment(query='30', limit=1)) == (2, ['EQ-3'])
+    # Sorted walks and sorts of filtered ids agree
+    assert ids(manager.query_equipment(sort='-location')) == ids(manager.query_equipment(within=['EQ-1', 'EQ-2', 'EQ-3'], sort='-location'))
+
+    with pytest.raises(ValueError):
+        manager.query_equipment(sort='serial_number')
+
+def test_fuzzy_lookup_tolerates_typos(tmp_path):
+    """Mistyped ids and serials find their record, and the index follows writes"""
+    manager = make_manager(tmp_path)
+    manager.add_equipment({"id": "Chamber-CNMC-123456", "category": "Chamber", "serial_number": "SN-98765"})
+    similar = lambda text: [(item['id'], match.field) for item, match in manager.find_similar_equipment(text, limit=1)]
+
+    assert similar('chamber cnmc 123456') == [('Chamber-CNMC-123456', 'id')]
+    assert similar('Chamber-CNMC-124356') == [('Chamber-CNMC-123456', 'id')]
+    assert similar('sn98756') == [('Chamber-CNMC-123456', 'serial_number')]
+    assert similar('MAX4000') == [('EQ-2', 'model')]
+    assert similar('zzzzzz') == []
+
+    manager.update_equipment('EQ-2', {'serial_number': 'SN-55555'})
+    assert similar('sn55555') == [('EQ-2', 'serial_number')]
+    manager.delete_equipment('Chamber-CNMC-123456')
+    assert all(item['id'] != 'Chamber-CNMC-123456' for item, _ in manager.find_similar_equipment('Chamber-CNMC-123456'))
@@ -0,0 +1,74 @@
+"""
+Test the materialized equipment view
+"""
+import json
+from app.models.equipment_view import EquipmentView
+from app.models.json_checkout import JsonCheckoutManager
+from app.models.json_equipment import JsonEquipmentDataManager
+from app.models.storage import JsonStorageBackend
+from app.models.ticket import TicketManager, TicketStatus
+from app.models.transport_request import TransportManager, TransportStatus
+
+EQUIPMENT = [
+    {"id": "EQ-1", "category": "Chamber", "manufacturer": "PTW", "location": "Room 101"},
+    {"id": "EQ-2", "category": "Electrometer", "manufacturer": "Standard Imaging", "location": "Physics Lab"},
+]
+
+def test_view_follows_manager_changes(tmp_path):
+    """Rows join status, condition, tickets and transport and track every manager's writes"""
+    (tmp_path / 'equipment.json').write_text(json.dumps(EQUIPMENT))
+    storage = JsonStorageBackend(str(tmp_path))
+    equipment = JsonEquipmentDataManager(str(tmp_path), storage=storage)
+    checkout = JsonCheckoutManager(str(tmp_path), storage=storage)
+    tickets = TicketManager(str(tmp_path), storage=storage)
+    transports = TransportManager(str(tmp_path), storage=storage)
+    view = EquipmentView(equipment, checkout, tickets, transports)
+
+    row = view.get('EQ-1')
+    assert row.equipment is equipment.get_record('EQ-1')
+    assert (row.checked_out, row.condition, row.open_tickets, row.transport) == (False, 'normal', 0, None)
+
+    checkout.checkout_equipment('EQ-1', 'physicist', 'Vault')
+    ticket = tickets.create_ticket('EQ-2', 'Cable', 'Loose connector', 'physicist', equipment_condition='warning')
+    request = transports.create_transport_request('EQ-2', 'Physics Lab', 'Vault', 'physicist')
+
+    assert view.get('EQ-1').checked_out
+    assert view.get('EQ-2')[2:] == ('warning', 1, request)
+    assert view.filter(equipment.get_all_equipment(), status='checked_out') == [equipment.get_record('EQ-1')]
+    assert [item['id'] for item in view.filter(equipment.get_all_equipment(), status='in_transport',
+                                               condition='warning')] == ['EQ-2']
+
+    tickets.update_ticket(ticket.id, status=TicketStatus.CLOSED)
+    transports.update_transport_request(request.id, status=TransportStatus.COMPLETED)
+    equipment.update_equipment('EQ-2', {'location': 'Vault'})
+    equipment.delete_equipment('EQ-1')
+
+    assert [row.equipment['location'] for row in view.rows()] == ['Vault']
+    assert (view.get('EQ-2').open_tickets, view.get('EQ-2').transport) == (0, None)
+    assert view.get('EQ-1').equipment is None
+
+def test_facet_counters_follow_changes(tmp_path):
+    """Facet counts match a recount after writes, and can be restricted to ids"""
+    (tmp_path / 'equipment.json').write_text(json.dumps(EQUIPMENT))
+    storage = JsonStorageBackend(str(tmp_path))
+    equipment = JsonEquipmentDataManager(str(tmp_path), storage=storage)
+    checkout = JsonCheckoutManager(str(tmp_path), storage=storage)
+    tickets = TicketManager(str(tmp_path), storage=storage)
+    view = EquipmentView(equipment, checkout, tickets, TransportManager(str(tmp_path), storage=storage))
+
+    assert view.facets()['status'] == {'In Storage': 2}
+    checkout.checkout_equipment('EQ-1', 'physicist', 'Vault')
+    tickets.update_equipment_condition('EQ-2', 'critical')
+    equipment.update_equipment('EQ-2', {'category': 'Chamber'})
+
+    facets = view.facets()
+    assert facets['category'] == {'Chamber': 2}
+    assert facets['status'] == {'Checked Out': 1, 'In Storage': 1}
+    assert facets['condition'] == {'normal': 1, 'critical': 1}
+    assert facets['calibration'] == {'current': 0, 'due_soon': 0, 'overdue': 0, 'unknown': 2}
+    assert facets['total'] == 2
+    assert view.facets(ids=['EQ-2', 'EQ-9'])['location'] == {'Physics Lab': 1}
+    assert view.facets(ids=['EQ-2', 'EQ-9'])['total'] == 1
+
+    fresh = EquipmentView(equipment, checkout, tickets, view.transport_manager)
+    assert fresh.facets() == facets
@@ -0,0 +1,42 @@
+"""
+Test the Excel equipment loader's snapshot cache
+"""
+import os
+import shutil
+import pandas as pd
+from app.models.equipment import EquipmentDataManager, SNAPSHOT_FILENAME
+
+RESOURCES = os.path.join(os.path.dirname(__file__), '..', '..', 'Resources')
+
+def copy_workbooks(tmp_path):
+    """Copy the Excel files into a fresh data directory"""
+    for name in os.listdir(RESOURCES):
+        if name.endswith('.xls'):
+            shutil.copy(os.path.join(RESOURCES, name), tmp_path / name)
+    return str(tmp_path)
+
+def test_snapshot_replaces_excel_parsing(tmp_path, monkeypatch):
+    """Data loads on first use, and later loads skip Excel until the files change"""
+    data_dir = copy_workbooks(tmp_path)
+    manager = EquipmentDataManager(data_dir)
+    assert not (tmp_path / SNAPSHOT_FILENAME).exists()
+    expected = manager.all_equipment_df
+    assert manager.get_equipment_stats()['total_equipment'] == len(expected) > 0
+    assert (tmp_path / SNAPSHOT_FILENAME).exists()
+
+    read_excel = pd.read_excel
+    parsed = []
+    monkeypatch.setattr(pd, 'read_excel', lambda *args, **kwargs: parsed.append(args) or read_excel(*args, **kwargs))
+
+    # Same files, or the same contents with a new modification time
+    assert EquipmentDataManager(data_dir).all_equipment_df.equals(expected)
+    os.utime(manager.survey_meters_file)
+    assert EquipmentDataManager(data_dir).all_equipment_df.equals(expected)
+    assert parsed == []
+
+    # Different contents
+    monkeypatch.setattr(EquipmentDataManager, '_source_hashes', lambda self: {})
+    os.utime(manager.chambers_file, ns=(0, 0))
+    assert EquipmentDataManager(data_dir).all_equipment_df.equals(expected)
+    # Each workbook is read once for all of its sheets
+    assert len(parsed) == 2
@@ -0,0 +1,78 @@
+"""
+Test the JSON codecs and atomic/write-behind saves
+"""
+import json
+import math
+import os
+from datetime import datetime
+from app.models import json_utils
+from app.models.json_utils import (
+    save_json, load_json, configure_write_behind, flush_write_behind, file_stamp,
+    set_codec, get_codec
+)
+
+def test_failed_save_keeps_previous_file(tmp_path, monkeypatch):
+    """A save that fails mid-write leaves the old contents and no temp files"""
+    path = str(tmp_path / 'users.json')
+    save_json({"admin": {"role": "admin"}}, path)
+
+    def failing_fsync(fd):
+        raise OSError("disk full")
+    monkeypatch.setattr(json_utils.os, 'fsync', failing_fsync)
+
+    assert save_json({"admin": {"role": "user"}}, path) is False
+    monkeypatch.undo()
+
+    assert load_json(path) == {"admin": {"role": "admin"}}
+    assert os.listdir(tmp_path) == ['users.json']
+
+def test_save_keeps_file_permissions(tmp_path):
+    """Replacing a file keeps its mode; new files get the default mode"""
+    path = str(tmp_path / 'users.json')
+    save_json({}, path)
+    assert os.stat(path).st_mode & 0o777 == json_utils.NEW_FILE_MODE
+
+    os.chmod(path, 0o640)
+    save_json({"admin": {"role": "admin"}}, path)
+    assert os.stat(path).st_mode & 0o777 == 0o640
+
+def test_write_behind_coalesces_saves(tmp_path):
+    """Queued saves are readable immediately and flushed as one write"""
+    path = str(tmp_path / 'equipment_status.json')
+    configure_write_behind(window=60, max_delay=60)
+    try:
+        for i in range(5):
+            save_json({"EQ-1": {"status": f"v{i}"}}, path)
+
+        assert not os.path.exists(path)
+        assert load_json(path) == {"EQ-1": {"status": "v4"}}
+        queued_stamp = file_stamp(path)
+
+        assert flush_write_behind(path)
+        with open(path) as f:
+            assert json.load(f) == {"EQ-1": {"status": "v4"}}
+        # The flush of our own save is not mistaken for an external change
+        assert file_stamp(path) == queued_stamp
+    finally:
+        configure_write_behind(enabled=False)
+
+def test_codecs_decode_only_declared_date_fields(tmp_path):
+    """Both codecs write identical data and only declared fields become datetimes"""
+    path = str(tmp_path / 'tickets.json')
+    created = datetime(2025, 5, 1, 10, 0, 0, 123456)
+    tickets = [{"id": "T-1", "created_at": created, "title": "2025-05-01T10:00:00Z"}]
+
+    codecs = ['json', 'orjson'] if json_utils.ORJSON_AVAILABLE else ['json']
+    try:
+        for name in codecs:
+            set_codec(name)
+            save_json(tickets, path)
+            loaded = load_json(path, date_fields=['created_at'])
+
+            assert loaded == [{"id": "T-1", "created_at": created, "title": "2025-05-01T10:00:00Z"}]
+            assert load_json(path)[0]["created_at"] == created.isoformat()
+    finally:
+        set_codec()
+
+    # Legacy files with NaN still load with orjson
+    assert math.isnan(get_codec().loads(b'{"value": NaN}')["value"])
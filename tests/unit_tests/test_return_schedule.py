@@ -0,0 +1,53 @@
+"""
+Test the expected-return schedule of checked out equipment
+"""
+import json
+import random
+from datetime import datetime, timedelta
+from app.models.json_checkout import JsonCheckoutManager
+
+def test_schedule_matches_a_status_scan(tmp_path):
+    """Overdue and due-soon lookups return what scanning every status entry returned"""
+    now = datetime.now()
+    statuses = {
+        'EQ-late': {"status": "Checked Out", "expected_return": (now - timedelta(days=3)).isoformat()},
+        'EQ-bad': {"status": "Checked Out", "expected_return": "next week"},
+        'EQ-stored': {"status": "In Storage", "expected_return": None},
+    }
+    (tmp_path / 'equipment_status.json').write_text(json.dumps(statuses))
+    checkout_manager = JsonCheckoutManager(str(tmp_path))
+
+    rng = random.Random(3)
+    for i in range(200):
+        equipment_id = f"EQ-{rng.randrange(60)}"
+        if rng.random() < 0.3:
+            checkout_manager.return_equipment(equipment_id, 'physicist')
+        else:
+            checkout_manager.checkout_equipment(equipment_id, 'physicist', 'Room 1', rng.uniform(-2, 5))
+
+    def scan(since=None, until=None):
+        due = []
+        for equipment_id, status in checkout_manager.equipment_status.items():
+            if status.get("status") != "Checked Out" or not status.get("expected_return"):
+                continue
+            try:
+                return_date = datetime.fromisoformat(status["expected_return"])
+            except ValueError:
+                continue
+            if (since is None or since <= return_date) and (until is None or return_date < until):
+                due.append((return_date, equipment_id))
+        return sorted(due)
+
+    overdue = checkout_manager.get_overdue_equipment()
+    assert [item["id"] for item in overdue] == [equipment_id for _, equipment_id in scan(until=datetime.now())]
+    assert overdue[0]["id"] == 'EQ-late' and overdue[0]["days_overdue"] == 3
+    assert checkout_manager.get_returns_due() == scan()
+    soon = checkout_manager.get_returns_due(hours=48)
+    assert soon and all(now <= due <= now + timedelta(hours=49) for due, _ in soon)
+    assert checkout_manager.get_next_return_due() == scan()[0]
+
+    # Statuses removed directly (as the admin equipment deletion does) are unscheduled
+    del checkout_manager.equipment_status['EQ-late']
+    checkout_manager._save_equipment_status('EQ-late')
+    assert checkout_manager.get_next_return_due() == scan()[0]
+    assert 'EQ-late' not in checkout_manager.return_schedule
@@ -0,0 +1,43 @@
+"""
+Test the maintained equipment status counters
+"""
+import random
+from app.models.json_checkout import JsonCheckoutManager
+
+def test_status_counts_match_a_recount(tmp_path):
+    """Counters kept up to date by status changes agree with counting every entry"""
+    checkout_manager = JsonCheckoutManager(str(tmp_path))
+    rng = random.Random(5)
+    for _ in range(300):
+        equipment_id = f"EQ-{rng.randrange(40)}"
+        action = rng.random()
+        if action < 0.4:
+            checkout_manager.checkout_equipment(equipment_id, 'physicist', 'Room 1')
+        elif action < 0.7:
+            checkout_manager.return_equipment(equipment_id, 'physicist')
+        else:
+            checkout_manager.update_equipment_status(equipment_id, rng.choice(checkout_manager.STATUS_OPTIONS))
+    # Removed directly, as the admin equipment deletion does
+    del checkout_manager.equipment_status['EQ-3']
+    checkout_manager._save_equipment_status('EQ-3')
+    # Status entries of equipment that is not in the inventory are not counted
+    checkout_manager.checkout_equipment('UNKNOWN-1', 'physicist', 'Room 1')
+
+    def recount(equipment_ids):
+        statuses = [checkout_manager.get_equipment_status(equipment_id).get('status') for equipment_id in equipment_ids]
+        return {status: statuses.count(status) for status in checkout_manager.STATUS_OPTIONS}
+
+    def scan(manager, status):
+        return [equipment_id for equipment_id, entry in manager.equipment_status.items()
+                if entry.get('status') == status]
+
+    inventory = [f"EQ-{i}" for i in range(50)]
+    assert checkout_manager.get_status_counts(inventory) == recount(inventory)
+    assert checkout_manager.get_status_counts(inventory[::3]) == recount(inventory[::3])
+
+    reloaded = JsonCheckoutManager(str(tmp_path))
+    assert reloaded.get_status_counts(inventory) == recount(inventory)
+    # Listed in dataset order, as scanning the entries did
+    for status in checkout_manager.STATUS_OPTIONS:
+        for manager in (checkout_manager, reloaded):
+            assert [item['id'] for item in manager.get_equipment_by_status(status)] == scan(manager, status)
@@ -0,0 +1,106 @@
+"""
+Test the JSON and SQLite storage backends
+"""
+import json
+from app.models.storage import JsonStorageBackend, SqliteStorageBackend, unit_of_work
+from app.models.ticket import TicketManager
+from app.models.json_checkout import JsonCheckoutManager
+
+def test_sqlite_imports_existing_json(tmp_path):
+    """The SQLite backend imports a dataset's JSON file on first use"""
+    status = {"EQ-1": {"status": "Checked Out", "last_updated": "2025-05-01T10:00:00"}}
+    (tmp_path / 'equipment_status.json').write_text(json.dumps(status))
+
+    storage = SqliteStorageBackend(str(tmp_path))
+
+    assert storage.load('equipment_status') == status
+
+def test_sqlite_put_and_delete_single_records(tmp_path):
+    """Row-level writes keep insertion order and leave other records alone"""
+    storage = SqliteStorageBackend(str(tmp_path))
+    storage.save('equipment', [{"id": "EQ-1", "category": "Chamber"}, {"id": "EQ-2", "category": "Electrometer"}])
+
+    storage.put('equipment', 'EQ-1', {"id": "EQ-1", "category": "Survey Meter"})
+    storage.put('equipment', 'EQ-3', {"id": "EQ-3", "category": "Chamber"})
+    storage.delete('equipment', 'EQ-2')
+
+    assert storage.load('equipment') == [
+        {"id": "EQ-1", "category": "Survey Meter"},
+        {"id": "EQ-3", "category": "Chamber"},
+    ]
+
+def test_managers_work_on_both_backends(tmp_path):
+    """TicketManager round-trips tickets through either backend"""
+    for storage in (JsonStorageBackend(str(tmp_path / 'json')), SqliteStorageBackend(str(tmp_path / 'sqlite'))):
+        ticket_manager = TicketManager(storage.data_dir, storage=storage)
+        ticket = ticket_manager.create_ticket('EQ-1', 'Cable damaged', 'Connector is loose', 'physicist',
+                                              equipment_condition='warning')
+
+        reloaded = TicketManager(storage.data_dir, storage=storage)
+        assert reloaded.get_ticket(ticket.id).title == 'Cable damaged'
+        assert reloaded.get_equipment_condition('EQ-1') == 'warning'
+
+def test_refresh_reloads_only_changed_datasets(tmp_path):
+    """A second manager picks up another manager's writes on refresh"""
+    storage = JsonStorageBackend(str(tmp_path))
+    writer = TicketManager(str(tmp_path), storage=storage)
+    reader = TicketManager(str(tmp_path), storage=storage)
+    conditions = reader.equipment_conditions
+
+    ticket = writer.create_ticket('EQ-1', 'Cable damaged', 'Connector is loose', 'physicist')
+    writer_tickets = writer.tickets
+    writer.refresh()
+    reader.refresh()
+
+    assert writer.tickets is writer_tickets
+    assert reader.get_ticket(ticket.id) is not None
+    assert reader.equipment_conditions is not conditions
+
+def test_record_writes_keep_other_workers_changes(tmp_path):
+    """A record written from a stale copy does not undo another worker's write"""
+    first = JsonCheckoutManager(str(tmp_path), storage=JsonStorageBackend(str(tmp_path)))
+    second = JsonCheckoutManager(str(tmp_path), storage=JsonStorageBackend(str(tmp_path)))
+
+    first.checkout_equipment('EQ-1', 'physicist', 'Room 1')
+    # second has not refreshed since first's write
+    second.checkout_equipment('EQ-2', 'physicist', 'Room 2')
+    second.update_equipment_status('EQ-3', 'Under Repair')
+    del second.equipment_status['EQ-3']
+    second._save_equipment_status('EQ-3')
+
+    assert second.storage.changed('equipment_status')
+    second.refresh()
+    assert sorted(second.equipment_status) == ['EQ-1', 'EQ-2']
+
+def test_unit_of_work_writes_each_dataset_once(tmp_path):
+    """Several ticket mutations in one unit of work write each file once"""
+    storage = JsonStorageBackend(str(tmp_path))
+    ticket_manager = TicketManager(str(tmp_path), storage=storage)
+    writes = []
+    save = storage.save
+    storage.save = lambda name, data: writes.append(name) or save(name, data)
+
+    with unit_of_work():
+        ticket = ticket_manager.create_ticket('EQ-1', 'Cable damaged', 'Connector is loose', 'physicist',
+                                              equipment_condition='warning')
+        ticket_manager.update_ticket(ticket.id, equipment_condition='critical')
+        ticket_manager.add_comment(ticket.id, 'Replaced connector', 'physicist')
+        assert writes == []
+
+    assert sorted(writes) == ['equipment_conditions', 'tickets']
+    reloaded = TicketManager(str(tmp_path), storage=storage)
+    assert reloaded.get_equipment_condition('EQ-1') == 'critical'
+    assert len(reloaded.get_ticket(ticket.id).comments) == 1
+
+def test_unit_of_work_rolls_back_failed_sqlite_flush(tmp_path):
+    """A failing write rolls back the whole SQLite batch and marks the data stale"""
+    storage = SqliteStorageBackend(str(tmp_path))
+    ticket_manager = TicketManager(str(tmp_path), storage=storage)
+    storage._connection().execute('DROP TABLE tickets')
+
+    with unit_of_work():
+        ticket_manager.create_ticket('EQ-1', 'Cable damaged', 'Connector is loose', 'physicist',
+                                     equipment_condition='warning')
+
+    assert storage.load('equipment_conditions') == {}
+    assert ticket_manager.storage.changed('equipment_conditions')